@@ -0,0 +1,57 @@
+"""
+Measures how scan-job throughput scales with the number of workers, for both
+queue backends. Each job sleeps for a fixed time in place of a real scan (which
+is dominated by waiting on GitHub, PyPI and pip-audit), so the numbers show the
+queue's own overhead and contention.
+
+Run with: uv run python -m benchmarks.job_queue_benchmark [jobs] [job_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from src.services.job_queue import open_job_queue
+from src.services.scan_worker import run_workers
+from src.utils.resp import LocalRedisServer, RespClient
+
+
+def run(url: str, jobs: int, workers: int, job_seconds: float) -> float:
+    with open_job_queue(url) as queue:
+        for i in range(jobs):
+            queue.enqueue("deps", {"url": f"https://github.com/org/repo-{i}"})
+    start = time.perf_counter()
+    processed = run_workers(
+        url, concurrency=workers, exit_when_idle=True, poll_interval=0.01,
+        handler=lambda job: time.sleep(job_seconds) or {},
+    )
+    assert processed == jobs
+    return time.perf_counter() - start
+
+
+def main(jobs: int = 400, job_ms: float = 20.0):
+    job_seconds = job_ms / 1000
+    server = LocalRedisServer(port=0).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Jobs: {jobs}, {job_ms:.0f} ms each")
+        for backend in ("sqlite", "redis"):
+            print(f"\n{backend}")
+            baseline = None
+            for workers in (1, 2, 4, 8, 16):
+                if backend == "sqlite":
+                    url = f"sqlite:///{os.path.join(tmp, f'jobs-{workers}.db')}"
+                else:
+                    RespClient.from_url(server.url).execute_command("FLUSHDB")
+                    url = server.url
+                elapsed = run(url, jobs, workers, job_seconds)
+                rate = jobs / elapsed
+                baseline = baseline or rate
+                print(f"  {workers:>2} workers {elapsed:>7.2f} s {rate:>8.1f} jobs/s   {rate / baseline:>5.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 20.0,
+    )
@@ -0,0 +1,74 @@
+"""
+Compares the memory footprint and serialization throughput of report rows
+stored as ad-hoc dicts against the slotted models and the ColumnarReport.
+
+Run with: uv run python -m benchmarks.models_benchmark [rows]
+"""
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from src.models.report import ColumnarReport
+from src.models.vulnerability import Vulnerability
+
+PACKAGES = [f"package-{i}" for i in range(2000)]
+VERSIONS = [f"{major}.{minor}.{patch}" for major in range(3) for minor in range(10) for patch in range(5)]
+ADVISORIES = [(f"PYSEC-2024-{i}", f"Advisory text number {i} describing the issue in detail.") for i in range(500)]
+
+
+def make_row(rng: random.Random) -> dict:
+    # Build fresh string objects per row, as json/HTTP parsing would.
+    advisory_id, description = rng.choice(ADVISORIES)
+    version = rng.choice(VERSIONS)
+    return {
+        "package": "".join(rng.choice(PACKAGES)),
+        "version": "".join(version),
+        "id": "".join(advisory_id),
+        "description": "".join(description),
+        "fix_versions": ["".join(rng.choice(VERSIONS))],
+    }
+
+
+def measure(label: str, build, rows: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<20} {current / rows:>8.1f} B/row   build {rows / elapsed:>12,.0f} rows/s")
+    return container
+
+
+def serialize(label: str, write, rows: int):
+    out = io.StringIO()
+    start = time.perf_counter()
+    write(out)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} jsonl {rows / elapsed:>12,.0f} rows/s")
+
+
+def main(rows: int = 200_000):
+    print(f"Rows: {rows:,}")
+    dicts = measure("dicts", lambda: [make_row(random.Random(i)) for i in range(rows)], rows)
+    models = measure(
+        "slotted models",
+        lambda: [Vulnerability.from_dict(make_row(random.Random(i))) for i in range(rows)],
+        rows,
+    )
+    report = measure(
+        "columnar report",
+        lambda: ColumnarReport.for_model(Vulnerability, (make_row(random.Random(i)) for i in range(rows))),
+        rows,
+    )
+
+    serialize("dicts", lambda out: [out.write(json.dumps(row) + "\n") for row in dicts], rows)
+    serialize("slotted models", lambda out: [out.write(json.dumps(m.to_dict()) + "\n") for m in models], rows)
+    serialize("columnar report", report.write_jsonl, rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
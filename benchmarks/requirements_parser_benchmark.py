@@ -0,0 +1,57 @@
+"""
+Compares the streaming requirements parser against the previous approach of
+splitting lines and running every line through packaging.Requirement, on a
+pip-compile style file with hashes.
+
+Run with: uv run python -m benchmarks.requirements_parser_benchmark [packages]
+"""
+import io
+import sys
+import time
+
+from packaging.requirements import Requirement
+
+from src.services.requirements_parser import iter_requirements
+
+
+def make_requirements(packages: int) -> str:
+    lines = []
+    for i in range(packages):
+        lines.append(f"package-{i}=={i % 7}.{i % 13}.{i % 5} \\")
+        lines.append(f"    --hash=sha256:{i:064x} \\")
+        lines.append(f"    --hash=sha256:{i + 1:064x}")
+        lines.append(f"    # via package-{i + 1}")
+    return "\n".join(lines) + "\n"
+
+
+def naive(content: str) -> int:
+    # The old behaviour: split lines, then parse each with the full PEP 508 parser.
+    count = 0
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            Requirement(line)
+            count += 1
+        except Exception:
+            pass
+    return count
+
+
+def streaming(content: str) -> int:
+    return sum(1 for _ in iter_requirements(io.StringIO(content)))
+
+
+def main(packages: int = 10_000):
+    content = make_requirements(packages)
+    print(f"Packages: {packages:,} ({len(content.splitlines()):,} lines)")
+    for label, fn in (("naive per-line", naive), ("streaming parser", streaming)):
+        start = time.perf_counter()
+        parsed = fn(content)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<18} {elapsed * 1000:>9.1f} ms   {parsed:>7,} requirements")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
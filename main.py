@@ -1,6 +1,7 @@
-def main():
-    print("Hello from dependency-doctor!")
+from src.utils.daemon_client import main
 
 
 if __name__ == "__main__":
+    # Forwards deps/check-updates/security-scan to a running `doctor daemon`
+    # without importing the CLI; everything else runs the CLI locally.
     main()
@@ -1,16 +1,49 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 import sys
 import platform
 import tomllib
 
+from ..utils.config import get_config
 from ..utils.logging import get_logger
-from ..services.github_scanner import get_dependencies_from_github
+from ..utils.profiling import MODES as PROFILE_MODES, ProfileSession
+from ..services.prefetch_scheduler import get_prefetch_scheduler
+from ..services.update_planner import plan_updates
 
 log = get_logger(__name__)
 
 app = FastAPI()
 
+PROFILE_HEADER = "X-Doctor-Profile"
+
+async def profile_request(request: Request, call_next):
+    """
+    Profiles requests that opt in with ``?profile=<mode>`` or an X-Doctor-Profile header.
+    The response's X-Doctor-Profile header holds the path of the written pstats file.
+    """
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if not flag:
+        return await call_next(request)
+    session = ProfileSession(
+        f"api{request.url.path}",
+        mode=flag if flag in PROFILE_MODES else "deterministic",
+    )
+    try:
+        session.start()
+    except RuntimeError as e:
+        log.warning("Request not profiled", path=request.url.path, error=str(e))
+        return await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        paths = session.stop()
+    response.headers[PROFILE_HEADER] = paths["pstats"]
+    return response
+
+# Registered only when enabled, so unprofiled deployments don't pay for the check.
+if get_config("API_PROFILING", "false").lower() in ("1", "true", "yes"):
+    app.middleware("http")(profile_request)
+
 class StatusResponse(BaseModel):
     version: str
     python_version: str
@@ -27,6 +60,13 @@ def get_project_version():
 @app.on_event("startup")
 async def startup_event():
     log.info("API server started")
+    if get_config("PREFETCH_ENABLED", "true").lower() not in ("0", "false", "no"):
+        get_prefetch_scheduler().start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_prefetch_scheduler().stop()
+    log.info("API server stopped")
 
 @app.get("/status", response_model=StatusResponse)
 def get_status():
@@ -38,6 +78,11 @@ def get_status():
         environment=platform.system(),
     )
 
+@app.get("/prefetch")
+def get_prefetch_stats():
+    """Returns the warm-cache scheduler's state and the most requested packages and repos."""
+    return get_prefetch_scheduler().stats()
+
 @app.get("/dependencies")
 async def get_dependencies(url: str):
     """
@@ -45,8 +90,7 @@ async def get_dependencies(url: str):
     """
     log.info("GET /dependencies endpoint called", url=url)
     try:
-        token = get_config("GITHUB_TOKEN")
-        dependencies = get_dependencies_from_github(url, token=token)
+        dependencies = get_prefetch_scheduler().get_dependencies(url)
         return {"dependencies": dependencies}
     except ValueError as e:
         # This will catch invalid GitHub URLs
@@ -55,4 +99,25 @@ async def get_dependencies(url: str):
     except Exception as e:
         # This will catch GitHub API errors (e.g., repo not found)
         log.error("Failed to fetch dependencies from GitHub", error=str(e))
-        raise HTTPException(status_code=500, detail=f"Failed to fetch dependencies: {e}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to fetch dependencies: {e}") 
+
+@app.get("/update")
+def get_update_plan(url: str):
+    """
+    Computes a compatible upgrade plan for the dependencies of a GitHub repository.
+    The plan is returned for review; no files are changed.
+    """
+    log.info("GET /update endpoint called", url=url)
+    try:
+        dependencies = get_prefetch_scheduler().get_dependencies(url)
+    except ValueError as e:
+        log.error("Invalid URL provided to /update", error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        log.error("Failed to fetch dependencies from GitHub", error=str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to fetch dependencies: {e}")
+
+    plan = plan_updates(dependencies)
+    if plan is None:
+        raise HTTPException(status_code=409, detail="Could not find a compatible set of dependency versions")
+    return {"updates": [item.to_dict() for item in plan]}
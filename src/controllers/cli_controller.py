@@ -1,11 +1,23 @@
 from src.utils.logging import get_logger
 from src.utils.config import get_config
 import click
+import json
 import os
 import toml
-from src.services.github_scanner import get_dependencies_from_github
-from src.services.update_checker import check_for_updates
-from src.services.security_scanner import scan_dependencies_for_vulnerabilities
+from src.services.github_scanner import fetch_manifest_from_github, parse_manifest
+from src.services.scan_pipeline import build_security_pipeline, build_update_pipeline, parse_worker_spec
+from src.services.scan_history import ScanHistoryStore
+from src.services.update_planner import plan_updates
+from src.services.manifest_editor import apply_plan, find_manifests, read_manifest_dependencies, unapplied_updates
+from src.services.daemon import DoctorDaemon
+from src.services.job_queue import DEFAULT_MAX_ATTEMPTS, open_job_queue
+from src.services.scan_worker import DEFAULT_LEASE_SECONDS, JOB_KINDS, run_workers
+from src.utils.daemon_client import get_socket_path, main, request
+from src.utils.profiling import MODES as PROFILE_MODES, ProfileSession, stage as profile_stage
+from src.utils.resp import LocalRedisServer
+from src.models.report import ColumnarReport
+from src.models.update_info import UpdateInfo
+from src.models.vulnerability import Vulnerability
 from rich.console import Console
 from rich.table import Table
 from prettytable import PrettyTable
@@ -21,10 +33,23 @@ def get_version():
         return "unknown"
 
 @click.group()
-def cli():
+@click.option('--profile', is_flag=True, help='Profile the command and write .pstats, .collapsed (flamegraph) and stage timing files.')
+@click.option('--profile-mode', type=click.Choice(PROFILE_MODES), default='deterministic', show_default=True, help='cProfile every call, or sample stacks for lower overhead.')
+@click.option('--profile-dir', default=None, help='Directory for profile output (default: PROFILE_DIR or ./profiles).')
+@click.pass_context
+def cli(ctx, profile, profile_mode, profile_dir):
     """Dependency Doctor CLI"""
     log.info("CLI started")
-    pass
+    if profile:
+        session = ProfileSession(ctx.invoked_subcommand or "cli", output_dir=profile_dir, mode=profile_mode)
+        session.start()
+        ctx.call_on_close(lambda: print_profile_paths(session.stop()))
+
+def print_profile_paths(paths):
+    """Tells the user where a profile was written."""
+    print(f"Profile written to {paths['pstats']}")
+    print(f"  Collapsed stacks: {paths['collapsed']}")
+    print(f"  Stage timings: {paths['stages']}")
 
 @cli.command()
 def status():
@@ -39,6 +64,21 @@ def status():
     print(f"Python executable: {os.sys.executable}")
     print(f"Current working directory: {os.getcwd()}")
 
+def record_scan(url, dependencies, findings=(), sha=None, resolved_versions=None):
+    """Persists a scan result to the scan history store without failing the command."""
+    try:
+        with ScanHistoryStore() as store:
+            store.record_scan(
+                url,
+                dependencies,
+                ref="main",
+                sha=sha,
+                findings=findings,
+                resolved_versions={**(resolved_versions or {}), **{v.package: v.version for v in findings}},
+            )
+    except Exception as e:
+        log.warning("Failed to record scan history", url=url, error=str(e))
+
 @cli.command()
 @click.option('--url', required=True, help='GitHub repository URL to scan')
 def deps(url):
@@ -46,7 +86,11 @@ def deps(url):
     log.info("doctor deps command called", url=url)
     try:
         token = get_config("GITHUB_TOKEN")
-        deps = get_dependencies_from_github(url, token=token)
+        with profile_stage("fetch"):
+            manifest = fetch_manifest_from_github(url, token=token)
+        with profile_stage("parse"):
+            deps = parse_manifest(manifest)
+        record_scan(url, deps, sha=manifest.sha if manifest is not None else None)
         if not deps:
             print("No direct dependencies found in pyproject.toml or requirements.txt.")
         else:
@@ -57,78 +101,365 @@ def deps(url):
         log.error("Failed to fetch dependencies from GitHub", error=str(e))
         print(f"Error: {e}")
 
+def export_report(model, rows, output):
+    """Exports report rows to a .jsonl, .csv or .parquet file."""
+    report = ColumnarReport.for_model(model, rows)
+    count = report.export(output)
+    log.info("Report exported", path=output, rows=count)
+    print(f"Report written to {output} ({count} rows)")
+
+def print_pipeline_stats(pipeline):
+    """Prints per-stage throughput and queue depth statistics for a pipeline run."""
+    stats = pipeline.stats()
+    log.info("Pipeline stats", elapsed=round(pipeline.elapsed, 3), stages=stats)
+    table = PrettyTable()
+    table.field_names = ["Stage", "Workers", "Processed", "Errors", "Avg Depth", "Max Depth", "Capacity", "Busy (s)", "Blocked (s)", "Utilization"]
+    table.align = "l"
+    for stage in stats:
+        table.add_row([
+            stage["stage"], stage["workers"], stage["processed"], stage["errors"], stage["avg_depth"],
+            stage["max_depth"], stage["capacity"], stage["busy_seconds"], stage["blocked_seconds"], stage["utilization"],
+        ])
+    print(f"Pipeline finished in {pipeline.elapsed:.2f}s")
+    print(table)
+
+pipeline_options = [
+    click.option('--workers', default=None, help='Per-stage worker counts, e.g. "fetch=8,resolve=16".'),
+    click.option('--stats', 'show_stats', is_flag=True, help='Print per-stage pipeline statistics.'),
+]
+
+def with_pipeline_options(func):
+    for option in reversed(pipeline_options):
+        func = option(func)
+    return func
+
 @cli.command(name="check-updates")
-@click.option('--url', required=True, help='The URL of the GitHub repository to check.')
-def check_updates(url):
-    """Check for outdated dependencies in a GitHub repository."""
-    log.info("check-updates command called", url=url)
+@click.option('--url', 'urls', required=True, multiple=True, help='The URL of the GitHub repository to check. Repeat to check several.')
+@click.option('--output', default=None, help='Export the report to a .jsonl, .csv or .parquet file.')
+@with_pipeline_options
+def check_updates(urls, output, workers, show_stats):
+    """Check for outdated dependencies in one or more GitHub repositories."""
+    log.info("check-updates command called", urls=urls)
     try:
         token = get_config("GITHUB_TOKEN")
-        deps = get_dependencies_from_github(url, token=token)
-        if not deps:
-            print("No dependencies found to check.")
-            return
-
+        pipeline = build_update_pipeline(token=token, workers=parse_worker_spec(workers))
         print("Checking for updates...")
-        updates = check_for_updates(deps)
+        all_updates = []
+        for item in sorted(pipeline.run(urls), key=lambda item: item.index):
+            url = item.source
+            if len(urls) > 1:
+                print(f"\n{url}")
+            if item.error is not None:
+                log.error("Failed during update check", url=url, stage=item.failed_stage, error=str(item.error))
+                print(f"An error occurred: {item.error}")
+                continue
 
-        if not updates:
-            print("All dependencies are up-to-date!")
-            return
+            deps, updates = item.value["dependencies"], item.value["updates"]
+            if not deps:
+                print("No dependencies found to check.")
+                continue
 
-        print("Available updates:")
-        for update in updates:
-            print(
-                f"  - {update['package']}: "
-                f"Specified: {update['specifier']}, "
-                f"Latest: {update['latest_version']}"
-            )
+            record_scan(url, deps, sha=item.value["sha"])
+            all_updates.extend(updates)
+            if not updates:
+                print("All dependencies are up-to-date!")
+                continue
+
+            print("Available updates:")
+            for update in updates:
+                print(
+                    f"  - {update['package']}: "
+                    f"Specified: {update['specifier']}, "
+                    f"Latest: {update['latest_version']}"
+                )
+
+        if output:
+            export_report(UpdateInfo, all_updates, output)
+        if show_stats:
+            print_pipeline_stats(pipeline)
     except Exception as e:
         log.error("Failed during update check", error=str(e))
         print(f"An error occurred: {e}")
 
 
 @cli.command(name="security-scan")
-@click.option('--url', required=True, help='The URL of the GitHub repository to scan.')
-def security_scan(url):
-    """Scans the dependencies of a GitHub repository for known vulnerabilities."""
-    log.info("security-scan command called", url=url)
+@click.option('--url', 'urls', required=True, multiple=True, help='The URL of the GitHub repository to scan. Repeat to scan several.')
+@click.option('--output', default=None, help='Export the report to a .jsonl, .csv or .parquet file.')
+@with_pipeline_options
+def security_scan(urls, output, workers, show_stats):
+    """Scans the dependencies of one or more GitHub repositories for known vulnerabilities."""
+    log.info("security-scan command called", urls=urls)
     try:
         github_token = get_config("GITHUB_TOKEN")
-        dependencies = get_dependencies_from_github(url, token=github_token)
-        if not dependencies:
-            log.warning("No dependencies found to scan.")
+        pipeline = build_security_pipeline(token=github_token, workers=parse_worker_spec(workers))
+        all_vulnerabilities = []
+        for item in sorted(pipeline.run(urls), key=lambda item: item.index):
+            url = item.source
+            if len(urls) > 1:
+                print(f"\n{url}")
+            if item.error is not None:
+                log.error("Failed during security scan", url=url, stage=item.failed_stage, error=str(item.error))
+                print(f"An error occurred: {item.error}")
+                continue
+
+            dependencies, vulnerabilities = item.value["dependencies"], item.value["vulnerabilities"]
+            if not dependencies:
+                log.warning("No dependencies found to scan.", url=url)
+                continue
+
+            if vulnerabilities is None:
+                log.error("The security scan failed to complete.", url=url)
+                print("Error: The security scan could not be completed. Check the logs for details.")
+                continue
+
+            record_scan(
+                url, dependencies, findings=vulnerabilities,
+                sha=item.value["sha"], resolved_versions=item.value["resolved_versions"],
+            )
+            all_vulnerabilities.extend(vulnerabilities)
+
+            if not vulnerabilities:
+                log.info("✅ No vulnerabilities found.", url=url)
+                continue
+
+            log.info(f"🚨 Found {len(vulnerabilities)} vulnerabilities.", url=url)
+            table = PrettyTable()
+            table.field_names = ["Package", "Version", "ID", "Fix Versions", "Description"]
+            table.align = "l"
+            for vuln in vulnerabilities:
+                table.add_row([
+                    vuln['package'],
+                    vuln['version'],
+                    vuln['id'],
+                    ', '.join(vuln['fix_versions']),
+                    vuln['description']
+                ])
+            print(table)
+
+        if output:
+            export_report(Vulnerability, all_vulnerabilities, output)
+        if show_stats:
+            print_pipeline_stats(pipeline)
+    except Exception as e:
+        log.error("Failed during security scan", error=str(e))
+        print(f"An error occurred: {e}")
+
+
+@cli.command()
+@click.option('--path', default='.', type=click.Path(exists=True, file_okay=False), help='Project directory containing pyproject.toml and/or requirements*.txt.')
+@click.option('--dry-run', is_flag=True, help='Show the update plan without editing any files.')
+def update(path, dry_run):
+    """Plan a compatible set of upgrades and rewrite the project's dependency files."""
+    log.info("update command called", path=path, dry_run=dry_run)
+    try:
+        manifests = find_manifests(path)
+        if not manifests:
+            print("No pyproject.toml or requirements*.txt found.")
             return
 
-        vulnerabilities = scan_dependencies_for_vulnerabilities(dependencies)
+        dependencies = []
+        for manifest in manifests:
+            dependencies.extend(read_manifest_dependencies(manifest))
 
-        if vulnerabilities is None:
-            log.error("The security scan failed to complete.")
-            print("Error: The security scan could not be completed. Check the logs for details.")
+        print("Planning updates...")
+        plan = plan_updates(dependencies)
+        if plan is None:
+            print("Error: Could not find a compatible set of versions. Check the logs for details.")
             return
+        if not plan:
+            print("All dependencies are up-to-date!")
+            return
+
+        table = PrettyTable()
+        table.field_names = ["Package", "Specified", "New Specifier", "Latest"]
+        table.align = "l"
+        for item in plan:
+            table.add_row([item.package, item.specifier, item.new_specifier, item.latest_version or ""])
+        print(table)
 
-        if not vulnerabilities:
-            log.info("✅ No vulnerabilities found.")
+        if dry_run:
+            print("Dry run: no files were changed.")
+            return
+
+        results = apply_plan(plan, manifests)
+        for manifest, result in results.items():
+            if result["updated"]:
+                print(f"Updated {manifest}: {', '.join(result['updated'])}")
+            if result["needs_recompile"]:
+                print(
+                    f"Needs recompile {manifest} (hashed, left unchanged): "
+                    f"{', '.join(result['needs_recompile'])}"
+                )
+        skipped = unapplied_updates(plan, results)
+        if skipped:
+            print(
+                "Not written to any manifest (update by hand): "
+                + ", ".join(f"{item.package} {item.specifier} -> {item.new_specifier}" for item in skipped)
+            )
+    except Exception as e:
+        log.error("Failed during update", error=str(e))
+        print(f"An error occurred: {e}")
+
+
+@cli.command()
+@click.option('--package', default=None, help='Find repositories that depend on this package.')
+@click.option('--below', default=None, help='Only match resolved versions lower than this version.')
+@click.option('--spec', default=None, help='Only match resolved versions inside this specifier, e.g. ">=2,<2.3".')
+@click.option('--vuln', default=None, help='Find repositories whose last scan reported this advisory ID.')
+@click.option('--include-unresolved', is_flag=True, help='Include dependencies whose version is unknown.')
+def query(package, below, spec, vuln, include_unresolved):
+    """Query the local scan history without touching GitHub or PyPI."""
+    log.info("query command called", package=package, below=below, spec=spec, vuln=vuln)
+    if not package and not vuln:
+        raise click.UsageError("Provide --package or --vuln.")
+    try:
+        with ScanHistoryStore() as store:
+            if vuln:
+                rows = store.find_affected(vuln)
+                columns = ["repo", "ref", "package", "version", "vuln_id"]
+            else:
+                rows = store.find_dependents(
+                    package, below=below, specifier=spec, include_unresolved=include_unresolved
+                )
+                columns = ["repo", "ref", "package", "specifier", "resolved_version"]
+
+        if not rows:
+            print("No matching repositories in the scan history.")
             return
 
-        log.info(f"🚨 Found {len(vulnerabilities)} vulnerabilities.")
         table = PrettyTable()
-        table.field_names = ["Package", "Version", "ID", "Fix Versions", "Description"]
+        table.field_names = [column.replace("_", " ").title() for column in columns]
         table.align = "l"
-        for vuln in vulnerabilities:
-            table.add_row([
-                vuln['package'], 
-                vuln['version'], 
-                vuln['id'], 
-                ', '.join(vuln['fix_versions']),
-                vuln['description']
-            ])
+        for row in rows:
+            table.add_row([row[column] or "" for column in columns])
         print(table)
+    except Exception as e:
+        log.error("Failed to query scan history", error=str(e))
+        print(f"An error occurred: {e}")
+
 
+@cli.command()
+@click.option('--socket', 'socket_path', default=None, help='Unix socket to listen on (default: DOCTOR_DAEMON_SOCKET or ~/.dependency-doctor/daemon.sock).')
+@click.option('--stop', is_flag=True, help='Stop the running daemon.')
+@click.option('--status', 'show_status', is_flag=True, help='Show whether a daemon is running.')
+def daemon(socket_path, stop, show_status):
+    """Run a warm background process that deps, check-updates and security-scan forward to."""
+    log.info("daemon command called", socket=socket_path, stop=stop, status=show_status)
+    socket_path = socket_path or get_socket_path()
+    if stop or show_status:
+        reply = request({"op": "stop" if stop else "ping"}, socket_path, timeout=5)
+        if reply is None:
+            print(f"No daemon is running on {socket_path}.")
+        elif stop:
+            print("Daemon stopped.")
+        else:
+            print(f"Daemon running on {socket_path} (pid {reply['pid']}, up {reply['uptime']}s, {reply['requests']} requests).")
+        return
+    try:
+        server = DoctorDaemon(cli, socket_path)
+        server.start()
     except Exception as e:
-        log.error("Failed during security scan", error=str(e))
+        log.error("Failed to start daemon", error=str(e))
         print(f"An error occurred: {e}")
+        return
+    print(f"Daemon listening on {socket_path}. Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+queue_option = click.option('--queue', 'queue_url', default=None, help='Job queue URL: sqlite:///jobs.db or redis://host:port/0 (default: JOB_QUEUE_URL or ~/.dependency-doctor/jobs.db).')
+
+@cli.command()
+@queue_option
+@click.option('--concurrency', default=4, show_default=True, type=click.IntRange(min=1), help='Jobs to run at once in this process.')
+@click.option('--lease', 'lease_seconds', default=DEFAULT_LEASE_SECONDS, show_default=True, type=click.FloatRange(min=1), help='Seconds a job stays leased without a heartbeat before other workers may retry it.')
+@click.option('--max-jobs', default=None, type=click.IntRange(min=1), help='Stop each worker after this many jobs.')
+@click.option('--exit-when-idle', is_flag=True, help='Exit once no jobs are queued or running.')
+def worker(queue_url, concurrency, lease_seconds, max_jobs, exit_when_idle):
+    """
+    Run scan workers that pull repo-scan jobs from a shared queue.
+
+    Each host records the scans it runs in its own history database
+    (SCAN_HISTORY_DB); results from all hosts are kept on the job records in
+    the queue, readable with `doctor jobs --id`.
+    """
+    log.info("worker command called", queue=queue_url, concurrency=concurrency)
+    try:
+        processed = run_workers(
+            queue_url, concurrency=concurrency, max_jobs=max_jobs,
+            exit_when_idle=exit_when_idle, lease_seconds=lease_seconds,
+        )
+        print(f"Processed {processed} jobs.")
+    except Exception as e:
+        log.error("Scan worker failed", error=str(e))
+        print(f"An error occurred: {e}")
+
+@cli.command()
+@queue_option
+@click.option('--kind', type=click.Choice(JOB_KINDS), default='security-scan', show_default=True, help='The scan to run for each repository.')
+@click.option('--url', 'urls', required=True, multiple=True, help='The URL of a GitHub repository to scan. Repeat to enqueue several.')
+@click.option('--max-attempts', default=DEFAULT_MAX_ATTEMPTS, show_default=True, type=click.IntRange(min=1), help='Attempts before a job is marked failed.')
+def enqueue(queue_url, kind, urls, max_attempts):
+    """Queue repo-scan jobs for workers."""
+    log.info("enqueue command called", queue=queue_url, kind=kind, urls=urls)
+    try:
+        with open_job_queue(queue_url) as queue:
+            ids = [queue.enqueue(kind, {"url": url}, max_attempts=max_attempts) for url in urls]
+        print(f"Queued {len(ids)} {kind} jobs (ids {ids[0]}-{ids[-1]}).")
+    except Exception as e:
+        log.error("Failed to enqueue jobs", error=str(e))
+        print(f"An error occurred: {e}")
+
+@cli.command()
+@queue_option
+@click.option('--id', 'job_ids', multiple=True, type=int, help='Print this job\'s record, including its result, as JSON. Repeat for several.')
+def jobs(queue_url, job_ids):
+    """Show how many jobs are queued, running, done and failed, or the records of given jobs."""
+    try:
+        with open_job_queue(queue_url) as queue:
+            if job_ids:
+                records = {job_id: queue.get(job_id) for job_id in job_ids}
+            else:
+                counts = queue.stats()
+    except Exception as e:
+        log.error("Failed to read job queue", error=str(e))
+        print(f"An error occurred: {e}")
+        return
+    if job_ids:
+        for job_id, job in records.items():
+            if job is None:
+                print(f"No job with id {job_id}.")
+                continue
+            record = job.to_dict()
+            del record["lease_token"]
+            print(json.dumps(record, indent=2))
+        return
+    table = PrettyTable()
+    table.field_names = ["Status", "Jobs"]
+    table.align = "l"
+    for status, count in counts.items():
+        table.add_row([status, count])
+    print(table)
+
+@cli.command(name="queue-server")
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on.')
+@click.option('--port', default=6379, show_default=True, help='Port to listen on.')
+def queue_server(host, port):
+    """Serve an in-memory, Redis-compatible job queue for workers without a Redis install."""
+    try:
+        server = LocalRedisServer(host, port)
+    except OSError as e:
+        log.error("Failed to start queue server", error=str(e))
+        print(f"An error occurred: {e}")
+        return
+    print(f"Queue server listening on {server.url}. Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == '__main__':
-    cli() 
\ No newline at end of file
+    main(fallback=cli) 
\ No newline at end of file
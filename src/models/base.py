@@ -0,0 +1,59 @@
+import sys
+
+
+class SlottedModel:
+    """
+    Base class for the compact domain models.
+
+    Subclasses declare their fields in ``__slots__`` so instances carry no
+    per-object ``__dict__``. Models also support read-only mapping access
+    (``model["package"]``) so code written against the old ad-hoc dicts keeps
+    working while it is migrated.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def fields(cls) -> tuple[str, ...]:
+        """Returns the field names of the model, in declaration order."""
+        return cls.__slots__
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Builds a model from a dict, ignoring keys that are not fields."""
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+    def to_dict(self) -> dict:
+        """Returns a plain dict representation of the model."""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, key) for key in self.__slots__))
+
+    def __repr__(self):
+        values = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+def intern_str(value: str | None) -> str | None:
+    """
+    Interns a package name so every model naming the same package shares one string.
+
+    Interned strings are never freed (they are immortal on Python 3.12), so use
+    this only for package names, a small vocabulary. Free text, versions and
+    specifiers are not interned; ColumnarReport deduplicates them per report.
+    """
+    return sys.intern(value) if value is not None else None
@@ -0,0 +1,50 @@
+from .base import SlottedModel, intern_str
+
+
+class Dependency(SlottedModel):
+    """
+    A single declared dependency, e.g. ``requests[socks]>=2.28; python_version >= "3.8"``.
+
+    Attributes:
+        name: The package name as written in the requirement.
+        specifier: The version specifier text, e.g. ``">=2.28"`` (empty if unconstrained).
+        extras: The requested extras, e.g. ``("socks",)``.
+        marker: The environment marker text, if any.
+        url: The direct reference URL for ``name @ url`` requirements, if any.
+    """
+
+    __slots__ = ("name", "specifier", "extras", "marker", "url")
+
+    def __init__(
+        self,
+        name: str,
+        specifier: str = "",
+        extras: tuple[str, ...] = (),
+        marker: str | None = None,
+        url: str | None = None,
+    ):
+        self.name = intern_str(name)
+        self.specifier = specifier
+        self.extras = tuple(extras)
+        self.marker = marker
+        self.url = url
+
+    @property
+    def pinned_version(self) -> str | None:
+        """Returns the version if the dependency is pinned with a single ``==``, else None."""
+        spec = self.specifier
+        if spec.startswith("==") and "," not in spec and "*" not in spec:
+            return spec[2:].strip()
+        return None
+
+    def __str__(self):
+        text = self.name
+        if self.extras:
+            text += f"[{','.join(self.extras)}]"
+        if self.url:
+            text += f" @ {self.url}"
+        else:
+            text += self.specifier
+        if self.marker:
+            text += f"; {self.marker}"
+        return text
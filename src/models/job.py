@@ -0,0 +1,52 @@
+from .base import SlottedModel
+
+
+class Job(SlottedModel):
+    """
+    A unit of work in a job queue, e.g. one repository to scan.
+
+    Attributes:
+        id: The queue-assigned job id.
+        kind: What to run, e.g. ``"security-scan"``.
+        payload: The job's arguments, e.g. ``{"url": "https://github.com/org/repo"}``.
+        status: One of ``queued``, ``leased``, ``done`` or ``failed``.
+        attempts: How many times the job has been leased.
+        max_attempts: How many leases the job gets before it is marked failed.
+        lease_token: Identifies the current lease; a worker whose token no longer
+            matches has lost the job to another worker.
+        lease_expires: When the current lease runs out (Unix time).
+        worker: The id of the worker holding or last holding the job.
+        result: The job's result once done.
+        error: The last error, if any attempt failed.
+    """
+
+    __slots__ = (
+        "id", "kind", "payload", "status", "attempts", "max_attempts",
+        "lease_token", "lease_expires", "worker", "result", "error",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        kind: str,
+        payload: dict,
+        status: str = "queued",
+        attempts: int = 0,
+        max_attempts: int = 3,
+        lease_token: str | None = None,
+        lease_expires: float | None = None,
+        worker: str | None = None,
+        result: dict | None = None,
+        error: str | None = None,
+    ):
+        self.id = int(id)
+        self.kind = kind
+        self.payload = payload
+        self.status = status
+        self.attempts = int(attempts)
+        self.max_attempts = int(max_attempts)
+        self.lease_token = lease_token
+        self.lease_expires = float(lease_expires) if lease_expires is not None else None
+        self.worker = worker
+        self.result = result
+        self.error = error
@@ -0,0 +1,29 @@
+from .base import SlottedModel
+
+
+class Manifest(SlottedModel):
+    """
+    The raw dependency declarations fetched from a repository, before parsing.
+
+    Attributes:
+        path: The manifest file, "pyproject.toml" or "requirements.txt".
+        lines: For pyproject.toml, the declared dependency strings; for a
+            requirements file, its physical lines.
+        includes: Files pulled in with ``-r``, as path -> lines (None if the
+            file could not be fetched).
+        sha: The commit the files were read at, if known.
+    """
+
+    __slots__ = ("path", "lines", "includes", "sha")
+
+    def __init__(
+        self,
+        path: str,
+        lines: list[str],
+        includes: dict[str, list[str] | None] | None = None,
+        sha: str | None = None,
+    ):
+        self.path = path
+        self.lines = lines
+        self.includes = includes or {}
+        self.sha = sha
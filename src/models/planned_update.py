@@ -0,0 +1,31 @@
+from .base import SlottedModel, intern_str
+
+
+class PlannedUpdate(SlottedModel):
+    """
+    A dependency upgrade chosen by the update planner.
+
+    Attributes:
+        package: The package name as declared.
+        specifier: The version specifier currently declared.
+        new_specifier: The specifier to write back, e.g. ``">=2.32.3"``.
+        target_version: The version the planner selected.
+        latest_version: The latest version on PyPI, which may be newer than
+            ``target_version`` if it conflicts with the rest of the plan.
+    """
+
+    __slots__ = ("package", "specifier", "new_specifier", "target_version", "latest_version")
+
+    def __init__(
+        self,
+        package: str,
+        specifier: str,
+        new_specifier: str,
+        target_version: str,
+        latest_version: str | None = None,
+    ):
+        self.package = intern_str(package)
+        self.specifier = specifier
+        self.new_specifier = new_specifier
+        self.target_version = target_version
+        self.latest_version = latest_version
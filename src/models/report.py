@@ -0,0 +1,195 @@
+import csv
+import json
+from array import array
+from typing import IO, Iterable, Iterator
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - pyarrow is an optional dependency
+    pyarrow = None
+
+
+class ColumnarReport:
+    """
+    A compact, column-oriented container for report rows.
+
+    Every cell is stored as a 4-byte index into a shared pool of distinct
+    values, so a report with millions of rows costs a few bytes per cell
+    instead of a dict and a set of string objects per row. Package names,
+    versions and advisory texts repeat heavily across an org, which is what
+    makes the dictionary encoding pay off.
+
+    Rows can be appended as models or plain dicts, and are exported one at a
+    time so writing a report never materializes it as a list of dicts.
+    """
+
+    __slots__ = ("columns", "model", "_data", "_pool", "_pool_index")
+
+    def __init__(self, columns: Iterable[str], model: type | None = None):
+        self.columns = tuple(columns)
+        self.model = model
+        self._data = {column: array("I") for column in self.columns}
+        self._pool = []
+        self._pool_index = {}
+
+    @classmethod
+    def for_model(cls, model: type, rows: Iterable = ()) -> "ColumnarReport":
+        """
+        Creates a report whose columns are the fields of a model class.
+
+        Args:
+            model: A SlottedModel subclass, e.g. UpdateInfo.
+            rows: Optional initial rows to append.
+
+        Returns:
+            A ColumnarReport that yields instances of ``model`` from ``rows()``.
+        """
+        report = cls(model.fields(), model=model)
+        report.extend(rows)
+        return report
+
+    def __len__(self) -> int:
+        return len(self._data[self.columns[0]]) if self.columns else 0
+
+    def _encode(self, value) -> int:
+        if isinstance(value, list):
+            value = tuple(value)
+        index = self._pool_index.get(value)
+        if index is None:
+            index = len(self._pool)
+            self._pool.append(value)
+            self._pool_index[value] = index
+        return index
+
+    def append(self, row) -> None:
+        """Appends a row given as a model instance or a mapping of column -> value."""
+        for column in self.columns:
+            self._data[column].append(self._encode(row.get(column)))
+
+    def extend(self, rows: Iterable) -> None:
+        """Appends every row from an iterable."""
+        for row in rows:
+            self.append(row)
+
+    def column(self, name: str) -> Iterator:
+        """Yields the decoded values of a single column."""
+        pool = self._pool
+        return (pool[index] for index in self._data[name])
+
+    def iter_dicts(self) -> Iterator[dict]:
+        """Yields each row as a plain dict."""
+        pool = self._pool
+        columns = self.columns
+        for indexes in zip(*(self._data[column] for column in columns)):
+            yield {column: pool[index] for column, index in zip(columns, indexes)}
+
+    def rows(self) -> Iterator:
+        """Yields each row as a model instance, or as a dict if the report has no model."""
+        if self.model is None:
+            yield from self.iter_dicts()
+            return
+        for row in self.iter_dicts():
+            yield self.model(**row)
+
+    def write_jsonl(self, fp: IO[str]) -> int:
+        """
+        Streams the report as JSON Lines.
+
+        Args:
+            fp: A text file object to write to.
+
+        Returns:
+            The number of rows written.
+        """
+        # Each distinct value is JSON-encoded once; rows are then assembled from
+        # the pre-encoded fragments instead of going through json.dumps per row.
+        encoded = [json.dumps(value) for value in self._pool]
+        keys = [json.dumps(column) + ": " for column in self.columns]
+        count = 0
+        for indexes in zip(*(self._data[column] for column in self.columns)):
+            fp.write("{" + ", ".join([key + encoded[index] for key, index in zip(keys, indexes)]) + "}\n")
+            count += 1
+        return count
+
+    def write_csv(self, fp: IO[str]) -> int:
+        """
+        Streams the report as CSV with a header row. List values are joined with ", ".
+
+        Args:
+            fp: A text file object opened with ``newline=""``.
+
+        Returns:
+            The number of rows written.
+        """
+        writer = csv.writer(fp)
+        writer.writerow(self.columns)
+        pool = self._pool
+        count = 0
+        for indexes in zip(*(self._data[column] for column in self.columns)):
+            writer.writerow([_csv_cell(pool[index]) for index in indexes])
+            count += 1
+        return count
+
+    def write_parquet(self, path: str, batch_size: int = 65536) -> int:
+        """
+        Writes the report to a Parquet file in record batches. Requires pyarrow.
+
+        Args:
+            path: The destination file path.
+            batch_size: The number of rows per record batch.
+
+        Returns:
+            The number of rows written.
+        """
+        if pyarrow is None:
+            raise RuntimeError("Parquet export requires the optional 'pyarrow' package")
+        schema = pyarrow.schema([
+            (column, pyarrow.list_(pyarrow.string()) if self._is_list_column(column) else pyarrow.string())
+            for column in self.columns
+        ])
+        pool = self._pool
+        total = len(self)
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            for start in range(0, total, batch_size):
+                stop = min(start + batch_size, total)
+                arrays = [
+                    pyarrow.array([pool[index] for index in self._data[column][start:stop]], type=field.type)
+                    for column, field in zip(self.columns, schema)
+                ]
+                writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+        return total
+
+    def export(self, path: str, fmt: str | None = None) -> int:
+        """
+        Exports the report to a file, inferring the format from the extension if not given.
+
+        Args:
+            path: The destination file path (``.jsonl``, ``.csv`` or ``.parquet``).
+            fmt: Optional explicit format: "jsonl", "csv" or "parquet".
+
+        Returns:
+            The number of rows written.
+        """
+        fmt = (fmt or path.rsplit(".", 1)[-1]).lower()
+        if fmt in ("jsonl", "ndjson"):
+            with open(path, "w", encoding="utf-8") as f:
+                return self.write_jsonl(f)
+        if fmt == "csv":
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                return self.write_csv(f)
+        if fmt == "parquet":
+            return self.write_parquet(path)
+        raise ValueError(f"Unsupported report format: {fmt}")
+
+    def _is_list_column(self, column: str) -> bool:
+        pool = self._pool
+        return any(isinstance(pool[index], tuple) for index in set(self._data[column]))
+
+
+def _csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, tuple):
+        return ", ".join(value)
+    return value
@@ -0,0 +1,19 @@
+from .base import SlottedModel, intern_str
+
+
+class UpdateInfo(SlottedModel):
+    """
+    An available update for a dependency.
+
+    Attributes:
+        package: The package name.
+        specifier: The version specifier currently declared.
+        latest_version: The latest version published on PyPI.
+    """
+
+    __slots__ = ("package", "specifier", "latest_version")
+
+    def __init__(self, package: str, specifier: str, latest_version: str):
+        self.package = intern_str(package)
+        self.specifier = specifier
+        self.latest_version = latest_version
@@ -0,0 +1,30 @@
+from .base import SlottedModel, intern_str
+
+
+class Vulnerability(SlottedModel):
+    """
+    A known vulnerability affecting a specific package version.
+
+    Attributes:
+        package: The affected package name.
+        version: The affected version that was scanned.
+        id: The advisory identifier, e.g. ``PYSEC-2023-123``.
+        description: A human-readable description of the advisory.
+        fix_versions: The versions that fix the vulnerability.
+    """
+
+    __slots__ = ("package", "version", "id", "description", "fix_versions")
+
+    def __init__(
+        self,
+        package: str,
+        version: str,
+        id: str,
+        description: str | None = None,
+        fix_versions: tuple[str, ...] = (),
+    ):
+        self.package = intern_str(package)
+        self.version = version
+        self.id = id
+        self.description = description
+        self.fix_versions = tuple(fix_versions or ())
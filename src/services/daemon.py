@@ -0,0 +1,212 @@
+import io
+import json
+import logging
+import os
+import socketserver
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from ..utils.daemon_client import FORWARDED_COMMANDS, config_fingerprint, get_socket_path, request
+from ..utils.logging import get_logger
+from ..utils.upstream import get_upstream_client
+
+log = get_logger(__name__)
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    # socketserver's default listen backlog of 5 refuses bursts of parallel CLI
+    # calls (e.g. from make -j), which would then all fall back to local runs.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class _StreamRouter:
+    """
+    Stands in for sys.stdout/sys.stderr while the daemon runs.
+
+    Writes from a thread that is serving a request go to that request's buffer;
+    everything else (daemon logs, pipeline worker threads) goes to the real stream.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def _target(self):
+        return getattr(self._local, "buffer", None) or self._default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    @contextmanager
+    def capture(self):
+        buffer = io.StringIO()
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+
+class DoctorDaemon:
+    """
+    A long-lived process that runs CLI commands on behalf of short-lived ones.
+
+    The daemon imports everything once and keeps the shared upstream client
+    (connection pools, PyPI response cache, circuit breakers) alive between
+    commands, so repeated ``deps``, ``check-updates`` and ``security-scan`` calls
+    skip interpreter warm-up, TLS handshakes and cold caches. Requests arrive as
+    one JSON line on a Unix socket that only the current user can open; each is
+    answered with the command's captured stdout, stderr and exit code. A request
+    whose settings (GITHUB_TOKEN, PIPELINE_WORKERS, ...) differ from the daemon's
+    is declined, and the client runs the command locally instead.
+    """
+
+    def __init__(self, cli, socket_path: str | None = None):
+        self.cli = cli
+        self.socket_path = socket_path or get_socket_path()
+        self.started_at = None
+        self.requests = 0
+        # The settings this process runs commands with, fixed at startup.
+        self.config = config_fingerprint()
+        self._server = None
+        self._streams = None
+        self._handler_streams = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Binds the socket and warms up shared state. Call ``serve_forever`` next.
+
+        Raises:
+            RuntimeError: If another daemon is already listening on the socket.
+        """
+        if os.path.exists(self.socket_path):
+            if request({"op": "ping"}, self.socket_path, timeout=2) is not None:
+                raise RuntimeError(f"A doctor daemon is already running on {self.socket_path}")
+            log.info("Removing stale daemon socket", path=self.socket_path)
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), mode=0o700, exist_ok=True)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    reply = daemon.handle(json.loads(line))
+                except (ValueError, TypeError, AttributeError) as e:
+                    reply = {"error": f"Bad request: {e}"}
+                self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+        # Restrict the socket to the current user from the moment it exists.
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(self.socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+
+        get_upstream_client()
+        self._install_streams()
+        self.started_at = time.monotonic()
+        log.info("Doctor daemon listening", path=self.socket_path, pid=os.getpid())
+
+    def serve_forever(self) -> None:
+        try:
+            self._server.serve_forever(poll_interval=0.2)
+        finally:
+            self._cleanup()
+
+    def shutdown(self) -> None:
+        """Stops ``serve_forever``; safe to call from any thread."""
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def handle(self, message: dict) -> dict:
+        """Answers one decoded request."""
+        op = message.get("op")
+        if op == "ping":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": round(time.monotonic() - self.started_at, 1),
+                "requests": self.requests,
+            }
+        if op == "stop":
+            log.info("Doctor daemon stopping on request")
+            self.shutdown()
+            return {"ok": True}
+        if op == "run":
+            mismatched = self.config_mismatch(message.get("config") or {})
+            if mismatched:
+                # The client runs the command itself with its own settings.
+                log.info("Declining command run with different settings", keys=mismatched)
+                return {"config_mismatch": mismatched}
+            return self.run(list(message.get("argv") or []))
+        return {"error": f"Unknown operation: {op!r}"}
+
+    def config_mismatch(self, client_config: dict) -> list[str]:
+        """Returns the forwarded config keys whose value differs between the client and this daemon."""
+        return sorted(key for key, digest in self.config.items() if client_config.get(key) != digest)
+
+    def run(self, argv: list[str]) -> dict:
+        """Runs a CLI command in this process and returns its output and exit code."""
+        with self._lock:
+            self.requests += 1
+        if not argv or argv[0] not in FORWARDED_COMMANDS:
+            command = argv[0] if argv else ""
+            return {"stdout": "", "stderr": f"Error: '{command}' cannot run in the daemon.\n", "exit_code": 2}
+        started = time.perf_counter()
+        stdout, stderr = self._streams
+        with stdout.capture() as out, stderr.capture() as err:
+            try:
+                self.cli.main(args=argv, prog_name="doctor", standalone_mode=True)
+                exit_code = 0
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:
+                log.error("Daemon command failed", argv=argv, error=str(e))
+                err.write(f"Error: {e}\n")
+                exit_code = 1
+        log.info("Daemon command finished", command=argv[0], exit_code=exit_code,
+                 seconds=round(time.perf_counter() - started, 3))
+        return {"stdout": out.getvalue(), "stderr": err.getvalue(), "exit_code": exit_code}
+
+    def _install_streams(self) -> None:
+        stdout, stderr = _StreamRouter(sys.stdout), _StreamRouter(sys.stderr)
+        self._streams = (stdout, stderr)
+        # Log handlers captured sys.stderr when logging was configured; point
+        # them at the router so a command's logs reach the client that ran it.
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stderr:
+                self._handler_streams.append((handler, handler.setStream(stderr)))
+        sys.stdout, sys.stderr = stdout, stderr
+
+    def _cleanup(self) -> None:
+        if self._streams is not None:
+            sys.stdout, sys.stderr = self._streams[0]._default, self._streams[1]._default
+            self._streams = None
+        for handler, stream in self._handler_streams:
+            handler.setStream(stream)
+        self._handler_streams = []
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        log.info("Doctor daemon stopped", path=self.socket_path)
@@ -1,17 +1,24 @@
 import os
 import tempfile
-import requests
 import zipfile
 import tomllib
-from github import Github, UnknownObjectException
+from github import Github, GithubException, UnknownObjectException
 import base64
 import re
+from src.utils.config import get_config
 from src.utils.logging import get_logger
+from src.utils.profiling import stage
+from src.utils.upstream import CircuitOpenError, get_upstream_client
+from src.models.dependency import Dependency
+from src.models.manifest import Manifest
+from src.services.requirements_parser import iter_include_paths, iter_requirements, parse_requirement
 
 log = get_logger(__name__)
 
 GITHUB_ZIP_URL = "https://github.com/{owner}/{repo}/archive/refs/heads/{branch}.zip"
 
+GITHUB_API_HOST = "api.github.com"
+
 GITHUB_URL_RE = re.compile(r"github.com/([^/]+)/([^/]+?)(?:\.git)?(?:/|$)")
 
 COMMON_DEP_KEYS = [
@@ -20,6 +27,29 @@ COMMON_DEP_KEYS = [
     ("tool", "flit", "metadata", "requires"),  # Flit
 ]
 
+def extract_pyproject_dependencies(pyproject: dict) -> list[str] | None:
+    """
+    Returns the direct dependencies declared in a parsed pyproject.toml, or None if
+    none of the known dependency tables (PEP 621, Poetry, Flit) are present.
+    """
+    for key_path in COMMON_DEP_KEYS:
+        d = pyproject
+        for key in key_path:
+            if not isinstance(d, dict):
+                d = None
+                break
+            if key in d:
+                d = d[key]
+            else:
+                d = None
+                break
+        if d:
+            if isinstance(d, dict):
+                return [k for k in d.keys() if k != "python"]
+            if isinstance(d, list):
+                return d
+    return None
+
 def download_and_extract_github_repo(url, branch="main"):
     """
     Download a GitHub repo as a zip and extract it to a temp directory.
@@ -32,7 +62,7 @@ def download_and_extract_github_repo(url, branch="main"):
     except Exception:
         raise ValueError("Invalid GitHub URL format")
     zip_url = GITHUB_ZIP_URL.format(owner=owner, repo=repo, branch=branch)
-    response = requests.get(zip_url)
+    response = get_upstream_client().get(zip_url)
     if response.status_code != 200:
         raise RuntimeError(f"Failed to download repo zip: {zip_url}")
     temp_dir = tempfile.mkdtemp()
@@ -48,6 +78,26 @@ def download_and_extract_github_repo(url, branch="main"):
 def get_dependencies_from_github(url, branch="main", token=None):
     """
     Fetch dependencies from a GitHub repo, checking pyproject.toml first, then requirements.txt.
+    Returns them as requirement strings; see fetch_requirements_from_github for the parsed form.
+    """
+    return [str(dep) for dep in fetch_requirements_from_github(url, branch=branch, token=token)]
+
+def fetch_requirements_from_github(url, branch="main", token=None) -> list[Dependency]:
+    """
+    Fetch and parse the direct dependencies of a GitHub repo, checking pyproject.toml
+    first, then requirements.txt (following its -r includes).
+    """
+    with stage("fetch"):
+        manifest = fetch_manifest_from_github(url, branch=branch, token=token)
+    with stage("parse"):
+        return parse_manifest(manifest)
+
+def fetch_manifest_from_github(url, branch="main", token=None) -> Manifest | None:
+    """
+    Fetch the raw dependency declarations of a GitHub repo without parsing them,
+    checking pyproject.toml first, then requirements.txt and the files it includes.
+    All GitHub I/O happens here, so parsing can run separately.
+    Returns None if the repo has no dependency files.
     """
     m = GITHUB_URL_RE.search(url)
     if not m:
@@ -56,37 +106,57 @@ def get_dependencies_from_github(url, branch="main", token=None):
     owner, repo = m.group(1), m.group(2)
     log.info("Parsed GitHub repo info", owner=owner, repo=repo)
 
+    # PyGithub does its own HTTP, so it gets the timeout/retry settings directly
+    # and shares the upstream circuit breaker for api.github.com.
+    breaker = get_upstream_client().breaker(GITHUB_API_HOST)
+    if not breaker.allow():
+        log.error("GitHub circuit breaker is open, failing fast", owner=owner, repo=repo)
+        raise CircuitOpenError(f"Circuit open for {GITHUB_API_HOST}")
     try:
-        gh = Github(token) if token else Github()
+        github_options = {
+            "timeout": int(get_config("GITHUB_TIMEOUT", "15")),
+            "retry": int(get_config("GITHUB_RETRIES", "3")),
+        }
+        gh = Github(token, **github_options) if token else Github(**github_options)
         repo_obj = gh.get_repo(f"{owner}/{repo}")
+        breaker.record_success()
     except UnknownObjectException:
+        # A 404 proves the host is up; recording it also settles a half-open probe.
+        breaker.record_success()
         log.error("GitHub repository not found or access denied.", owner=owner, repo=repo)
         raise  # Re-raise to be caught by the CLI
+    except GithubException as e:
+        # Other 4xx answers (bad credentials, forbidden, rate limited) are about
+        # this caller, not GitHub's health, so they must not open the breaker
+        # for every other caller sharing it.
+        if e.status is not None and e.status < 500:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        log.error("GitHub API request failed", owner=owner, repo=repo, status=e.status, error=str(e))
+        raise
     except Exception as e:
+        breaker.record_failure()
         log.error("Failed to connect to GitHub", error=str(e))
         raise
 
+    # Read every file at the branch's head commit, so the recorded SHA matches
+    # what was scanned even if the branch moves mid-scan.
+    try:
+        sha = repo_obj.get_branch(branch).commit.sha
+    except Exception as e:
+        log.warning("Failed to resolve the branch head commit", branch=branch, error=str(e))
+        sha = None
+    ref = sha or branch
+
     # Try pyproject.toml first
     try:
-        file_content = repo_obj.get_contents("pyproject.toml", ref=branch)
+        file_content = repo_obj.get_contents("pyproject.toml", ref=ref)
         content = base64.b64decode(file_content.content).decode()
         pyproject = tomllib.loads(content)
-        for key_path in COMMON_DEP_KEYS:
-            d = pyproject
-            for key in key_path:
-                if not isinstance(d, dict):
-                    d = None
-                    break
-                if key in d:
-                    d = d[key]
-                else:
-                    d = None
-                    break
-            if d:
-                if isinstance(d, dict):
-                    return [k for k in d.keys() if k != "python"]
-                if isinstance(d, list):
-                    return d
+        dependencies = extract_pyproject_dependencies(pyproject)
+        if dependencies is not None:
+            return Manifest("pyproject.toml", dependencies, sha=sha)
     except UnknownObjectException:
         log.info("pyproject.toml not found, falling back to requirements.txt")
     except Exception as e:
@@ -94,12 +164,46 @@ def get_dependencies_from_github(url, branch="main", token=None):
 
     # Fallback to requirements.txt
     try:
-        file_content = repo_obj.get_contents("requirements.txt", ref=branch)
-        content = base64.b64decode(file_content.content).decode()
-        return [line.strip() for line in content.splitlines() if line.strip() and not line.startswith('#')]
+        file_content = repo_obj.get_contents("requirements.txt", ref=ref)
+        lines = base64.b64decode(file_content.content).decode().splitlines()
     except UnknownObjectException:
         log.info("No dependency files (pyproject.toml or requirements.txt) found in the repository.")
-        return []
+        return None
     except Exception as e:
         log.error("Failed to read or parse requirements.txt from GitHub", error=str(e))
-        return [] 
\ No newline at end of file
+        return None
+
+    includes = {}
+    pending = list(iter_include_paths(lines))
+    while pending:
+        path = pending.pop()
+        if path in includes or path == "requirements.txt":
+            continue
+        try:
+            included = repo_obj.get_contents(path, ref=ref)
+            includes[path] = base64.b64decode(included.content).decode().splitlines()
+            pending.extend(iter_include_paths(includes[path], source=path))
+        except Exception as e:
+            log.warning("Failed to fetch included requirements file", path=path, error=str(e))
+            includes[path] = None
+    return Manifest("requirements.txt", lines, includes, sha=sha)
+
+def parse_manifest(manifest: Manifest | None) -> list[Dependency]:
+    """
+    Parse fetched dependency declarations into Dependency models.
+    """
+    if manifest is None:
+        return []
+    if manifest.path == "pyproject.toml":
+        return _parse_declared(manifest.lines)
+    return list(iter_requirements(manifest.lines, source=manifest.path, include=manifest.includes.get))
+
+def _parse_declared(dependencies: list[str]) -> list[Dependency]:
+    parsed = []
+    for dep_string in dependencies:
+        dep = parse_requirement(dep_string)
+        if dep is None:
+            log.warning("Skipping invalid dependency in pyproject.toml", dependency=dep_string)
+            continue
+        parsed.append(dep)
+    return parsed
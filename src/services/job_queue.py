@@ -0,0 +1,453 @@
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from ..models.job import Job
+from ..utils.config import get_config
+from ..utils.logging import get_logger
+from ..utils.resp import RespClient
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - exercised only without redis-py
+    redis = None
+
+log = get_logger(__name__)
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.expanduser("~"), ".dependency-doctor", "jobs.db")
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Expired leases are looked for at most this often per queue handle, so
+# reclaiming stays off the hot path as the number of workers grows.
+RECLAIM_INTERVAL = 5.0
+
+
+class JobQueue(abc.ABC):
+    """
+    A queue of jobs leased to workers.
+
+    Leasing a job hands it to one worker for ``lease_seconds``; the worker
+    extends the lease with ``heartbeat`` while it runs. If a worker dies, its
+    lease runs out and the job goes back on the queue for another worker, until
+    it has been attempted ``max_attempts`` times. Every lease gets a fresh
+    token, and ``heartbeat``, ``complete`` and ``fail`` only act if the caller
+    still holds the current token, so a worker that stalled past its lease
+    cannot overwrite the result of the worker that took over. Delivery is
+    at-least-once: a job may run more than once, never zero times.
+    """
+
+    def __init__(self):
+        self._last_reclaim = 0.0
+
+    @abc.abstractmethod
+    def enqueue(self, kind: str, payload: dict, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """Adds a job and returns its id."""
+
+    def lease(self, worker: str, lease_seconds: float) -> Job | None:
+        """Hands the oldest queued job to ``worker``, or returns None if the queue is empty."""
+        now = time.time()
+        if now - self._last_reclaim >= RECLAIM_INTERVAL:
+            self._last_reclaim = now
+            reclaimed = self.reclaim_expired(now)
+            if reclaimed:
+                log.warning("Reclaimed jobs from expired leases", jobs=reclaimed)
+        return self._lease(worker, lease_seconds, now)
+
+    @abc.abstractmethod
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        """Extends the job's lease. Returns False if the lease was lost to another worker."""
+
+    @abc.abstractmethod
+    def complete(self, job: Job, result: dict) -> bool:
+        """Marks the job done with its result. Returns False if the lease was lost."""
+
+    @abc.abstractmethod
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Records a failed attempt: the job is queued again, or marked failed once it
+        has used all its attempts. Returns False if the lease was lost.
+        """
+
+    @abc.abstractmethod
+    def reclaim_expired(self, now: float | None = None) -> int:
+        """Requeues (or fails) jobs whose lease has expired and returns how many there were."""
+
+    @abc.abstractmethod
+    def get(self, job_id: int) -> Job | None:
+        """Returns a job by id, or None if there is no such job."""
+
+    @abc.abstractmethod
+    def stats(self) -> dict[str, int]:
+        """Returns the number of jobs per status."""
+
+    def close(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _lease(self, worker: str, lease_seconds: float, now: float) -> Job | None:
+        """Claims the oldest queued job; ``lease`` has already reclaimed expired ones."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    A job queue in a SQLite file, shared by worker processes on one host (or on a
+    filesystem with working locks). Each lease is a single short write
+    transaction, so workers serialize only for the instant it takes to claim a row.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        lease_token TEXT,
+        lease_expires REAL,
+        worker TEXT,
+        result TEXT,
+        error TEXT,
+        enqueued_at REAL NOT NULL,
+        finished_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+    CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires);
+    """
+
+    def __init__(self, path: str | None = None):
+        super().__init__()
+        self.path = path or DEFAULT_QUEUE_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        # so a lease takes the write lock before reading the row it claims.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _write(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def enqueue(self, kind: str, payload: dict, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        cursor = self._write(
+            "INSERT INTO jobs (kind, payload, max_attempts, enqueued_at) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(payload), max_attempts, time.time()),
+        )
+        return cursor.lastrowid
+
+    def _lease(self, worker: str, lease_seconds: float, now: float) -> Job | None:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_token = ?, "
+                    "lease_expires = ?, worker = ? "
+                    "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1) "
+                    "RETURNING *",
+                    (token, now + lease_seconds, worker),
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._job(row) if row is not None else None
+
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        expires = time.time() + lease_seconds
+        cursor = self._write(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_token = ?",
+            (expires, job.id, job.lease_token),
+        )
+        if cursor.rowcount:
+            job.lease_expires = expires
+        return cursor.rowcount == 1
+
+    def complete(self, job: Job, result: dict) -> bool:
+        cursor = self._write(
+            "UPDATE jobs SET status = 'done', result = ?, lease_token = NULL, finished_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+            (json.dumps(result), time.time(), job.id, job.lease_token),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str) -> bool:
+        cursor = self._write(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+            "error = ?, lease_token = NULL, "
+            "finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END "
+            "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+            (error, time.time(), job.id, job.lease_token),
+        )
+        return cursor.rowcount == 1
+
+    def reclaim_expired(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        cursor = self._write(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+            "error = 'Lease expired (worker died or stalled)', lease_token = NULL, "
+            "finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now),
+        )
+        return cursor.rowcount
+
+    def get(self, job_id: int) -> Job | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(("queued", "leased", "done", "failed"), 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            lease_token=row["lease_token"],
+            lease_expires=row["lease_expires"],
+            worker=row["worker"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+        )
+
+
+class RedisJobQueue(JobQueue):
+    """
+    A job queue in Redis (or anything speaking its protocol, such as the
+    ``doctor queue-server`` stand-in), shared by workers on any number of hosts.
+
+    Queued job ids sit in a list; leasing atomically moves an id to a
+    processing list with LMOVE, so no two workers can take the same job. Job
+    fields live in one hash per job. Every change to a leased job (heartbeat,
+    complete, fail, reclaim) checks the hash and writes it in one WATCH/MULTI
+    transaction, so the lease cannot change hands between the check and the
+    write. Lease expiry uses wall-clock time, so worker hosts need roughly
+    synchronized clocks.
+    """
+
+    def __init__(self, client, prefix: str = "doctor:jobs"):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self._queued = f"{prefix}:queued"
+        self._processing = f"{prefix}:processing"
+        self._counts = f"{prefix}:counts"
+        # Ids seen in the processing list without a lease on the last reclaim pass.
+        self._unleased = set()
+
+    def _key(self, job_id) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def close(self) -> None:
+        self.client.close()
+
+    def enqueue(self, kind: str, payload: dict, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        job_id = self.client.incr(f"{self.prefix}:next_id")
+        self.client.hset(self._key(job_id), mapping={
+            "kind": kind,
+            "payload": json.dumps(payload),
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "enqueued_at": time.time(),
+        })
+        self.client.lpush(self._queued, job_id)
+        return job_id
+
+    def _lease(self, worker: str, lease_seconds: float, now: float) -> Job | None:
+        job_id = self.client.lmove(self._queued, self._processing, "RIGHT", "LEFT")
+        if job_id is None:
+            return None
+        key = self._key(job_id)
+        self.client.hincrby(key, "attempts", 1)
+        self.client.hset(key, mapping={
+            "status": "leased",
+            "lease_token": uuid.uuid4().hex,
+            "lease_expires": now + lease_seconds,
+            "worker": worker,
+        })
+        return self._job(job_id, self.client.hgetall(key))
+
+    def _update_if(self, job_id, check, update) -> bool:
+        """
+        Applies ``update(pipe, data)`` to a job if ``check(data)`` holds for its
+        current fields, and returns whether it did. The job's hash is WATCHed
+        from the read until the write, so if anyone changes the job in between,
+        the transaction is retried against the new fields.
+        """
+        key = self._key(job_id)
+        applied = False
+
+        def transaction(pipe):
+            nonlocal applied
+            data = pipe.hgetall(key)
+            applied = check(data)
+            if applied:
+                pipe.multi()
+                update(pipe, data)
+
+        self.client.transaction(transaction, key)
+        return applied
+
+    @staticmethod
+    def _held_by(job: Job):
+        return lambda data: data.get("lease_token") == job.lease_token
+
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        expires = time.time() + lease_seconds
+
+        def update(pipe, data):
+            pipe.hset(self._key(job.id), "lease_expires", expires)
+
+        if not self._update_if(job.id, self._held_by(job), update):
+            return False
+        job.lease_expires = expires
+        return True
+
+    def complete(self, job: Job, result: dict) -> bool:
+        def update(pipe, data):
+            pipe.lrem(self._processing, 1, job.id)
+            pipe.hset(self._key(job.id), mapping={
+                "status": "done",
+                "result": json.dumps(result),
+                "lease_token": "",
+                "finished_at": time.time(),
+            })
+            pipe.hincrby(self._counts, "done", 1)
+
+        return self._update_if(job.id, self._held_by(job), update)
+
+    def fail(self, job: Job, error: str) -> bool:
+        return self._release(job.id, error, self._held_by(job))
+
+    def _release(self, job_id, error: str, check) -> bool:
+        def update(pipe, data):
+            key = self._key(job_id)
+            pipe.lrem(self._processing, 1, job_id)
+            # Every release changes the hash, so a reclaim that decided on an
+            # earlier snapshot of the same job never releases it a second time.
+            pipe.hincrby(key, "releases", 1)
+            if int(data.get("attempts", 0)) >= int(data.get("max_attempts", DEFAULT_MAX_ATTEMPTS)):
+                pipe.hset(key, mapping={
+                    "status": "failed", "error": error, "lease_token": "", "finished_at": time.time(),
+                })
+                pipe.hincrby(self._counts, "failed", 1)
+            else:
+                pipe.hset(key, mapping={"status": "queued", "error": error, "lease_token": ""})
+                # Retries go to the front of the line.
+                pipe.rpush(self._queued, job_id)
+
+        return self._update_if(job_id, check, update)
+
+    def reclaim_expired(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        reclaimed = 0
+        unleased = set()
+        for job_id in self.client.lrange(self._processing, 0, -1):
+            data = self.client.hgetall(self._key(job_id))
+            if data.get("status") != "leased":
+                # Moved by LMOVE but its lease not yet written: give the leasing
+                # worker until the next pass before treating it as dead.
+                unleased.add(job_id)
+                if job_id not in self._unleased:
+                    continue
+            elif float(data.get("lease_expires") or 0) >= now:
+                continue
+            # Only if nothing (a heartbeat, another reclaimer) touched the job since it was read.
+            if self._release(job_id, "Lease expired (worker died or stalled)", lambda current: current == data):
+                reclaimed += 1
+        self._unleased = unleased
+        return reclaimed
+
+    def get(self, job_id: int) -> Job | None:
+        data = self.client.hgetall(self._key(job_id))
+        return self._job(job_id, data) if data else None
+
+    def stats(self) -> dict[str, int]:
+        counts = self.client.hgetall(self._counts)
+        return {
+            "queued": self.client.llen(self._queued),
+            "leased": self.client.llen(self._processing),
+            "done": int(counts.get("done", 0)),
+            "failed": int(counts.get("failed", 0)),
+        }
+
+    @staticmethod
+    def _job(job_id, data: dict) -> Job:
+        return Job(
+            id=job_id,
+            kind=data["kind"],
+            payload=json.loads(data["payload"]),
+            status=data.get("status", "queued"),
+            attempts=data.get("attempts", 0),
+            max_attempts=data.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+            lease_token=data.get("lease_token") or None,
+            lease_expires=data.get("lease_expires") or None,
+            worker=data.get("worker") or None,
+            result=json.loads(data["result"]) if data.get("result") else None,
+            error=data.get("error") or None,
+        )
+
+
+def open_job_queue(url: str | None = None) -> JobQueue:
+    """
+    Opens a job queue from a URL.
+
+    Args:
+        url: ``sqlite:///path/to/jobs.db`` or ``redis://host:port/db``; falls back to
+            the JOB_QUEUE_URL config value, then to ~/.dependency-doctor/jobs.db.
+
+    Returns:
+        A JobQueue. Redis URLs use redis-py if it is installed, otherwise the
+        built-in RESP client.
+
+    Raises:
+        ValueError: If the URL scheme is not supported, or is rediss:// (TLS)
+            without redis-py installed.
+    """
+    url = url or get_config("JOB_QUEUE_URL")
+    if not url:
+        return SQLiteJobQueue()
+    scheme = urlsplit(url).scheme
+    if scheme == "sqlite":
+        # As in SQLAlchemy: sqlite:///jobs.db is relative, sqlite:////var/jobs.db absolute.
+        return SQLiteJobQueue(url[len("sqlite:///"):] or None)
+    if scheme in ("redis", "rediss"):
+        if redis is not None:
+            # RESP2, which both Redis and the doctor queue-server stand-in speak.
+            return RedisJobQueue(redis.Redis.from_url(url, decode_responses=True, protocol=2))
+        if scheme == "rediss":
+            raise ValueError(f"{url!r} needs TLS, which the built-in Redis client lacks; install redis-py")
+        return RedisJobQueue(RespClient.from_url(url))
+    raise ValueError(f"Unsupported job queue URL: {url!r} (expected sqlite:///path or redis://host:port/db)")
@@ -0,0 +1,265 @@
+import glob
+import os
+import re
+import tomllib
+
+from packaging.utils import canonicalize_name
+
+from ..models.planned_update import PlannedUpdate
+from ..utils.logging import get_logger
+from .github_scanner import COMMON_DEP_KEYS, extract_pyproject_dependencies
+from .requirements_parser import REQUIREMENT_RE, iter_requirements, split_requirement
+
+log = get_logger(__name__)
+
+# The pyproject.toml arrays whose strings are requirements, as key paths.
+DEPENDENCY_ARRAYS = frozenset(COMMON_DEP_KEYS)
+
+# Just enough of TOML to find where each value starts and ends: strings (a basic
+# string may hold ' and a literal string may hold "), comments and brackets.
+_TOML_TOKEN_RE = re.compile(
+    r'(?P<multiline>"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\')'
+    r'|(?P<string>"(?:[^"\\\n]|\\.)*"|\'[^\'\n]*\')'
+    r'|(?P<comment>#[^\n]*)'
+    r'|(?P<newline>\n)'
+    r'|(?P<punct>[\[\]{}=,])'
+    r'|(?P<bare>[^\s"\'#\[\]{}=,]+)'
+    r'|(?P<space>\s)'
+    r'|(?P<other>.)'  # e.g. an unterminated quote in a malformed file
+)
+_TABLE_HEADER_RE = re.compile(r"\[\[?(?P<name>[^\[\]\n]+)\]\]?")
+_KEY_PART_RE = re.compile(r'"[^"]*"|\'[^\']*\'|[^.\s]+')
+
+REQUIREMENTS_GLOB = "requirements*.txt"
+
+
+def _replacement_map(plan: list[PlannedUpdate]) -> dict[str, tuple[str, str]]:
+    return {canonicalize_name(u.package): (u.specifier, u.new_specifier) for u in plan}
+
+
+def _squash(specifier: str) -> str:
+    return "".join(specifier.split())
+
+
+def _rewrite_requirement(text: str, replacements: dict[str, tuple[str, str]]) -> str | None:
+    m = REQUIREMENT_RE.match(text)
+    if not m or not m.group("spec"):
+        return None
+    old_new = replacements.get(canonicalize_name(m.group("name")))
+    if old_new is None or _squash(m.group("spec")) != _squash(old_new[0]):
+        return None
+    return text[:m.start("spec")] + old_new[1] + text[m.end("spec"):]
+
+
+def _is_continued(line: str) -> bool:
+    return line.rstrip("\r\n").endswith("\\")
+
+
+def rewrite_requirements_text(text: str, plan: list[PlannedUpdate]) -> tuple[str, list[str], list[str]]:
+    """
+    Applies planned updates to the contents of a requirements file.
+
+    Only the specifier of each matching requirement is replaced; comments, markers,
+    blank lines, options and line endings are kept exactly as they were.
+    Requirements carrying ``--hash`` options are left alone: a new version next to
+    the old hashes would fail ``pip install --require-hashes``, so such files have
+    to be recompiled (e.g. with pip-compile) instead.
+
+    Args:
+        text: The original file contents.
+        plan: The planned updates.
+
+    Returns:
+        The new contents, the names of the packages that were rewritten, and the
+        names of the planned packages left unchanged because they are hashed.
+    """
+    replacements = _replacement_map(plan)
+    lines = text.splitlines(keepends=True)
+    changed = []
+    needs_recompile = []
+    i = 0
+    while i < len(lines):
+        # A requirement and its backslash-continued option lines form one entry.
+        end = i
+        while end < len(lines) - 1 and _is_continued(lines[end]):
+            end += 1
+        line = lines[i]
+        stripped = line.lstrip()
+        if stripped and not stripped.startswith(("#", "-")):
+            new_line = _rewrite_requirement(line, replacements)
+            if new_line is not None:
+                name = split_requirement(line)[0]
+                if any("--hash" in entry for entry in lines[i:end + 1]):
+                    log.warning("Hashed requirement needs recompiling; leaving it unchanged", line=line.strip())
+                    needs_recompile.append(name)
+                else:
+                    lines[i] = new_line
+                    changed.append(name)
+        i = end + 1
+    return "".join(lines), changed, needs_recompile
+
+
+def _key_path(key: str) -> tuple[str, ...]:
+    return tuple(part.strip("\"'") for part in _KEY_PART_RE.findall(key))
+
+
+def _dependency_strings(text: str):
+    """Yields the match of each single-line string directly inside a DEPENDENCY_ARRAYS array."""
+    table = ()
+    key = []
+    path = None
+    depth = 0
+    in_dependencies = False
+    line_start = True
+    pos = 0
+    while pos < len(text):
+        m = _TOML_TOKEN_RE.match(text, pos)
+        pos = m.end()
+        kind, token = m.lastgroup, m.group()
+        if kind in ("space", "comment"):
+            continue
+        if kind == "newline":
+            if depth == 0:
+                line_start, key, path = True, [], None
+            continue
+        if depth == 0:
+            if line_start and token == "[":
+                header = _TABLE_HEADER_RE.match(text, m.start())
+                if header is not None:
+                    table = _key_path(header.group("name"))
+                    pos = header.end()
+                    continue
+            line_start = False
+            if path is None:
+                if token == "=":
+                    path = table + _key_path("".join(key))
+                else:
+                    key.append(token)
+            elif token in "[{":
+                depth = 1
+                in_dependencies = token == "[" and path in DEPENDENCY_ARRAYS
+            continue
+        if token in "[{":
+            depth += 1
+        elif token in "]}":
+            depth -= 1
+        elif kind == "string" and depth == 1 and in_dependencies:
+            yield m
+
+
+def rewrite_pyproject_text(text: str, plan: list[PlannedUpdate]) -> tuple[str, list[str]]:
+    """
+    Applies planned updates to the contents of a pyproject.toml file.
+
+    Only strings in the dependency arrays (DEPENDENCY_ARRAYS) are considered.
+    Requirement strings are edited in place inside their quotes, so comments,
+    ordering and formatting of the surrounding TOML are preserved.
+
+    Args:
+        text: The original file contents.
+        plan: The planned updates.
+
+    Returns:
+        The new contents and the names of the packages that were rewritten.
+    """
+    replacements = _replacement_map(plan)
+    changed = []
+    pieces = []
+    last = 0
+    for m in _dependency_strings(text):
+        body = m.group()[1:-1]
+        new_body = _rewrite_requirement(body, replacements)
+        if new_body is None:
+            continue
+        changed.append(split_requirement(body)[0])
+        pieces.append(text[last:m.start() + 1])
+        pieces.append(new_body)
+        last = m.end() - 1
+    pieces.append(text[last:])
+    return "".join(pieces), changed
+
+
+def find_manifests(directory: str) -> list[str]:
+    """Returns the pyproject.toml and requirements*.txt files directly inside a directory."""
+    paths = []
+    pyproject = os.path.join(directory, "pyproject.toml")
+    if os.path.isfile(pyproject):
+        paths.append(pyproject)
+    paths.extend(sorted(glob.glob(os.path.join(directory, REQUIREMENTS_GLOB))))
+    return paths
+
+
+def read_manifest_dependencies(path: str) -> list[str]:
+    """
+    Reads the direct dependencies declared in a pyproject.toml or requirements file.
+
+    Args:
+        path: The manifest file path.
+
+    Returns:
+        A list of dependency strings.
+    """
+    if os.path.basename(path) == "pyproject.toml":
+        with open(path, "rb") as f:
+            return extract_pyproject_dependencies(tomllib.load(f)) or []
+    with open(path, encoding="utf-8") as f:
+        return [str(dep) for dep in iter_requirements(f, source=path, include=_read_lines)]
+
+
+def _read_lines(path: str) -> list[str] | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.readlines()
+    except OSError:
+        return None
+
+
+def apply_plan(plan: list[PlannedUpdate], paths: list[str]) -> dict[str, dict[str, list[str]]]:
+    """
+    Rewrites manifest files in place according to an update plan.
+
+    Args:
+        plan: The planned updates.
+        paths: The manifest files to edit.
+
+    Returns:
+        A mapping of file path -> {"updated": packages rewritten in it,
+        "needs_recompile": hashed packages left unchanged}, for the files where
+        either list is non-empty.
+    """
+    results = {}
+    for path in paths:
+        with open(path, encoding="utf-8", newline="") as f:
+            original = f.read()
+        if os.path.basename(path) == "pyproject.toml":
+            new_text, changed = rewrite_pyproject_text(original, plan)
+            needs_recompile = []
+        else:
+            new_text, changed, needs_recompile = rewrite_requirements_text(original, plan)
+        if needs_recompile:
+            results[path] = {"updated": [], "needs_recompile": needs_recompile}
+        if not changed:
+            continue
+        # Write to a sibling temp file first so an interrupted run never leaves
+        # a half-written manifest behind.
+        temp_path = f"{path}.doctor-tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(new_text)
+        os.replace(temp_path, path)
+        log.info("Manifest updated", path=path, packages=changed)
+        results[path] = {"updated": changed, "needs_recompile": needs_recompile}
+    return results
+
+
+def unapplied_updates(plan: list[PlannedUpdate], results: dict[str, dict[str, list[str]]]) -> list[PlannedUpdate]:
+    """
+    Returns the planned updates that ``apply_plan`` neither wrote nor reported
+    as needing a recompile in any file, e.g. because the declaration was not in
+    a form the editor rewrites.
+    """
+    seen = {
+        canonicalize_name(name)
+        for result in results.values()
+        for name in result["updated"] + result["needs_recompile"]
+    }
+    return [update for update in plan if canonicalize_name(update.package) not in seen]
@@ -0,0 +1,300 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from ..utils.config import get_config
+from ..utils.logging import get_logger
+from ..utils.upstream import UpstreamClient, get_upstream_client
+from .github_scanner import get_dependencies_from_github
+from .requirements_parser import split_requirement
+from .update_planner import PYPI_PROJECT_URL
+
+log = get_logger(__name__)
+
+DEFAULT_USAGE_PATH = os.path.join(os.path.expanduser("~"), ".dependency-doctor", "usage.json")
+
+# Scores below this are dropped when decaying, so packages nobody asks for
+# anymore eventually fall out of the stats.
+MIN_SCORE = 0.01
+
+
+class UsageStats:
+    """
+    Decaying request counters for packages and repositories.
+
+    Every request adds 1 to a key's score and all scores halve every
+    ``half_life`` seconds, so the top lists follow current traffic rather than
+    all-time totals. The stats can be saved to and loaded from a JSON file so
+    a restarted server knows what to warm up before the first request arrives.
+    """
+
+    def __init__(self, path: str | None = None, half_life: float = 86400.0, max_entries: int = 5000):
+        self.path = path
+        self.half_life = half_life
+        self.max_entries = max_entries
+        self._scores = {"packages": {}, "repos": {}}
+        self._decayed_at = time.time()
+        self._lock = threading.Lock()
+
+    def record_repo(self, url: str) -> None:
+        self._record("repos", [url])
+
+    def record_packages(self, names) -> None:
+        self._record("packages", names)
+
+    def top_repos(self, n: int) -> list[str]:
+        return self._top("repos", n)
+
+    def top_packages(self, n: int) -> list[str]:
+        return self._top("packages", n)
+
+    def _record(self, kind: str, keys) -> None:
+        with self._lock:
+            scores = self._scores[kind]
+            for key in keys:
+                scores[key] = scores.get(key, 0.0) + 1.0
+            if len(scores) > self.max_entries:
+                for key in sorted(scores, key=scores.get)[:len(scores) - self.max_entries]:
+                    del scores[key]
+
+    def _top(self, kind: str, n: int) -> list[str]:
+        with self._lock:
+            scores = self._scores[kind]
+            return sorted(scores, key=scores.get, reverse=True)[:n]
+
+    def decay(self, now: float | None = None) -> None:
+        """Applies the decay for the time elapsed since the last call."""
+        now = time.time() if now is None else now
+        with self._lock:
+            factor = 0.5 ** (max(0.0, now - self._decayed_at) / self.half_life)
+            self._decayed_at = now
+            for kind, scores in self._scores.items():
+                self._scores[kind] = {k: s * factor for k, s in scores.items() if s * factor >= MIN_SCORE}
+
+    def load(self) -> None:
+        """Loads previously saved stats, if the file exists."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self._scores = {"packages": dict(data.get("packages", {})), "repos": dict(data.get("repos", {}))}
+                self._decayed_at = float(data.get("saved_at", time.time()))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            log.warning("Could not load usage stats", path=self.path, error=str(e))
+            return
+        self.decay()
+
+    def save(self) -> None:
+        """Writes the stats to ``path``, atomically."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {"saved_at": self._decayed_at, **self._scores}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log.warning("Could not save usage stats", path=self.path, error=str(e))
+
+
+class PrefetchScheduler:
+    """
+    Keeps the caches behind the API warm.
+
+    Requests go through ``get_dependencies``, which serves repository scans from
+    a snapshot cache and records which repos and packages are asked for. A
+    background thread wakes every ``interval`` seconds and refreshes the most
+    requested PyPI project documents and repository scans whose cache entries
+    would expire before the next tick, so steady-state requests are answered
+    from cache instead of waiting on GitHub or PyPI.
+    """
+
+    def __init__(
+        self,
+        usage: UsageStats | None = None,
+        client: UpstreamClient | None = None,
+        interval: float = 60.0,
+        top_packages: int = 200,
+        top_repos: int = 20,
+        repo_ttl: float = 600.0,
+        max_workers: int = 8,
+        max_snapshots: int = 1000,
+        token: str | None = None,
+    ):
+        self.usage = usage or UsageStats()
+        self.client = client
+        self.interval = interval
+        self.top_packages = top_packages
+        self.top_repos = top_repos
+        self.repo_ttl = repo_ttl
+        self.max_workers = max_workers
+        self.max_snapshots = max_snapshots
+        self.token = token
+        self.ticks = 0
+        self.last_tick = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _client(self) -> UpstreamClient:
+        return self.client or get_upstream_client()
+
+    def _due(self, age: float | None, ttl: float) -> bool:
+        # Refresh anything that would expire before the next tick runs; the
+        # extra half interval covers a slow tick.
+        return age is None or age >= ttl - 1.5 * self.interval
+
+    def get_dependencies(self, url: str) -> list[str]:
+        """
+        Returns the dependencies of a GitHub repository, from the snapshot cache if fresh.
+
+        Successful requests are recorded in the usage stats.
+
+        Raises:
+            ValueError: If the URL is not a valid GitHub repository URL.
+        """
+        snapshot = self._snapshots.get(url)
+        if snapshot is not None and time.monotonic() - snapshot[0] < self.repo_ttl:
+            dependencies = snapshot[1]
+        else:
+            dependencies = self._scan_repo(url)
+        self.usage.record_repo(url)
+        self.usage.record_packages(
+            parts[0] for parts in map(split_requirement, dependencies) if parts is not None
+        )
+        return list(dependencies)
+
+    def _scan_repo(self, url: str) -> list[str]:
+        dependencies = get_dependencies_from_github(url, token=self.token)
+        with self._lock:
+            self._snapshots.pop(url, None)
+            self._snapshots[url] = (time.monotonic(), dependencies)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.pop(next(iter(self._snapshots)), None)
+        return dependencies
+
+    def snapshot_age(self, url: str) -> float | None:
+        """Returns how many seconds ago ``url`` was scanned, or None if it has no snapshot."""
+        snapshot = self._snapshots.get(url)
+        return time.monotonic() - snapshot[0] if snapshot is not None else None
+
+    def run_once(self) -> dict:
+        """
+        Runs one refresh pass.
+
+        Returns:
+            Counters for the pass: packages and repos refreshed, failures and duration.
+        """
+        started = time.perf_counter()
+        self.usage.decay()
+        client = self._client()
+        package_urls = [
+            url for url in (PYPI_PROJECT_URL.format(package=name) for name in self.usage.top_packages(self.top_packages))
+            if self._due(client.cache_age(url), client.cache_ttl)
+        ]
+        repos = [
+            url for url in self.usage.top_repos(self.top_repos)
+            if self._due(self.snapshot_age(url), self.repo_ttl)
+        ]
+        failures = 0
+        if package_urls or repos:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch") as executor:
+                jobs = [executor.submit(client.refresh_json, url) for url in package_urls]
+                jobs += [executor.submit(self._scan_repo, url) for url in repos]
+                for job in jobs:
+                    try:
+                        job.result()
+                    except (requests.RequestException, ValueError) as e:
+                        failures += 1
+                        log.warning("Prefetch refresh failed", error=str(e))
+                    except Exception as e:
+                        failures += 1
+                        log.error("Prefetch refresh failed", error=str(e))
+        self.usage.save()
+        self.ticks += 1
+        self.last_tick = {
+            "packages_refreshed": len(package_urls),
+            "repos_refreshed": len(repos),
+            "failures": failures,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        log.info("Prefetch pass finished", **self.last_tick)
+        return self.last_tick
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "last_tick": self.last_tick,
+            "top_packages": self.usage.top_packages(10),
+            "top_repos": self.usage.top_repos(10),
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the background thread. The first pass runs immediately."""
+        if self.running:
+            return
+        self.usage.load()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="prefetch-scheduler", daemon=True)
+        self._thread.start()
+        log.info("Prefetch scheduler started", interval=self.interval)
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """Stops the background thread and saves the usage stats."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.usage.save()
+        log.info("Prefetch scheduler stopped")
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                log.error("Prefetch pass failed", error=str(e))
+            self._stop.wait(self.interval)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_prefetch_scheduler() -> PrefetchScheduler:
+    """
+    Returns the process-wide prefetch scheduler, configured from the environment
+    (PREFETCH_INTERVAL, PREFETCH_TOP_PACKAGES, PREFETCH_TOP_REPOS, PREFETCH_REPO_TTL,
+    PREFETCH_HALF_LIFE, PREFETCH_USAGE_FILE).
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PrefetchScheduler(
+                usage=UsageStats(
+                    path=get_config("PREFETCH_USAGE_FILE", DEFAULT_USAGE_PATH),
+                    half_life=float(get_config("PREFETCH_HALF_LIFE", "86400")),
+                ),
+                interval=float(get_config("PREFETCH_INTERVAL", "60")),
+                top_packages=int(get_config("PREFETCH_TOP_PACKAGES", "200")),
+                top_repos=int(get_config("PREFETCH_TOP_REPOS", "20")),
+                repo_ttl=float(get_config("PREFETCH_REPO_TTL", "600")),
+                token=get_config("GITHUB_TOKEN"),
+            )
+        return _scheduler
@@ -0,0 +1,239 @@
+import posixpath
+import re
+from typing import Callable, Iterable, Iterator
+
+from packaging.requirements import InvalidRequirement, Requirement
+
+from ..models.dependency import Dependency
+from ..utils.logging import get_logger
+
+log = get_logger(__name__)
+
+_OPERATOR = r"(?:===|==|~=|>=|<=|!=|>|<)"
+_CLAUSE = _OPERATOR + r"\s*[^\s,;#\\\"']+"
+
+# Matches the leading "name[extras] specifier" part of a requirement and
+# captures the exact span of the specifier as written.
+REQUIREMENT_RE = re.compile(
+    r"^(?P<lead>\s*)"
+    r"(?P<name>[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)"
+    r"(?P<extras>\s*\[[^\]]*\])?"
+    r"\s*(?P<spec>" + _CLAUSE + r"(?:\s*,\s*" + _CLAUSE + r")*)?"
+)
+
+_FIRST_CLAUSE_RE = re.compile(r"^\s*" + _OPERATOR + r"\s*([^\s,;]+)")
+
+# The overwhelmingly common line in compiled requirement sets is a bare
+# "name==version"; those skip the full PEP 508 parser entirely.
+_FAST_PIN_RE = re.compile(
+    r"(?P<name>[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)\s*==\s*(?P<version>[A-Za-z0-9][A-Za-z0-9.+!_-]*)"
+)
+
+# pip treats "#" as a comment only at the start of a line or after whitespace,
+# so URL fragments like "pkg @ https://host/x.zip#sha256=..." survive.
+_COMMENT_RE = re.compile(r"(^|\s+)#.*$")
+
+# Per-requirement options such as --hash=sha256:... or --config-settings.
+_OPTION_SPLIT_RE = re.compile(r"\s+--?[A-Za-z]")
+
+_INCLUDE_OPTIONS = ("-r", "--requirement")
+_CONSTRAINT_OPTIONS = ("-c", "--constraint")
+
+
+def split_requirement(text: str) -> tuple[str, str] | None:
+    """
+    Splits a requirement string into its name and specifier text, as written.
+
+    Args:
+        text: A requirement such as ``"requests[socks]>=2.28,<3; python_version >= '3.8'"``.
+
+    Returns:
+        A ``(name, specifier)`` tuple, e.g. ``("requests", ">=2.28,<3")``, or None if the
+        text does not start with a package name.
+    """
+    m = REQUIREMENT_RE.match(text)
+    if not m:
+        return None
+    return m.group("name"), m.group("spec") or ""
+
+
+def first_specifier_version(specifier: str) -> str | None:
+    """Returns the version of the first clause of a specifier, e.g. "2.28" for ">=2.28,<3"."""
+    m = _FIRST_CLAUSE_RE.match(specifier)
+    return m.group(1) if m else None
+
+
+def iter_logical_lines(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """
+    Joins backslash continuations and strips comments, yielding non-empty logical lines.
+
+    Args:
+        lines: Physical lines, e.g. an open file object.
+
+    Returns:
+        An iterator of ``(line_number, text)`` where ``line_number`` is the first
+        physical line of the logical line.
+    """
+    parts = []
+    start = 0
+    for number, raw in enumerate(lines, start=1):
+        line = raw.rstrip("\r\n")
+        if not parts:
+            start = number
+        continued = line.endswith("\\")
+        if continued:
+            line = line[:-1]
+        if "#" in line:
+            line = _COMMENT_RE.sub("", line)
+        line = line.strip()
+        if line:
+            parts.append(line)
+        if continued:
+            continue
+        if parts:
+            yield start, " ".join(parts) if len(parts) > 1 else parts[0]
+            parts = []
+    if parts:
+        yield start, " ".join(parts)
+
+
+def parse_requirement(text: str) -> Dependency | None:
+    """
+    Parses a single requirement string into a Dependency.
+
+    Plain ``name==version`` pins take a precompiled fast path; anything else
+    (extras, markers, ranges, URLs) goes through ``packaging``'s full parser.
+
+    Args:
+        text: A requirement string without options or comments.
+
+    Returns:
+        A Dependency, or None if the text is not a valid requirement.
+    """
+    text = text.strip()
+    m = _FAST_PIN_RE.fullmatch(text)
+    if m:
+        return Dependency(m.group("name"), "==" + m.group("version"))
+    try:
+        req = Requirement(text)
+    except InvalidRequirement:
+        return None
+    written = REQUIREMENT_RE.match(text)
+    if written and written.group("spec"):
+        # Keep the clauses in the order they were written; SpecifierSet sorts them.
+        specifier = "".join(written.group("spec").split())
+    else:
+        specifier = str(req.specifier)
+    return Dependency(
+        req.name,
+        specifier,
+        extras=tuple(sorted(req.extras)),
+        marker=str(req.marker) if req.marker else None,
+        url=req.url,
+    )
+
+
+def as_dependency(dep: Dependency | str) -> Dependency | None:
+    """Returns ``dep`` unchanged if it is already a Dependency, otherwise parses it."""
+    if isinstance(dep, Dependency):
+        return dep
+    return parse_requirement(dep)
+
+
+def iter_requirements(
+    lines: Iterable[str],
+    source: str = "requirements.txt",
+    include: Callable[[str], Iterable[str] | None] | None = None,
+    _seen: set[str] | None = None,
+) -> Iterator[Dependency]:
+    """
+    Streams the requirements of a requirements file, one Dependency at a time.
+
+    Handles backslash continuations, inline comments, environment markers,
+    per-requirement options such as ``--hash``, and ``-r``/``-c`` directives.
+    Malformed lines are logged and skipped rather than aborting the parse.
+
+    Args:
+        lines: Physical lines of the file; a file object is consumed lazily.
+        source: The file's path, used for logging and to resolve relative includes.
+        include: Optional callback that returns the lines of an included file
+            (for ``-r``), or None if it cannot be read. Without it, includes are skipped.
+
+    Returns:
+        An iterator of Dependency models.
+    """
+    seen = _seen if _seen is not None else {posixpath.normpath(source)}
+    for number, line in iter_logical_lines(lines):
+        if line.startswith("-"):
+            yield from _handle_option(line, number, source, include, seen)
+            continue
+        requirement_text = _OPTION_SPLIT_RE.split(line, 1)[0] if " -" in line or "\t" in line else line
+        dep = parse_requirement(requirement_text)
+        if dep is None:
+            log.warning("Skipping invalid requirement", source=source, line=number, requirement=requirement_text)
+            continue
+        yield dep
+
+
+def parse_requirements(
+    content: str,
+    source: str = "requirements.txt",
+    include: Callable[[str], Iterable[str] | None] | None = None,
+) -> list[Dependency]:
+    """Parses the full text of a requirements file. See ``iter_requirements``."""
+    return list(iter_requirements(content.splitlines(), source=source, include=include))
+
+
+def iter_include_paths(lines: Iterable[str], source: str = "requirements.txt") -> Iterator[str]:
+    """
+    Yields the paths of the files a requirements file pulls in with ``-r``.
+
+    Args:
+        lines: Physical lines of the file.
+        source: The file's path, used to resolve relative includes.
+
+    Returns:
+        An iterator of normalized include paths.
+    """
+    for _, line in iter_logical_lines(lines):
+        if line.startswith("-"):
+            option, value = _split_option(line)
+            if option in _INCLUDE_OPTIONS:
+                yield _resolve_include(source, value)
+
+
+def _split_option(line: str) -> tuple[str, str]:
+    option, _, value = line.partition(" ")
+    if "=" in option and option.startswith("--"):
+        option, _, value = option.partition("=")
+    elif not option.startswith("--") and len(option) > 2:
+        # Short options may be glued to their value, e.g. "-rbase.txt".
+        option, value = option[:2], option[2:]
+    return option, value.strip()
+
+
+def _resolve_include(source: str, value: str) -> str:
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), value))
+
+
+def _handle_option(line, number, source, include, seen) -> Iterator[Dependency]:
+    option, value = _split_option(line)
+    if option in _INCLUDE_OPTIONS:
+        path = _resolve_include(source, value)
+        if include is None:
+            log.info("Skipping nested requirements file", source=source, line=number, path=path)
+            return
+        if path in seen:
+            log.warning("Skipping recursive requirements include", source=source, path=path)
+            return
+        seen.add(path)
+        included = include(path)
+        if included is None:
+            log.warning("Could not read included requirements file", source=source, path=path)
+            return
+        yield from iter_requirements(included, source=path, include=include, _seen=seen)
+    elif option in _CONSTRAINT_OPTIONS:
+        # Constraints restrict versions but don't add dependencies of their own.
+        log.info("Ignoring constraints file", source=source, line=number, path=value)
+    else:
+        log.info("Ignoring pip option", source=source, line=number, option=option)
@@ -0,0 +1,255 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Iterable
+
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
+
+from ..models.dependency import Dependency
+from ..models.vulnerability import Vulnerability
+from ..utils.config import get_config
+from ..utils.logging import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".dependency-doctor", "history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    ref TEXT,
+    sha TEXT,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_repo ON scans (repo, scanned_at);
+
+-- The most recent scan of each repo, so "who uses X today" never has to
+-- aggregate over the full history.
+CREATE TABLE IF NOT EXISTS latest_scans (
+    repo TEXT PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans (id)
+);
+CREATE INDEX IF NOT EXISTS idx_latest_scans_scan ON latest_scans (scan_id);
+
+CREATE TABLE IF NOT EXISTS scan_dependencies (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    package TEXT NOT NULL,
+    specifier TEXT NOT NULL,
+    resolved_version TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scan_dependencies_package ON scan_dependencies (package, scan_id);
+CREATE INDEX IF NOT EXISTS idx_scan_dependencies_scan ON scan_dependencies (scan_id);
+
+CREATE TABLE IF NOT EXISTS findings (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    package TEXT NOT NULL,
+    version TEXT,
+    vuln_id TEXT NOT NULL,
+    description TEXT,
+    fix_versions TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_findings_vuln ON findings (vuln_id, scan_id);
+CREATE INDEX IF NOT EXISTS idx_findings_package ON findings (package, scan_id);
+"""
+
+
+class ScanHistoryStore:
+    """
+    A local, indexed SQLite store of every scan result.
+
+    Each scan records the repo, the ref/SHA that was scanned, its direct
+    dependencies with their resolved versions, and any vulnerability findings.
+    Reverse queries ("which repos depend on X below version Y") are answered
+    from the indexes without touching GitHub or PyPI.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or get_config("SCAN_HISTORY_DB", DEFAULT_DB_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:":
+            # WAL lets concurrent readers query while another process is recording.
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record_scan(
+        self,
+        repo: str,
+        dependencies: Iterable[Dependency | str],
+        ref: str | None = None,
+        sha: str | None = None,
+        findings: Iterable[Vulnerability] = (),
+        resolved_versions: dict[str, str] | None = None,
+        scanned_at: float | None = None,
+    ) -> int:
+        """
+        Persists the result of scanning a repository.
+
+        Args:
+            repo: The repository identifier, e.g. its GitHub URL.
+            dependencies: The direct dependencies found, as models or requirement strings.
+            ref: The branch or tag that was scanned.
+            sha: The commit SHA that was scanned, if known.
+            findings: Vulnerabilities found in the scan.
+            resolved_versions: Optional mapping of package name -> version used for
+                unpinned dependencies (e.g. what the security scan resolved to).
+            scanned_at: The scan timestamp; defaults to now.
+
+        Returns:
+            The id of the recorded scan.
+        """
+        resolved = {canonicalize_name(k): v for k, v in (resolved_versions or {}).items()}
+        dep_rows = []
+        for dep in dependencies:
+            if isinstance(dep, str):
+                dep = _parse_dependency(dep)
+                if dep is None:
+                    continue
+            package = canonicalize_name(dep.name)
+            dep_rows.append((package, dep.specifier, dep.pinned_version or resolved.get(package)))
+        finding_rows = [
+            (canonicalize_name(v.package), v.version, v.id, v.description, ",".join(v.fix_versions))
+            for v in findings
+        ]
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO scans (repo, ref, sha, scanned_at) VALUES (?, ?, ?, ?)",
+                (repo, ref, sha, scanned_at if scanned_at is not None else time.time()),
+            )
+            scan_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO scan_dependencies (scan_id, package, specifier, resolved_version) VALUES (?, ?, ?, ?)",
+                [(scan_id, *row) for row in dep_rows],
+            )
+            self._conn.executemany(
+                "INSERT INTO findings (scan_id, package, version, vuln_id, description, fix_versions) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(scan_id, *row) for row in finding_rows],
+            )
+            self._conn.execute(
+                "INSERT INTO latest_scans (repo, scan_id) VALUES (?, ?) "
+                "ON CONFLICT (repo) DO UPDATE SET scan_id = excluded.scan_id "
+                "WHERE excluded.scan_id > latest_scans.scan_id",
+                (repo, scan_id),
+            )
+        log.info("Scan recorded", repo=repo, ref=ref, scan_id=scan_id, dependencies=len(dep_rows))
+        return scan_id
+
+    def find_dependents(
+        self,
+        package: str,
+        below: str | None = None,
+        specifier: str | None = None,
+        include_unresolved: bool = False,
+        latest_only: bool = True,
+    ) -> list[dict]:
+        """
+        Finds repositories that depend on a package, optionally within a version range.
+
+        Args:
+            package: The package name (any normalization, e.g. "Django" or "django").
+            below: Only match resolved versions strictly lower than this version.
+            specifier: Only match resolved versions inside this specifier set, e.g. ">=2,<2.3".
+            include_unresolved: Also return dependencies whose version is unknown
+                when a version filter is given.
+            latest_only: Only consider the most recent scan of each repo.
+
+        Returns:
+            A list of dicts with repo, ref, sha, scanned_at, package, specifier and
+            resolved_version, newest scans first.
+        """
+        rows = self._query(
+            f"SELECT s.repo, s.ref, s.sha, s.scanned_at, d.package, d.specifier, d.resolved_version "
+            f"FROM scan_dependencies d JOIN scans s ON s.id = d.scan_id {_latest_join(latest_only)}"
+            f"WHERE d.package = ? ORDER BY s.scanned_at DESC",
+            (canonicalize_name(package),),
+        )
+        spec = SpecifierSet(specifier) if specifier else None
+        limit = Version(below) if below else None
+        if spec is None and limit is None:
+            return rows
+
+        matches = []
+        for row in rows:
+            version = _parse_version(row["resolved_version"])
+            if version is None:
+                if include_unresolved:
+                    matches.append(row)
+                continue
+            if limit is not None and not version < limit:
+                continue
+            if spec is not None and not spec.contains(version, prereleases=True):
+                continue
+            matches.append(row)
+        return matches
+
+    def find_affected(self, vuln_id: str, latest_only: bool = True) -> list[dict]:
+        """
+        Finds repositories whose scans reported a given vulnerability.
+
+        Args:
+            vuln_id: The advisory identifier, e.g. "PYSEC-2023-123".
+            latest_only: Only consider the most recent scan of each repo.
+
+        Returns:
+            A list of dicts with repo, ref, sha, scanned_at, package, version and vuln_id.
+        """
+        return self._query(
+            f"SELECT s.repo, s.ref, s.sha, s.scanned_at, f.package, f.version, f.vuln_id "
+            f"FROM findings f JOIN scans s ON s.id = f.scan_id {_latest_join(latest_only)}"
+            f"WHERE f.vuln_id = ? ORDER BY s.scanned_at DESC",
+            (vuln_id,),
+        )
+
+    def _query(self, sql: str, params: tuple) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+
+def _latest_join(latest_only: bool) -> str:
+    return "JOIN latest_scans l ON l.scan_id = s.id " if latest_only else ""
+
+
+@lru_cache(maxsize=4096)
+def _parse_version(version: str | None) -> Version | None:
+    if not version:
+        return None
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+def _parse_dependency(dep_string: str) -> Dependency | None:
+    try:
+        req = Requirement(dep_string)
+    except Exception:
+        log.warning("Could not parse dependency for scan history, skipping", dependency=dep_string)
+        return None
+    return Dependency(
+        req.name,
+        str(req.specifier),
+        extras=tuple(sorted(req.extras)),
+        marker=str(req.marker) if req.marker else None,
+        url=req.url,
+    )
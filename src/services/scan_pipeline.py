@@ -0,0 +1,100 @@
+from ..utils.config import get_config
+from ..utils.logging import get_logger
+from ..utils.pipeline import Pipeline, Stage
+from .github_scanner import fetch_manifest_from_github, parse_manifest
+from .security_scanner import audit_pinned_requirements, pinned_versions, resolve_scan_pins
+from .update_checker import compare_versions, resolve_latest_versions
+
+log = get_logger(__name__)
+
+# GitHub and PyPI stages are I/O bound and get more threads; parsing and
+# comparing are cheap CPU work. pip-audit runs as a subprocess per repo.
+DEFAULT_WORKERS = {
+    "fetch": 4,
+    "parse": 1,
+    "resolve": 8,
+    "compare": 1,
+    "audit": 2,
+}
+
+
+def parse_worker_spec(spec: str | None) -> dict[str, int]:
+    """
+    Parses a per-stage worker count spec such as ``"fetch=8,resolve=16"``.
+
+    Args:
+        spec: The spec string; falls back to the PIPELINE_WORKERS config value.
+
+    Returns:
+        The default worker counts, overridden by the spec.
+    """
+    workers = dict(DEFAULT_WORKERS)
+    spec = spec or get_config("PIPELINE_WORKERS")
+    if not spec:
+        return workers
+    for part in spec.split(","):
+        name, _, count = part.partition("=")
+        name = name.strip()
+        if name not in workers or not count.strip().isdigit():
+            raise ValueError(f"Invalid pipeline worker spec: {part!r} (expected e.g. 'fetch=4,resolve=8')")
+        workers[name] = int(count)
+    return workers
+
+
+def parse_scanned_manifest(manifest):
+    """The parse stage: the parsed dependencies plus the commit SHA they were read at."""
+    return {"sha": manifest.sha if manifest is not None else None, "dependencies": parse_manifest(manifest)}
+
+
+def build_update_pipeline(token: str | None = None, workers: dict[str, int] | None = None) -> Pipeline:
+    """
+    Builds the check-updates pipeline: fetch -> parse -> resolve -> compare.
+
+    Each input item is a GitHub repository URL. The final value of each item is
+    a dict with "sha", "dependencies" and "updates".
+    """
+    workers = workers or DEFAULT_WORKERS
+
+    def resolve(scan):
+        return scan, resolve_latest_versions(scan["dependencies"])
+
+    def compare(resolved):
+        scan, latest_versions = resolved
+        return {**scan, "updates": compare_versions(scan["dependencies"], latest_versions)}
+
+    return Pipeline([
+        Stage("fetch", lambda url: fetch_manifest_from_github(url, token=token), workers["fetch"]),
+        Stage("parse", parse_scanned_manifest, workers["parse"]),
+        Stage("resolve", resolve, workers["resolve"]),
+        Stage("compare", compare, workers["compare"]),
+    ])
+
+
+def build_security_pipeline(token: str | None = None, workers: dict[str, int] | None = None) -> Pipeline:
+    """
+    Builds the security-scan pipeline: fetch -> parse -> resolve -> audit.
+
+    Each input item is a GitHub repository URL. The final value of each item is
+    a dict with "sha", "dependencies", "resolved_versions" (package -> version
+    scanned, including unpinned dependencies resolved on PyPI) and
+    "vulnerabilities" (None if pip-audit failed).
+    """
+    workers = workers or DEFAULT_WORKERS
+
+    def resolve(scan):
+        pins = resolve_scan_pins(scan["dependencies"])
+        return {**scan, "resolved_versions": pinned_versions(pins)}, pins
+
+    def audit(resolved):
+        scan, pins = resolved
+        if not pins:
+            log.warning("No dependencies could be resolved for scanning.")
+            return {**scan, "vulnerabilities": []}
+        return {**scan, "vulnerabilities": audit_pinned_requirements(pins)}
+
+    return Pipeline([
+        Stage("fetch", lambda url: fetch_manifest_from_github(url, token=token), workers["fetch"]),
+        Stage("parse", parse_scanned_manifest, workers["parse"]),
+        Stage("resolve", resolve, workers["resolve"]),
+        Stage("audit", audit, workers["audit"]),
+    ])
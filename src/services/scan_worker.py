@@ -0,0 +1,217 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable
+
+from ..models.job import Job
+from ..utils.config import get_config
+from ..utils.logging import get_logger
+from .github_scanner import fetch_manifest_from_github, parse_manifest
+from .job_queue import JobQueue, open_job_queue
+from .scan_history import ScanHistoryStore
+from .security_scanner import audit_pinned_requirements, pinned_versions, resolve_scan_pins
+from .update_checker import compare_versions, resolve_latest_versions
+
+log = get_logger(__name__)
+
+JOB_KINDS = ("deps", "check-updates", "security-scan")
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def run_scan_job(job: Job, token: str | None = None) -> dict:
+    """
+    Runs one repo-scan job and records it in the scan history store.
+
+    The history store (SCAN_HISTORY_DB) is a SQLite file local to the worker's
+    host, so with workers on several hosts each one holds only the scans it ran.
+    The returned result is stored on the job record in the shared queue, which
+    is where results from every host are collected (``doctor jobs --id``).
+
+    Args:
+        job: A job whose kind is one of JOB_KINDS and whose payload has a "url".
+        token: A GitHub token; falls back to the GITHUB_TOKEN config value.
+
+    Returns:
+        A JSON-serializable summary of the scan, stored as the job's result. It
+        carries everything recorded in the history store; ``scan_id`` refers to
+        the store on the host that ran the job.
+
+    Raises:
+        ValueError: If the job kind is unknown or the payload has no URL.
+        RuntimeError: If the security audit could not complete, so the job is retried.
+    """
+    if job.kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {job.kind!r} (expected one of {', '.join(JOB_KINDS)})")
+    url = job.payload.get("url")
+    if not url:
+        raise ValueError("Job payload has no 'url'")
+    token = token or get_config("GITHUB_TOKEN")
+
+    manifest = fetch_manifest_from_github(url, token=token)
+    dependencies = parse_manifest(manifest)
+    sha = manifest.sha if manifest is not None else None
+    result = {"url": url, "sha": sha, "dependencies": [str(dep) for dep in dependencies]}
+    findings, resolved = [], {}
+    if job.kind == "check-updates" and dependencies:
+        updates = compare_versions(dependencies, resolve_latest_versions(dependencies))
+        result["updates"] = [update.to_dict() for update in updates]
+    elif job.kind == "security-scan" and dependencies:
+        pins = resolve_scan_pins(dependencies)
+        findings = audit_pinned_requirements(pins) if pins else []
+        if findings is None:
+            raise RuntimeError("The security scan could not be completed")
+        resolved = pinned_versions(pins)
+        result["resolved_versions"] = resolved
+        result["vulnerabilities"] = [v.to_dict() for v in findings]
+
+    with ScanHistoryStore() as store:
+        result["scan_id"] = store.record_scan(
+            url, dependencies, ref="main", sha=sha, findings=findings, resolved_versions=resolved,
+        )
+    return result
+
+
+class ScanWorker:
+    """
+    Leases jobs from a queue and runs them until told to stop.
+
+    While a job runs, a heartbeat thread extends its lease every third of the
+    lease period, so a long scan keeps its job while a dead worker's job is
+    reclaimed by others once the lease runs out. If the heartbeat finds the
+    lease was lost (the worker stalled past it), the result is discarded: the
+    job has already gone to another worker.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: str | None = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        handler: Callable[[Job], dict] = run_scan_job,
+    ):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.handler = handler
+        self.completed = 0
+        self.failed = 0
+
+    def run(
+        self,
+        max_jobs: int | None = None,
+        exit_when_idle: bool = False,
+        stop: threading.Event | None = None,
+    ) -> int:
+        """
+        Processes jobs until ``stop`` is set, ``max_jobs`` have run, or (with
+        ``exit_when_idle``) no job is queued or leased anywhere.
+
+        Returns:
+            The number of jobs this worker processed.
+        """
+        stop = stop or threading.Event()
+        processed = 0
+        log.info("Scan worker started", worker=self.worker_id)
+        while not stop.is_set() and (max_jobs is None or processed < max_jobs):
+            job = self.queue.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                # Jobs leased by other workers may still come back if they die.
+                if exit_when_idle and not any(self.queue.stats()[s] for s in ("queued", "leased")):
+                    break
+                stop.wait(self.poll_interval)
+                continue
+            self.process(job)
+            processed += 1
+        log.info("Scan worker stopped", worker=self.worker_id, completed=self.completed, failed=self.failed)
+        return processed
+
+    def process(self, job: Job) -> None:
+        """Runs one leased job and reports its outcome to the queue."""
+        log.info("Job started", worker=self.worker_id, job=job.id, kind=job.kind, attempt=job.attempts)
+        done = threading.Event()
+        lost = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, done, lost), name=f"heartbeat-{job.id}", daemon=True,
+        )
+        heartbeat.start()
+        started = time.perf_counter()
+        try:
+            result = self.handler(job)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            error = None
+        finally:
+            done.set()
+            heartbeat.join()
+
+        seconds = round(time.perf_counter() - started, 3)
+        if lost.is_set():
+            log.warning("Job lease lost; discarding result", worker=self.worker_id, job=job.id)
+            return
+        if error is None:
+            reported = self.queue.complete(job, result)
+            self.completed += reported
+            log.info("Job completed", worker=self.worker_id, job=job.id, seconds=seconds)
+        else:
+            reported = self.queue.fail(job, error)
+            self.failed += reported
+            log.error("Job failed", worker=self.worker_id, job=job.id, attempt=job.attempts,
+                      max_attempts=job.max_attempts, error=error, seconds=seconds)
+        if not reported:
+            log.warning("Job lease lost before its outcome was recorded", worker=self.worker_id, job=job.id)
+
+    def _heartbeat(self, job: Job, done: threading.Event, lost: threading.Event) -> None:
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(job, self.lease_seconds):
+                    lost.set()
+                    return
+            except Exception as e:
+                # A transient queue error is not a lost lease; try again next beat.
+                log.warning("Job heartbeat failed", worker=self.worker_id, job=job.id, error=str(e))
+
+
+def run_workers(
+    queue_url: str | None = None,
+    concurrency: int = 1,
+    max_jobs: int | None = None,
+    exit_when_idle: bool = False,
+    stop: threading.Event | None = None,
+    **worker_options,
+) -> int:
+    """
+    Runs ``concurrency`` scan workers in this process, each on its own queue
+    connection. Scans are I/O bound (GitHub, PyPI, pip-audit subprocesses), so
+    threads scale well; run more processes or hosts to go further.
+
+    Returns:
+        The total number of jobs processed.
+    """
+    stop = stop or threading.Event()
+    counts = [0] * concurrency
+
+    def work(index: int) -> None:
+        with open_job_queue(queue_url) as queue:
+            worker = ScanWorker(queue, **worker_options)
+            counts[index] = worker.run(max_jobs=max_jobs, exit_when_idle=exit_when_idle, stop=stop)
+
+    threads = [threading.Thread(target=work, args=(i,), name=f"scan-worker-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        log.info("Stopping scan workers after their current jobs")
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return sum(counts)
@@ -2,39 +2,59 @@ import subprocess
 import json
 import tempfile
 import os
-from packaging.requirements import Requirement
+from ..models.dependency import Dependency
+from ..models.vulnerability import Vulnerability
 from ..utils.logging import get_logger
+from .requirements_parser import as_dependency
 from .update_checker import get_latest_version
 
 log = get_logger(__name__)
 
-def scan_dependencies_for_vulnerabilities(dependencies: list[str]) -> list[dict]:
+def scan_dependencies_for_vulnerabilities(dependencies: list[Dependency | str]) -> list[Vulnerability]:
     """
     Scans a list of dependencies for known vulnerabilities by invoking the pip-audit CLI tool.
     If a dependency is not pinned, it resolves the latest version from PyPI before scanning.
 
     Args:
-        dependencies: A list of dependency strings.
+        dependencies: A list of parsed Dependency models or dependency strings.
 
     Returns:
-        A list of dicts, each representing a found vulnerability.
+        A list of Vulnerability models, one per found vulnerability.
+    """
+    resolved_deps = resolve_scan_pins(dependencies)
+    if not resolved_deps:
+        log.warning("No dependencies could be resolved for scanning.")
+        return []
+    return audit_pinned_requirements(resolved_deps)
+
+
+def resolve_scan_pins(dependencies: list[Dependency | str]) -> list[str]:
+    """
+    Pins every dependency to an exact version for scanning, resolving unpinned ones
+    to their latest version on PyPI. Dependencies that cannot be resolved are skipped.
+
+    Args:
+        dependencies: A list of parsed Dependency models or dependency strings.
+
+    Returns:
+        A list of pinned requirement strings.
     """
-    vulnerabilities = []
-    
     resolved_deps = []
     log.info("Resolving dependency versions for security scan...")
     for dep_string in dependencies:
         try:
-            req = Requirement(dep_string)
+            req = as_dependency(dep_string)
+            if req is None:
+                raise ValueError("Invalid requirement")
             # If the version is already pinned (e.g. '==1.2.3'), use it directly.
-            if "==" in str(req.specifier):
-                resolved_deps.append(dep_string)
+            if "==" in req.specifier:
+                resolved_deps.append(str(req))
             else:
                 # Otherwise, find the latest version from PyPI and pin to that for the scan.
                 latest_version = get_latest_version(req.name)
                 if latest_version:
                     pinned_dep = f"{req.name}=={latest_version}"
-                    log.info(f"Resolved unpinned dependency for scanning: '{dep_string}' -> '{pinned_dep}'")
+                    log.info(f"Resolved unpinned dependency for scanning: '{req}' -> '{pinned_dep}'")
                     resolved_deps.append(pinned_dep)
                 else:
                     log.warning("Could not resolve latest version for package, skipping scan for it.", package=req.name)
@@ -48,10 +68,33 @@ def scan_dependencies_for_vulnerabilities(dependencies: list[str]) -> list[dict]
                 resolved_deps.append(pinned_dep)
             else:
                 log.warning("Could not parse or resolve dependency, skipping", dependency=dep_string)
+    return resolved_deps
 
-    if not resolved_deps:
-        log.warning("No dependencies could be resolved for scanning.")
-        return []
+
+def pinned_versions(pins: list[str]) -> dict[str, str]:
+    """
+    Returns the package name -> version mapping of pinned requirement strings,
+    e.g. from resolve_scan_pins, for recording what a scan resolved to.
+    """
+    versions = {}
+    for pin in pins:
+        dep = as_dependency(pin)
+        if dep is not None and dep.pinned_version:
+            versions[dep.name] = dep.pinned_version
+    return versions
+
+
+def audit_pinned_requirements(resolved_deps: list[str]) -> list[Vulnerability] | None:
+    """
+    Runs pip-audit over a list of pinned requirements.
+
+    Args:
+        resolved_deps: Pinned requirement strings, e.g. from resolve_scan_pins.
+
+    Returns:
+        A list of Vulnerability models, or None if the scan failed.
+    """
+    vulnerabilities = []
 
     with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".txt") as temp_reqs:
         temp_reqs.write("\n".join(resolved_deps))
@@ -87,13 +130,13 @@ def scan_dependencies_for_vulnerabilities(dependencies: list[str]) -> list[dict]
                 log.warning("Skipping unexpected item in pip-audit output", item=item)
                 continue
             for vuln in item.get("vulns", []):
-                vulnerabilities.append({
-                    "package": item.get("name"),
-                    "version": item.get("version"),
-                    "id": vuln.get("id"),
-                    "description": vuln.get("description"),
-                    "fix_versions": vuln.get("fix_versions", []),
-                })
+                vulnerabilities.append(Vulnerability(
+                    package=item.get("name"),
+                    version=item.get("version"),
+                    id=vuln.get("id"),
+                    description=vuln.get("description"),
+                    fix_versions=vuln.get("fix_versions", []),
+                ))
 
     except json.JSONDecodeError as e:
         log.error("Failed to decode JSON from pip-audit", error=str(e), output=result.stdout)
@@ -1,7 +1,10 @@
 import requests
 from packaging.version import parse as parse_version
-from packaging.requirements import Requirement
+from ..models.dependency import Dependency
+from ..models.update_info import UpdateInfo
 from ..utils.logging import get_logger
+from ..utils.upstream import get_upstream_client
+from .requirements_parser import as_dependency, first_specifier_version
 
 log = get_logger(__name__)
 
@@ -18,9 +21,7 @@ def get_latest_version(package_name: str) -> str | None:
     """
     url = f"https://pypi.org/pypi/{package_name}/json"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = get_upstream_client().get_json(url)
         return data["info"]["version"]
     except requests.RequestException as e:
         log.error("Failed to fetch from PyPI", package=package_name, error=str(e))
@@ -30,50 +31,88 @@ def get_latest_version(package_name: str) -> str | None:
         return None
 
 
-def check_for_updates(dependencies: list[str]) -> list[dict]:
+def resolve_latest_versions(dependencies: list[Dependency | str]) -> dict[str, str]:
     """
-    For a list of dependencies, finds and compares versions to identify outdated packages.
+    Looks up the latest PyPI version of every dependency.
+
+    Args:
+        dependencies: A list of parsed Dependency models or dependency strings.
+
+    Returns:
+        A mapping of package name -> latest version, for the packages found on PyPI.
+    """
+    latest_versions = {}
+    for dep_string in dependencies:
+        dep = as_dependency(dep_string)
+        if dep is None or dep.url or dep.name in latest_versions:
+            continue
+        latest_version_str = get_latest_version(dep.name)
+        if latest_version_str:
+            latest_versions[dep.name] = latest_version_str
+    return latest_versions
+
+
+def compare_versions(dependencies: list[Dependency | str], latest_versions: dict[str, str]) -> list[UpdateInfo]:
+    """
+    Compares declared dependencies against known latest versions to identify outdated packages.
 
     Args:
-        dependencies: A list of dependency strings.
+        dependencies: A list of parsed Dependency models or dependency strings.
+        latest_versions: A mapping of package name -> latest version.
 
     Returns:
-        A list of dicts with actionable update information.
+        A list of UpdateInfo models with actionable update information.
     """
     updates = []
     for dep_string in dependencies:
         try:
-            req = Requirement(dep_string)
-            package_name = req.name
+            dep = as_dependency(dep_string)
+            if dep is None:
+                raise ValueError("Invalid requirement")
+            package_name = dep.name
 
-            if req.url:
+            if dep.url:
                 continue
 
-            latest_version_str = get_latest_version(package_name)
+            latest_version_str = latest_versions.get(package_name)
 
             if not latest_version_str:
                 continue
 
             # If there is no version specifier, we cannot determine if it's outdated.
-            if not req.specifier:
+            if not dep.specifier:
                 continue
 
-            # Heuristic: Extract the version from the first specifier in the set.
+            # Heuristic: Extract the version from the first specifier as written.
             # This handles cases like '>=', '==', and '~=' by comparing against the base version.
-            specified_version_str = list(req.specifier)[0].version
+            specified_version_str = first_specifier_version(dep.specifier)
 
             # Only report if the latest version is strictly newer than the specified one.
             if parse_version(latest_version_str) > parse_version(specified_version_str):
-                updates.append({
-                    "package": package_name,
-                    "specifier": str(req.specifier),
-                    "latest_version": latest_version_str,
-                })
+                updates.append(UpdateInfo(
+                    package=package_name,
+                    specifier=dep.specifier,
+                    latest_version=latest_version_str,
+                ))
         except Exception as e:
             log.warning(
                 "Could not parse or check dependency",
-                dep_string=dep_string,
+                dep_string=str(dep_string),
                 error=str(e),
             )
             continue
-    return updates 
\ No newline at end of file
+    return updates
+
+
+def check_for_updates(dependencies: list[Dependency | str]) -> list[UpdateInfo]:
+    """
+    For a list of dependencies, finds and compares versions to identify outdated packages.
+
+    Args:
+        dependencies: A list of parsed Dependency models or dependency strings.
+
+    Returns:
+        A list of UpdateInfo models with actionable update information.
+    """
+    dependencies = [as_dependency(dep) or dep for dep in dependencies]
+    return compare_versions(dependencies, resolve_latest_versions(dependencies))
@@ -0,0 +1,374 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+import requests
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
+
+from ..models.planned_update import PlannedUpdate
+from ..utils.logging import get_logger
+from ..utils.profiling import stage
+from ..utils.upstream import get_upstream_client
+from .requirements_parser import split_requirement
+
+log = get_logger(__name__)
+
+PYPI_PROJECT_URL = "https://pypi.org/pypi/{package}/json"
+PYPI_RELEASE_URL = "https://pypi.org/pypi/{package}/{version}/json"
+
+# Operators whose version can be moved forward to express an upgrade.
+FIRST_CLAUSE_RE = re.compile(r"^\s*(===|==|~=|>=)\s*([^\s,;]+)")
+
+DEFAULT_MAX_WORKERS = 16
+# How many candidates of a package to fetch metadata for at once when the
+# resolver has to backtrack into versions it has not seen yet.
+SPECULATIVE_BATCH = 4
+MAX_RESOLVER_STEPS = 10_000
+
+
+def fetch_project(package_name: str) -> dict | None:
+    """
+    Fetches a project's release list from PyPI, along with the ``requires_dist`` of its
+    latest release (which the project JSON includes for free).
+
+    Args:
+        package_name: The name of the package.
+
+    Returns:
+        A dict with "releases" (non-yanked version strings), "latest" and
+        "requires_dist", or None if the project could not be fetched.
+    """
+    url = PYPI_PROJECT_URL.format(package=package_name)
+    try:
+        data = get_upstream_client().get_json(url)
+        releases = [
+            version for version, files in data["releases"].items()
+            if files and not all(f.get("yanked") for f in files)
+        ]
+        return {
+            "releases": releases,
+            "latest": data["info"]["version"],
+            "requires_dist": data["info"].get("requires_dist") or [],
+        }
+    except requests.RequestException as e:
+        log.error("Failed to fetch project from PyPI", package=package_name, error=str(e))
+        return None
+    except (KeyError, TypeError):
+        log.error("Unexpected PyPI response format", package=package_name)
+        return None
+
+
+def fetch_requires_dist(package_name: str, version: str) -> list[str] | None:
+    """
+    Fetches the ``requires_dist`` metadata of a specific release from PyPI.
+
+    Args:
+        package_name: The name of the package.
+        version: The release version.
+
+    Returns:
+        A list of requirement strings, or None if the release could not be fetched.
+    """
+    url = PYPI_RELEASE_URL.format(package=package_name, version=version)
+    try:
+        return get_upstream_client().get_json(url)["info"].get("requires_dist") or []
+    except requests.RequestException as e:
+        log.error("Failed to fetch release from PyPI", package=package_name, version=version, error=str(e))
+        return None
+    except (KeyError, TypeError):
+        log.error("Unexpected PyPI response format", package=package_name, version=version)
+        return None
+
+
+class MetadataCache:
+    """
+    Memoizes PyPI project and release metadata for the resolver.
+
+    Lookups are batched: callers prefetch every key they are about to need and
+    the cache fetches the missing ones concurrently, so a plan costs one round
+    of parallel requests rather than one request per candidate.
+
+    Failed fetches are never cached as data. A release whose metadata could not
+    be fetched is marked unavailable until ``forget_unavailable`` is called, so
+    a PyPI outage never looks like "this release has no requirements".
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._projects = {}
+        self._constraints = {}
+        self._unavailable = set()
+        self._lock = threading.Lock()
+
+    def forget_unavailable(self) -> None:
+        """Lets lookups that failed before be fetched again."""
+        with self._lock:
+            self._unavailable.clear()
+            self._projects = {name: project for name, project in self._projects.items() if project is not None}
+
+    def prefetch_projects(self, names: Iterable[str]) -> None:
+        """Fetches the project metadata of every name not already cached, concurrently."""
+        missing = [name for name in dict.fromkeys(names) if name not in self._projects]
+        for name, project in zip(missing, self._map(fetch_project, missing)):
+            with self._lock:
+                self._projects[name] = project
+                if project:
+                    self._store_constraints(name, project["latest"], project["requires_dist"])
+
+    def prefetch_constraints(self, keys: Iterable[tuple[str, Version]]) -> None:
+        """Fetches the ``requires_dist`` of every (name, version) not already cached, concurrently."""
+        missing = [key for key in dict.fromkeys(keys) if not self.has_constraints(*key)]
+        results = self._map(lambda key: fetch_requires_dist(key[0], str(key[1])), missing)
+        for (name, version), requires_dist in zip(missing, results):
+            with self._lock:
+                if requires_dist is None:
+                    self._unavailable.add(self._constraint_key(name, version))
+                else:
+                    self._store_constraints(name, str(version), requires_dist)
+
+    def project(self, name: str) -> dict | None:
+        if name not in self._projects:
+            self.prefetch_projects([name])
+        return self._projects[name]
+
+    def constraints(self, name: str, version: Version) -> dict[str, SpecifierSet] | None:
+        """
+        Returns the dependencies a release places on other packages.
+
+        Args:
+            name: The package name.
+            version: The release version.
+
+        Returns:
+            A mapping of canonical package name -> combined SpecifierSet, limited to
+            requirements that apply in the current environment without extras, or
+            None if the release metadata could not be fetched.
+        """
+        if not self.has_constraints(name, version):
+            self.prefetch_constraints([(name, version)])
+        return self._constraints.get(self._constraint_key(name, version))
+
+    def has_constraints(self, name: str, version: Version) -> bool:
+        """Returns whether the release was looked up already, successfully or not."""
+        key = self._constraint_key(name, version)
+        return key in self._constraints or key in self._unavailable
+
+    @staticmethod
+    def _constraint_key(name: str, version) -> tuple[str, str]:
+        try:
+            return canonicalize_name(name), str(Version(str(version)))
+        except InvalidVersion:
+            return canonicalize_name(name), str(version)
+
+    def _store_constraints(self, name: str, version: str, requires_dist: list[str]) -> None:
+        constraints = {}
+        for req_string in requires_dist:
+            try:
+                req = Requirement(req_string)
+                if req.marker and not req.marker.evaluate({"extra": ""}):
+                    continue
+            except Exception:
+                continue
+            dep = canonicalize_name(req.name)
+            constraints[dep] = constraints.get(dep, SpecifierSet()) & req.specifier
+        self._constraints[self._constraint_key(name, version)] = constraints
+
+    def _map(self, fn, items: list) -> list:
+        if not items:
+            return []
+        if len(items) == 1:
+            return [fn(items[0])]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(fn, items))
+
+
+class _Target:
+    """A declared dependency the planner may upgrade."""
+
+    __slots__ = ("name", "key", "specifier", "operator", "base", "rest", "candidates", "latest")
+
+    def __init__(self, name: str, specifier: str, operator: str, base: Version, rest: SpecifierSet):
+        self.name = name
+        self.key = canonicalize_name(name)
+        self.specifier = specifier
+        self.operator = operator
+        self.base = base
+        self.rest = rest
+        self.candidates = []
+        self.latest = None
+
+
+def _parse_target(dep_string: str) -> _Target | None:
+    parts = split_requirement(dep_string)
+    if not parts or not parts[1] or "@" in dep_string:
+        return None
+    name, specifier = parts
+    m = FIRST_CLAUSE_RE.match(specifier)
+    if not m or "*" in m.group(2):
+        return None
+    try:
+        base = Version(m.group(2))
+        rest = SpecifierSet(specifier[m.end():].lstrip(" ,"))
+    except (InvalidVersion, ValueError):
+        return None
+    return _Target(name, specifier, m.group(1), base, rest)
+
+
+def _bump_specifier(target: _Target, version: Version) -> str:
+    m = FIRST_CLAUSE_RE.match(target.specifier)
+    new_version = str(version)
+    if target.operator == "~=":
+        # ~= allows anything up to its last segment, so keep the declared number
+        # of segments: ~=1.4 becomes ~=2.3 (2.x from 2.3 on), not ~=2.3.1.
+        segments = max(len(target.base.release), 2)
+        release = (version.release + (0,) * segments)[:segments]
+        new_version = ".".join(map(str, release))
+        if version.epoch:
+            new_version = f"{version.epoch}!{new_version}"
+    return target.specifier[:m.start(2)] + new_version + target.specifier[m.end(2):]
+
+
+def _build_candidates(target: _Target, project: dict) -> None:
+    versions = []
+    for version_str in project["releases"]:
+        try:
+            version = Version(version_str)
+        except InvalidVersion:
+            continue
+        if version.is_prerelease and not target.base.is_prerelease:
+            continue
+        versions.append(version)
+    upgrades = [v for v in versions if v > target.base and target.rest.contains(v, prereleases=True)]
+    # Newest first, with the currently declared version as the last resort.
+    target.candidates = sorted(upgrades, reverse=True) + [target.base]
+    target.latest = max(versions) if versions else None
+
+
+def _resolve(targets: list[_Target], cache: MetadataCache) -> dict[str, Version] | None:
+    """
+    Picks one candidate per target such that no selected release's requirements
+    exclude another selected release, preferring the newest versions.
+
+    This is chronological backtracking over the declared dependencies; candidate
+    metadata is memoized in the cache and fetched in speculative batches when
+    the search moves into versions it has not seen yet.
+    """
+    assignment = {}
+    positions = [0] * len(targets)
+    steps = 0
+    i = 0
+    while i < len(targets):
+        target = targets[i]
+        placed = False
+        while positions[i] < len(target.candidates):
+            position = positions[i]
+            positions[i] += 1
+            steps += 1
+            if steps > MAX_RESOLVER_STEPS:
+                log.error("Update planner gave up after too many resolver steps", steps=steps)
+                return None
+            candidate = target.candidates[position]
+            if not cache.has_constraints(target.name, candidate):
+                batch = target.candidates[position:position + SPECULATIVE_BATCH]
+                cache.prefetch_constraints((target.name, v) for v in batch)
+            if _is_compatible(target, candidate, assignment, cache):
+                assignment[target.key] = candidate
+                placed = True
+                break
+        if placed:
+            i += 1
+            continue
+        if i == 0:
+            return None
+        positions[i] = 0
+        i -= 1
+        del assignment[targets[i].key]
+    return assignment
+
+
+def _is_compatible(target: _Target, candidate: Version, assignment: dict, cache: MetadataCache) -> bool:
+    constraints = cache.constraints(target.name, candidate)
+    if constraints is None:
+        # Unknown requirements: never propose an upgrade blind. The declared
+        # version is what the project already uses, so it stays eligible.
+        if candidate != target.base:
+            log.warning("Release metadata unavailable, skipping candidate", package=target.name, version=str(candidate))
+            return False
+        constraints = {}
+    for dep, spec in constraints.items():
+        chosen = assignment.get(dep)
+        if chosen is not None and not spec.contains(chosen, prereleases=True):
+            return False
+    for other, chosen in assignment.items():
+        spec = (cache.constraints(other, chosen) or {}).get(target.key)
+        if spec is not None and not spec.contains(candidate, prereleases=True):
+            return False
+    return True
+
+
+def plan_updates(dependencies: list[str], cache: MetadataCache | None = None) -> list[PlannedUpdate] | None:
+    """
+    Computes a mutually compatible set of upgrade targets for a list of dependencies.
+
+    Every declared dependency with a ``==``, ``~=`` or ``>=`` lower bound is a candidate
+    for upgrading; the planner picks the newest versions whose ``requires_dist`` do
+    not conflict with each other, keeping the declared version where an upgrade
+    would break another dependency.
+
+    Args:
+        dependencies: A list of dependency strings.
+        cache: Optional metadata cache to reuse across plans.
+
+    Returns:
+        A list of PlannedUpdate models (empty if everything is current), or None if
+        no consistent set of versions could be found.
+    """
+    cache = cache or MetadataCache()
+    cache.forget_unavailable()
+    targets = {}
+    for dep_string in dependencies:
+        target = _parse_target(dep_string)
+        if target is None:
+            log.info("Skipping dependency without an upgradeable lower bound", dependency=dep_string)
+            continue
+        targets.setdefault(target.key, target)
+
+    with stage("plan.metadata"):
+        cache.prefetch_projects(t.name for t in targets.values())
+        resolvable = []
+        for target in targets.values():
+            project = cache.project(target.name)
+            if not project:
+                log.warning("Could not fetch project metadata, leaving dependency as is", package=target.name)
+                continue
+            _build_candidates(target, project)
+            resolvable.append(target)
+
+        # Metadata for each package's newest candidate usually arrived with the
+        # project JSON; fetch whatever is still missing in a single parallel round.
+        cache.prefetch_constraints((t.name, t.candidates[0]) for t in resolvable)
+
+    with stage("plan.resolve"):
+        assignment = _resolve(resolvable, cache)
+    if assignment is None:
+        log.error("Could not find a compatible set of dependency versions")
+        return None
+
+    plan = []
+    for target in resolvable:
+        chosen = assignment[target.key]
+        if chosen == target.base:
+            continue
+        plan.append(PlannedUpdate(
+            package=target.name,
+            specifier=target.specifier,
+            new_specifier=_bump_specifier(target, chosen),
+            target_version=str(chosen),
+            latest_version=str(target.latest) if target.latest else None,
+        ))
+    log.info("Update plan computed", targets=len(resolvable), updates=len(plan))
+    return plan
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import socket
+import sys
+from typing import Callable
+
+from .config import get_config
+
+# This module is the fast path of every CLI call: it only imports the standard
+# library and python-dotenv (through config, so .env is applied exactly as in a
+# local run). Forwarding a command to a running daemon costs an interpreter
+# start and a socket round trip rather than importing PyGithub, packaging and
+# structlog.
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".dependency-doctor", "daemon.sock")
+
+# The commands a running daemon answers; everything else always runs locally.
+FORWARDED_COMMANDS = frozenset({"deps", "check-updates", "security-scan"})
+
+# Options whose value is a path, resolved against the caller's working
+# directory before forwarding since the daemon has its own.
+PATH_OPTIONS = ("--output",)
+
+CONNECT_TIMEOUT = 0.5
+
+# Settings that change what a forwarded command does. A command is only run by
+# the daemon if the caller's values (environment plus .env) match the daemon's;
+# otherwise it runs locally, so e.g. a CI step's own GITHUB_TOKEN is never
+# swapped for the daemon's.
+FORWARDED_CONFIG_KEYS = (
+    "GITHUB_TOKEN",
+    "GITHUB_TIMEOUT",
+    "GITHUB_RETRIES",
+    "PIPELINE_WORKERS",
+    "SCAN_HISTORY_DB",
+    "UPSTREAM_TIMEOUT",
+    "UPSTREAM_RETRIES",
+    "UPSTREAM_HEDGE_AFTER",
+    "UPSTREAM_CACHE_TTL",
+)
+
+# Config values that are paths, compared after resolving against each side's
+# working directory.
+PATH_CONFIG_KEYS = ("SCAN_HISTORY_DB",)
+
+
+def get_socket_path() -> str:
+    """Returns the daemon's Unix socket path (DOCTOR_DAEMON_SOCKET, or ~/.dependency-doctor/daemon.sock)."""
+    return get_config("DOCTOR_DAEMON_SOCKET", DEFAULT_SOCKET_PATH)
+
+
+def config_fingerprint() -> dict[str, str | None]:
+    """
+    Returns a digest of each FORWARDED_CONFIG_KEYS value in this process, so the
+    caller's and the daemon's settings can be compared without sending secrets.
+    """
+    fingerprint = {}
+    for key in FORWARDED_CONFIG_KEYS:
+        value = get_config(key)
+        if value is not None and key in PATH_CONFIG_KEYS:
+            value = os.path.abspath(os.path.expanduser(value))
+        fingerprint[key] = hashlib.sha256(value.encode()).hexdigest() if value is not None else None
+    return fingerprint
+
+
+def forwarding_enabled() -> bool:
+    return hasattr(socket, "AF_UNIX") and get_config("DOCTOR_NO_DAEMON", "").lower() not in ("1", "true", "yes")
+
+
+def request(message: dict, socket_path: str | None = None, timeout: float | None = None) -> dict | None:
+    """
+    Sends one message to the daemon and waits for its reply.
+
+    Args:
+        message: The JSON-serializable request.
+        socket_path: The daemon's socket; defaults to ``get_socket_path()``.
+        timeout: How long to wait for the reply, or None to wait as long as the command runs.
+
+    Returns:
+        The decoded reply, or None if no daemon is listening on the socket.
+
+    Raises:
+        ConnectionError: If the daemon accepted the request but hung up without replying.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path or get_socket_path())
+    except OSError:
+        sock.close()
+        return None
+    with sock:
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("The doctor daemon closed the connection without replying")
+    return json.loads(line)
+
+
+def absolutize_paths(argv: list[str], cwd: str) -> list[str]:
+    """Rewrites the values of PATH_OPTIONS in ``argv`` to absolute paths."""
+    result = []
+    expect_path = False
+    for arg in argv:
+        if expect_path:
+            arg = os.path.join(cwd, arg)
+            expect_path = False
+        elif arg in PATH_OPTIONS:
+            expect_path = True
+        elif arg.startswith(tuple(f"{option}=" for option in PATH_OPTIONS)):
+            option, _, value = arg.partition("=")
+            arg = f"{option}={os.path.join(cwd, value)}"
+        result.append(arg)
+    return result
+
+
+def forward(argv: list[str], socket_path: str | None = None) -> int | None:
+    """
+    Runs a CLI command in the daemon if one is listening.
+
+    The command's stdout and stderr are replayed on this process's streams.
+
+    Args:
+        argv: The CLI arguments, e.g. ``["deps", "--url", "https://github.com/org/repo"]``.
+        socket_path: The daemon's socket; defaults to ``get_socket_path()``.
+
+    Returns:
+        The command's exit code, or None if the command must run locally (not a
+        forwarded command, forwarding disabled, no daemon running, or the daemon
+        runs with different settings than this process).
+    """
+    if not argv or argv[0] not in FORWARDED_COMMANDS or not forwarding_enabled():
+        return None
+    message = {"op": "run", "argv": absolutize_paths(argv, os.getcwd()), "config": config_fingerprint()}
+    reply = request(message, socket_path)
+    if reply is None or reply.get("config_mismatch"):
+        return None
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stdout.flush()
+    sys.stderr.write(reply.get("stderr", ""))
+    sys.stderr.flush()
+    return reply.get("exit_code", 1)
+
+
+def main(argv: list[str] | None = None, fallback: Callable | None = None) -> None:
+    """
+    The ``doctor`` entry point: forwards to the daemon when possible, otherwise runs the CLI.
+
+    Args:
+        argv: The CLI arguments; defaults to ``sys.argv[1:]``.
+        fallback: The Click group to run locally; imported lazily so forwarded
+            calls never pay for it.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        exit_code = forward(argv)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"Error: lost connection to the doctor daemon: {e}\n")
+        sys.exit(1)
+    if exit_code is not None:
+        sys.exit(exit_code)
+    if fallback is None:
+        from ..controllers.cli_controller import cli as fallback
+    fallback.main(args=argv, prog_name="doctor")
@@ -0,0 +1,226 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+from . import profiling
+from .logging import get_logger
+
+log = get_logger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    Attributes:
+        name: The stage name, used in stats and logs.
+        func: Called with the previous stage's output for each item.
+        workers: The number of threads running this stage.
+        queue_size: The capacity of the stage's input queue. When it is full,
+            the upstream stage blocks, which is what applies backpressure.
+    """
+
+    __slots__ = ("name", "func", "workers", "queue_size")
+
+    def __init__(self, name: str, func: Callable, workers: int = 1, queue_size: int | None = None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size or 2 * self.workers
+
+
+class PipelineItem:
+    """
+    An item flowing through the pipeline.
+
+    Attributes:
+        index: The position of the item in the input.
+        source: The original input item.
+        value: The output of the last stage that ran.
+        error: The exception raised by a stage, if any. Later stages are skipped.
+        failed_stage: The name of the stage that raised ``error``.
+    """
+
+    __slots__ = ("index", "source", "value", "error", "failed_stage")
+
+    def __init__(self, index: int, source):
+        self.index = index
+        self.source = source
+        self.value = source
+        self.error = None
+        self.failed_stage = None
+
+
+class StageStats:
+    """Counters collected for one stage while the pipeline runs."""
+
+    __slots__ = (
+        "name", "workers", "capacity", "processed", "errors",
+        "busy_seconds", "blocked_seconds", "max_depth", "_depth_total", "_depth_samples", "_lock",
+    )
+
+    def __init__(self, stage: Stage):
+        self.name = stage.name
+        self.workers = stage.workers
+        self.capacity = stage.queue_size
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+
+    def sample_depth(self, depth: int) -> None:
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_total += depth
+            self._depth_samples += 1
+
+    def record(self, busy: float, failed: bool) -> None:
+        with self._lock:
+            self.processed += 1
+            self.errors += failed
+            self.busy_seconds += busy
+
+    def record_blocked(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked_seconds += seconds
+
+    def to_dict(self, elapsed: float) -> dict:
+        """
+        Returns the stats as a dict.
+
+        ``utilization`` is the fraction of the stage's worker time spent working;
+        the stage closest to 1.0 is the bottleneck. ``blocked_seconds`` is time the
+        stage's workers waited on a full downstream queue.
+        """
+        worker_time = elapsed * self.workers
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_depth": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0,
+            "max_depth": self.max_depth,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "utilization": round(self.busy_seconds / worker_time, 3) if worker_time else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Runs items through a chain of stages connected by bounded queues.
+
+    Each stage has its own worker threads, so different items are in different
+    stages at the same time: the next repo is being fetched from GitHub while
+    the current one is resolving against PyPI. Throughput is therefore limited
+    by the slowest stage rather than by the sum of all stages. Bounded queues
+    keep a fast stage from running arbitrarily far ahead of a slow one.
+
+    A stage that raises marks the item as failed; the item skips the remaining
+    stages and is still yielded, so one bad repo doesn't stop the run.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self._stats = [StageStats(stage) for stage in stages]
+        self.elapsed = 0.0
+
+    def run(self, items: Iterable) -> Iterator[PipelineItem]:
+        """
+        Feeds items through every stage and yields them as they complete.
+
+        Args:
+            items: The inputs for the first stage.
+
+        Returns:
+            An iterator of PipelineItem in completion order (use ``index`` to restore
+            input order).
+        """
+        self._stats = [StageStats(stage) for stage in self.stages]
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        queues.append(queue.Queue())
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        started = time.perf_counter()
+
+        def feed():
+            try:
+                for index, source in enumerate(items):
+                    self._put(queues[0], PipelineItem(index, source), None, self._stats[0])
+            except Exception as e:
+                log.error("Pipeline input failed", error=str(e))
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_DONE)
+
+        def work(position: int):
+            stage = self.stages[position]
+            stats = self._stats[position]
+            downstream_stats = self._stats[position + 1] if position + 1 < len(self.stages) else None
+            inbox, outbox = queues[position], queues[position + 1]
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                if item.error is None:
+                    begin = time.perf_counter()
+                    try:
+                        item.value = stage.func(item.value)
+                    except Exception as e:
+                        item.error = e
+                        item.failed_stage = stage.name
+                        log.error("Pipeline stage failed", stage=stage.name, item=str(item.source), error=str(e))
+                    stats.record(time.perf_counter() - begin, item.error is not None)
+                self._put(outbox, item, stats, downstream_stats)
+            with remaining_lock:
+                remaining[position] -= 1
+                last = remaining[position] == 0
+            if last:
+                downstream = self.stages[position + 1].workers if position + 1 < len(self.stages) else 1
+                for _ in range(downstream):
+                    outbox.put(_DONE)
+
+        threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+        for position, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=work, args=(position,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self.elapsed = time.perf_counter() - started
+            log.info("Pipeline finished", elapsed=round(self.elapsed, 3), stages=[s.name for s in self.stages])
+            if profiling.active():
+                for stats in self.stats():
+                    profiling.record_stage(stats.pop("stage"), stats.pop("busy_seconds"), kind="pipeline", **stats)
+
+    def stats(self) -> list[dict]:
+        """Returns per-stage counters and input queue depth statistics for the last run."""
+        return [stats.to_dict(self.elapsed) for stats in self._stats]
+
+    @staticmethod
+    def _put(target: queue.Queue, item: PipelineItem, sender: StageStats | None, receiver: StageStats | None) -> None:
+        begin = time.perf_counter()
+        target.put(item)
+        if sender is not None:
+            sender.record_blocked(time.perf_counter() - begin)
+        if receiver is not None:
+            receiver.sample_depth(target.qsize())
@@ -0,0 +1,259 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from .config import get_config
+from .logging import get_logger
+
+log = get_logger(__name__)
+
+MODES = ("deterministic", "sampling")
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+_session = None
+_session_lock = threading.Lock()
+# thread ident -> name of the stage() block the thread is in, while profiling.
+_thread_stages = {}
+_NULL = nullcontext()
+
+
+def active() -> bool:
+    """Returns whether a profile session is running in this process."""
+    return _session is not None
+
+
+def stage(name: str):
+    """
+    Times a block as a named stage of the active profile session.
+
+    Samples taken inside the block are tagged with the stage name. When no
+    session is running this returns a shared no-op context manager, so
+    instrumented code costs nothing with profiling off.
+    """
+    if _session is None:
+        return _NULL
+    return _session.stage(name)
+
+
+def record_stage(name: str, seconds: float, **details) -> None:
+    """Adds a stage timing measured elsewhere (e.g. pipeline stats) to the active session."""
+    session = _session
+    if session is not None:
+        session.record_stage(name, seconds, **details)
+
+
+def _thread_root(name: str) -> str:
+    # Fold numbered workers ("pipeline-resolve-3", "upstream_0") together.
+    return re.sub(r"[-_]\d+\b", "", name)
+
+
+def _frame_label(key: tuple[str, int, str]) -> str:
+    filename, line, func = key
+    parts = filename.replace("\\", "/").split("/")
+    return f"{func} ({'/'.join(parts[-2:])}:{line})"
+
+
+class StackSampler:
+    """
+    Samples the call stacks of every thread at a fixed interval.
+
+    This is a wall-clock profile: threads blocked on I/O or a queue are
+    sampled too, which is what shows where a scan is waiting.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self.count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        # Sample once before the first wait, so even a very short session
+        # produces a profile.
+        own = threading.get_ident()
+        while True:
+            self._sample(own)
+            if self._stop.wait(self.interval):
+                break
+
+    def _sample(self, own: int) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            stack.reverse()
+            root = _thread_root(names.get(ident, "thread"))
+            stage_name = _thread_stages.get(ident)
+            tags = (root, f"[{stage_name}]") if stage_name else (root,)
+            self.samples[(tags, tuple(stack))] += 1
+        self.count += 1
+
+    def write_collapsed(self, path: str) -> None:
+        """Writes ``root;frame;frame count`` lines, the input format of flamegraph.pl and speedscope."""
+        with open(path, "w", encoding="utf-8") as f:
+            for (tags, stack), count in sorted(self.samples.items(), key=lambda item: -item[1]):
+                f.write(";".join([*tags, *map(_frame_label, stack)]) + f" {count}\n")
+
+    def create_stats(self) -> None:
+        """
+        Builds cProfile-style stats from the samples, so ``pstats.Stats(sampler)``
+        works: self time goes to the innermost frame, cumulative time to every
+        function on the stack.
+        """
+        stats = {}
+        for (_, stack), count in self.samples.items():
+            seconds = count * self.interval
+            for key in set(stack):
+                cc, nc, tt, ct, callers = stats.get(key, (0, 0, 0.0, 0.0, {}))
+                stats[key] = (cc + count, nc + count, tt, ct + seconds, callers)
+            if stack:
+                cc, nc, tt, ct, callers = stats[stack[-1]]
+                stats[stack[-1]] = (cc, nc, tt + seconds, ct, callers)
+            for caller, callee in zip(stack, stack[1:]):
+                callers = stats[callee][4]
+                c_cc, c_nc, c_tt, c_ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (c_cc + count, c_nc + count, c_tt, c_ct + seconds)
+        self.stats = stats
+
+
+class ProfileSession:
+    """
+    Profiles everything the process does between ``start`` and ``stop``.
+
+    Both modes sample every thread's stack to produce collapsed stacks for a
+    flamegraph. ``deterministic`` additionally runs cProfile (which sees every
+    thread on Python 3.12+) and writes its exact call counts and timings as
+    pstats; ``sampling`` derives the pstats from the samples instead, which
+    keeps overhead low enough for long scans. Stage timings (pipeline stages,
+    ``stage()`` blocks) are written to a JSON sidecar, and samples taken inside
+    a stage are tagged with it.
+
+    Only one session can run per process at a time.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        output_dir: str | None = None,
+        mode: str = "deterministic",
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode!r} (expected one of {', '.join(MODES)})")
+        self.label = re.sub(r"[^A-Za-z0-9_.-]+", "-", label).strip("-") or "profile"
+        self.output_dir = output_dir or get_config("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+        self.mode = mode
+        self.stages = []
+        self.sampler = StackSampler(interval)
+        self.paths = None
+        self._profiler = cProfile.Profile() if mode == "deterministic" else None
+        self._started = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Raises:
+            RuntimeError: If another session is already running.
+        """
+        global _session
+        with _session_lock:
+            if _session is not None:
+                raise RuntimeError("A profile session is already running")
+            _session = self
+        self._started = time.perf_counter()
+        self.sampler.start()
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                self.sampler.stop()
+                with _session_lock:
+                    _session = None
+                raise RuntimeError("Another profiler is already active in this process")
+
+    def stop(self) -> dict[str, str]:
+        """
+        Stops profiling and writes the output files.
+
+        Returns:
+            A mapping of output kind ("pstats", "collapsed", "stages") -> file path.
+        """
+        global _session
+        if self._profiler is not None:
+            self._profiler.disable()
+        self.sampler.stop()
+        elapsed = time.perf_counter() - self._started
+        with _session_lock:
+            _session = None
+        _thread_stages.clear()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.label}-{datetime.now():%Y%m%d-%H%M%S-%f}")
+        paths = {"pstats": f"{prefix}.pstats", "collapsed": f"{prefix}.collapsed", "stages": f"{prefix}.json"}
+        pstats.Stats(self._profiler or self.sampler).dump_stats(paths["pstats"])
+        self.sampler.write_collapsed(paths["collapsed"])
+        with open(paths["stages"], "w", encoding="utf-8") as f:
+            json.dump({
+                "label": self.label,
+                "mode": self.mode,
+                "elapsed_seconds": round(elapsed, 6),
+                "sample_interval": self.sampler.interval,
+                "samples": self.sampler.count,
+                "stages": self.stages,
+            }, f, indent=2)
+        log.info("Profile written", label=self.label, mode=self.mode, elapsed=round(elapsed, 3), **paths)
+        return paths
+
+    @contextmanager
+    def stage(self, name: str):
+        ident = threading.get_ident()
+        outer = _thread_stages.get(ident)
+        _thread_stages[ident] = name
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - begin)
+            if outer is None:
+                _thread_stages.pop(ident, None)
+            else:
+                _thread_stages[ident] = outer
+
+    def record_stage(self, name: str, seconds: float, **details) -> None:
+        with self._lock:
+            self.stages.append({"stage": name, "seconds": round(seconds, 6), **details})
+
+
+@contextmanager
+def profile(label: str, output_dir: str | None = None, mode: str = "deterministic"):
+    """Runs the enclosed block under a ProfileSession; yields the session."""
+    session = ProfileSession(label, output_dir=output_dir, mode=mode)
+    session.start()
+    try:
+        yield session
+    finally:
+        session.paths = session.stop()
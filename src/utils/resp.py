@@ -0,0 +1,544 @@
+import socket
+import socketserver
+import threading
+from urllib.parse import urlsplit
+
+from .logging import get_logger
+
+log = get_logger(__name__)
+
+# A minimal implementation of the Redis protocol (RESP2): a client covering the
+# commands the job queue uses, with the same method names as redis-py, and an
+# in-memory server that stands in for Redis on a single host or in tests.
+
+
+class RespError(Exception):
+    """An error reply from the server."""
+
+
+class WatchError(RespError):
+    """A transaction was aborted because a WATCHed key changed."""
+
+
+class _Simple(str):
+    """A RESP simple string reply such as OK or PONG."""
+
+
+def encode_command(args) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def encode_reply(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, _Simple):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, (list, tuple)):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+    data = str(value).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+def read_reply(f):
+    """Reads one RESP value from a binary file object."""
+    line = f.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return _Simple(body.decode())
+    if kind == b"-":
+        return RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = f.read(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [read_reply(f) for _ in range(length)]
+    raise ConnectionError(f"Unexpected reply from server: {line!r}")
+
+
+class _Commands:
+    """redis-py's methods for the commands the job queue uses, over ``execute_command``."""
+
+    def ping(self) -> bool:
+        return self.execute_command("PING") == "PONG"
+
+    def incr(self, name: str) -> int:
+        return self.execute_command("INCR", name)
+
+    def delete(self, *names: str) -> int:
+        return self.execute_command("DEL", *names)
+
+    def hset(self, name: str, key: str | None = None, value=None, mapping: dict | None = None) -> int:
+        items = dict(mapping or {})
+        if key is not None:
+            items[key] = value
+        args = [item for pair in items.items() for item in pair]
+        return self.execute_command("HSET", name, *args)
+
+    def hget(self, name: str, key: str) -> str | None:
+        return self.execute_command("HGET", name, key)
+
+    def hgetall(self, name: str) -> dict:
+        flat = self.execute_command("HGETALL", name)
+        if not isinstance(flat, list):
+            return flat  # Queued in a transaction; the reply comes from execute().
+        return dict(zip(flat[::2], flat[1::2]))
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        return self.execute_command("HINCRBY", name, key, amount)
+
+    def lpush(self, name: str, *values) -> int:
+        return self.execute_command("LPUSH", name, *values)
+
+    def rpush(self, name: str, *values) -> int:
+        return self.execute_command("RPUSH", name, *values)
+
+    def lmove(self, first_list: str, second_list: str, src: str = "LEFT", dest: str = "RIGHT") -> str | None:
+        return self.execute_command("LMOVE", first_list, second_list, src, dest)
+
+    def lrem(self, name: str, count: int, value) -> int:
+        return self.execute_command("LREM", name, count, value)
+
+    def lrange(self, name: str, start: int, end: int) -> list[str]:
+        return self.execute_command("LRANGE", name, start, end)
+
+    def llen(self, name: str) -> int:
+        return self.execute_command("LLEN", name)
+
+
+class RespClient(_Commands):
+    """
+    A small, thread-safe Redis client speaking RESP over TCP.
+
+    Used when redis-py is not installed. It implements only the commands the
+    job queue needs, with redis-py's method names and ``decode_responses=True``
+    semantics, so either client can be passed to RedisJobQueue.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        # Reentrant: a transaction holds it while its commands go through execute_command.
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RespClient":
+        parts = urlsplit(url)
+        db = int(parts.path.strip("/") or 0)
+        return cls(parts.hostname or "127.0.0.1", parts.port or 6379, db=db, **kwargs)
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+        if self.db:
+            self._send(("SELECT", self.db))
+
+    def _send(self, args):
+        self._sock.sendall(encode_command(args))
+        reply = read_reply(self._file)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def execute_command(self, *args):
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                return self._send(args)
+            except OSError:
+                # Don't resend: the command may already have run (e.g. LMOVE).
+                # The next call reconnects.
+                self.close()
+                raise
+
+    def execute_many(self, commands) -> list:
+        """Sends several commands in one round trip and returns their raw replies, errors included."""
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                self._sock.sendall(b"".join(encode_command(args) for args in commands))
+                return [read_reply(self._file) for _ in commands]
+            except OSError:
+                self.close()
+                raise
+
+    def transaction(self, func, *watches, value_from_callable: bool = False):
+        """
+        Runs ``func(pipe)`` as an optimistic transaction, as redis-py's does.
+
+        The ``watches`` keys are WATCHed first; ``func`` reads through ``pipe``,
+        calls ``pipe.multi()`` and then queues the writes, which run atomically
+        on ``execute``. If a watched key changed in the meantime, the whole
+        thing is retried, so ``func`` must be safe to call more than once.
+
+        Returns:
+            ``func``'s return value if ``value_from_callable``, else the replies
+            of the queued commands.
+        """
+        with self._lock:
+            while True:
+                pipe = Pipeline(self)
+                try:
+                    if watches:
+                        pipe.watch(*watches)
+                    value = func(pipe)
+                    replies = pipe.execute()
+                except WatchError:
+                    continue
+                finally:
+                    pipe.reset()
+                return value if value_from_callable else replies
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+
+class Pipeline(_Commands):
+    """
+    A transaction in progress, as handed to the ``RespClient.transaction`` callback.
+
+    After ``watch`` commands run immediately, so their replies can decide what
+    to write; after ``multi`` they are queued and sent as MULTI/EXEC by ``execute``.
+    """
+
+    def __init__(self, client: RespClient):
+        self._client = client
+        self._watching = False
+        self._queued = None
+
+    def execute_command(self, *args):
+        if self._queued is None:
+            return self._client.execute_command(*args)
+        self._queued.append(args)
+        return self
+
+    def watch(self, *names: str) -> None:
+        self._client.execute_command("WATCH", *names)
+        self._watching = True
+
+    def multi(self) -> None:
+        self._queued = []
+
+    def execute(self) -> list:
+        """Runs the queued commands atomically and returns their replies."""
+        queued, self._queued = self._queued or [], None
+        # EXEC unwatches, whether or not the transaction ran.
+        self._watching = False
+        replies = self._client.execute_many([("MULTI",), *queued, ("EXEC",)])
+        result = replies[-1]
+        if result is None:
+            raise WatchError("Watched key changed, transaction aborted")
+        if isinstance(result, RespError):
+            raise result
+        for reply in result:
+            if isinstance(reply, RespError):
+                raise reply
+        return result
+
+    def reset(self) -> None:
+        if self._watching and self._client._sock is not None:
+            self._client.execute_command("UNWATCH")
+        self._watching = False
+        self._queued = None
+
+
+class LocalRedisServer:
+    """
+    An in-memory server for the subset of Redis commands the job queue sends,
+    through RespClient or redis-py (over RESP2).
+
+    It lets several worker processes share a Redis-style job queue on one host
+    without installing Redis. Every command runs under one lock, so each is
+    atomic as in Redis, and so is a MULTI/EXEC block; WATCH works off a version
+    number bumped on every write to a key. Data lives in memory and is lost
+    when the server stops.
+    """
+
+    # The positions of the keys each writing command modifies, so WATCH sees them change.
+    WRITES = {
+        "del": slice(1, None),
+        "incr": slice(1, 2),
+        "incrby": slice(1, 2),
+        "hset": slice(1, 2),
+        "hincrby": slice(1, 2),
+        "lpush": slice(1, 2),
+        "rpush": slice(1, 2),
+        "lrem": slice(1, 2),
+        "lmove": slice(1, 3),
+    }
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379):
+        self._data = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                session = _Session()
+                while True:
+                    try:
+                        args = read_reply(self.rfile)
+                    except (ConnectionError, ValueError):
+                        return
+                    if not isinstance(args, list) or not args:
+                        self.wfile.write(encode_reply(RespError("ERR protocol error")))
+                        return
+                    if str(args[0]).upper() == "QUIT":
+                        self.wfile.write(encode_reply(_Simple("OK")))
+                        return
+                    self.wfile.write(encode_reply(server.execute(args, session)))
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler, bind_and_activate=False)
+        self._server.allow_reuse_address = True
+        self._server.daemon_threads = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self.address = self._server.server_address
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.address[0]}:{self.address[1]}/0"
+
+    def serve_forever(self) -> None:
+        log.info("Local Redis stand-in listening", url=self.url)
+        self._server.serve_forever(poll_interval=0.2)
+
+    def start(self) -> "LocalRedisServer":
+        """Serves in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="local-redis", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def execute(self, args: list[str], session: "_Session | None" = None):
+        name = args[0].lower()
+        if session is not None:
+            if name in ("watch", "unwatch", "multi", "exec", "discard"):
+                return getattr(self, f"_txn_{name}")(session, *args[1:])
+            if session.queued is not None:
+                if getattr(self, f"_cmd_{name}", None) is None:
+                    session.aborted = True
+                    return RespError(f"ERR unknown command '{args[0]}'")
+                session.queued.append(args)
+                return _Simple("QUEUED")
+        if getattr(self, f"_cmd_{name}", None) is None:
+            return RespError(f"ERR unknown command '{args[0]}'")
+        with self._lock:
+            return self._run(args)
+
+    def _run(self, args: list[str]):
+        handler = getattr(self, f"_cmd_{args[0].lower()}")
+        try:
+            reply = handler(*args[1:])
+        except TypeError:
+            return RespError(f"ERR wrong number of arguments for '{args[0]}' command")
+        except (ValueError, KeyError) as e:
+            return RespError(f"ERR {e}")
+        written = self.WRITES.get(args[0].lower())
+        if written is not None:
+            self._touch(*args[written])
+        return reply
+
+    def _touch(self, *names) -> None:
+        for name in names:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def _txn_watch(self, session, *names):
+        if not names:
+            return RespError("ERR wrong number of arguments for 'watch' command")
+        if session.queued is not None:
+            return RespError("ERR WATCH inside MULTI is not allowed")
+        with self._lock:
+            for name in names:
+                session.watched.setdefault(name, self._versions.get(name, 0))
+        return _Simple("OK")
+
+    def _txn_unwatch(self, session):
+        session.watched.clear()
+        return _Simple("OK")
+
+    def _txn_multi(self, session):
+        if session.queued is not None:
+            return RespError("ERR MULTI calls can not be nested")
+        session.queued = []
+        return _Simple("OK")
+
+    def _txn_exec(self, session):
+        if session.queued is None:
+            return RespError("ERR EXEC without MULTI")
+        queued, watched, aborted = session.queued, dict(session.watched), session.aborted
+        session.reset()
+        if aborted:
+            return RespError("EXECABORT Transaction discarded because of previous errors.")
+        with self._lock:
+            if any(self._versions.get(name, 0) != version for name, version in watched.items()):
+                return None
+            return [self._run(args) for args in queued]
+
+    def _txn_discard(self, session):
+        if session.queued is None:
+            return RespError("ERR DISCARD without MULTI")
+        session.reset()
+        return _Simple("OK")
+
+    def _typed(self, name: str, kind: type, create: bool = False):
+        value = self._data.get(name)
+        if value is None:
+            if not create:
+                return None
+            value = self._data[name] = kind()
+        elif not isinstance(value, kind):
+            raise ValueError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _cmd_ping(self):
+        return _Simple("PONG")
+
+    def _cmd_hello(self, protover="2", *options):
+        # Only RESP2 is spoken; redis-py is connected with protocol=2, and any
+        # client asking for RESP3 gets the error a RESP2-only server sends.
+        if str(protover) != "2":
+            return RespError("NOPROTO unsupported protocol version")
+        return ["server", "redis", "version", "7.0.0", "proto", 2, "mode", "standalone", "role", "master"]
+
+    def _cmd_select(self, db):
+        return _Simple("OK")
+
+    def _cmd_flushdb(self):
+        self._touch(*self._data)
+        self._data.clear()
+        return _Simple("OK")
+
+    def _cmd_del(self, *names):
+        return sum(self._data.pop(name, None) is not None for name in names)
+
+    def _cmd_incr(self, name):
+        return self._cmd_incrby(name, 1)
+
+    def _cmd_incrby(self, name, amount):
+        # redis-py's incr() sends INCRBY.
+        value = int(self._data.get(name, 0)) + int(amount)
+        self._data[name] = str(value)
+        return value
+
+    def _cmd_hset(self, name, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise TypeError
+        table = self._typed(name, dict, create=True)
+        added = 0
+        for key, value in zip(pairs[::2], pairs[1::2]):
+            added += key not in table
+            table[key] = value
+        return added
+
+    def _cmd_hget(self, name, key):
+        table = self._typed(name, dict)
+        return table.get(key) if table else None
+
+    def _cmd_hgetall(self, name):
+        table = self._typed(name, dict) or {}
+        return [item for pair in table.items() for item in pair]
+
+    def _cmd_hincrby(self, name, key, amount):
+        table = self._typed(name, dict, create=True)
+        value = int(table.get(key, 0)) + int(amount)
+        table[key] = str(value)
+        return value
+
+    def _cmd_lpush(self, name, *values):
+        items = self._typed(name, list, create=True)
+        for value in values:
+            items.insert(0, value)
+        return len(items)
+
+    def _cmd_rpush(self, name, *values):
+        items = self._typed(name, list, create=True)
+        items.extend(values)
+        return len(items)
+
+    def _cmd_lmove(self, source, destination, src, dest):
+        items = self._typed(source, list)
+        if not items:
+            return None
+        value = items.pop(0 if src.upper() == "LEFT" else -1)
+        if not items:
+            del self._data[source]
+        target = self._typed(destination, list, create=True)
+        if dest.upper() == "LEFT":
+            target.insert(0, value)
+        else:
+            target.append(value)
+        return value
+
+    def _cmd_lrem(self, name, count, value):
+        items = self._typed(name, list)
+        if not items:
+            return 0
+        count = int(count)
+        limit = abs(count) or len(items)
+        indexes = [i for i, item in enumerate(items) if item == value]
+        if count < 0:
+            indexes.reverse()
+        indexes = sorted(indexes[:limit], reverse=True)
+        for i in indexes:
+            del items[i]
+        if not items:
+            del self._data[name]
+        return len(indexes)
+
+    def _cmd_lrange(self, name, start, end):
+        items = self._typed(name, list) or []
+        # Redis ranges include the end index; -1 means "to the end".
+        return items[int(start):(int(end) + 1) or None]
+
+    def _cmd_llen(self, name):
+        return len(self._typed(name, list) or [])
+
+
+class _Session:
+    """One connection's transaction state: the WATCHed key versions and MULTI's queue."""
+
+    __slots__ = ("watched", "queued", "aborted")
+
+    def __init__(self):
+        self.watched = {}
+        self.queued = None
+        self.aborted = False
+
+    def reset(self) -> None:
+        self.watched = {}
+        self.queued = None
+        self.aborted = False
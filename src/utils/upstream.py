@@ -0,0 +1,330 @@
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import get_config
+from .logging import get_logger
+
+log = get_logger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamError(requests.RequestException):
+    """Raised when an upstream request fails after all retries."""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+def slim_pypi_document(data):
+    """
+    Reduces a PyPI project or release JSON document to the fields the planner
+    and update checker read: ``info.version``, ``info.requires_dist`` and, per
+    release, whether it has files and whether all of them are yanked. A full
+    project document (descriptions, every file of every release) can run to
+    megabytes; the slim one is a few kilobytes. Other documents pass through.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("info"), dict):
+        return data
+    slim = {"info": {key: data["info"].get(key) for key in ("version", "requires_dist")}}
+    if isinstance(data.get("releases"), dict):
+        slim["releases"] = {
+            version: [{"yanked": all(f.get("yanked") for f in files)}] if files else []
+            for version, files in data["releases"].items()
+        }
+    return slim
+
+
+class CircuitBreaker:
+    """
+    A per-host circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail fast for ``reset_timeout`` seconds. The first call after that is let
+    through as a probe (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns whether a call may be made right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """
+    A shared HTTP client for upstream services (PyPI, GitHub archives).
+
+    Every request gets a connect/read timeout and is retried with jittered
+    exponential backoff on connection errors, timeouts, 429 and 5xx responses.
+    A call never waits longer than ``total_timeout`` overall: each attempt's
+    timeouts are capped at the time left. If an attempt has not answered after
+    ``hedge_after`` seconds, a duplicate request is sent and whichever answers
+    first wins, which cuts off tail latency outliers; hedging is skipped while
+    the host's breaker has recorded failures, so it never doubles the load on a
+    struggling upstream. Each host has a circuit breaker; while it is open, calls
+    fail fast and ``get_json`` serves the last good (stale) response if it has one.
+    Cached documents are passed through ``json_filter`` first, so a long-lived
+    process keeps only the fields its callers read.
+    """
+
+    def __init__(
+        self,
+        timeout: float | tuple[float, float] = (3.05, 10.0),
+        retries: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        total_timeout: float = 30.0,
+        hedge_after: float | None = 1.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        cache_ttl: float = 300.0,
+        stale_ttl: float = 86400.0,
+        max_cache_entries: int = 10_000,
+        max_workers: int = 32,
+        session: requests.Session | None = None,
+        json_filter: Callable[[Any], Any] | None = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.total_timeout = total_timeout
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
+        self.max_cache_entries = max_cache_entries
+        self.json_filter = json_filter
+        self.session = session or self._make_session(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream")
+        self._breakers = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """Returns the circuit breaker for a host, creating it on first use."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Performs a resilient GET request.
+
+        Args:
+            url: The URL to fetch.
+            **kwargs: Extra arguments passed to ``requests.Session.get``.
+
+        Returns:
+            The successful response. 4xx responses other than 429 are returned as-is
+            (callers decide via ``raise_for_status``) and are not retried.
+
+        Raises:
+            CircuitOpenError: If the host's circuit breaker is open.
+            UpstreamError: If every attempt failed or ``total_timeout`` ran out.
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}, not calling {url}")
+
+        deadline = time.monotonic() + self.total_timeout
+        timeout = kwargs.pop("timeout", self.timeout)
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    break
+                time.sleep(delay)
+                if not breaker.allow():
+                    raise CircuitOpenError(f"Circuit open for {host}, not calling {url}")
+            try:
+                response = self._hedged_get(url, kwargs, timeout, deadline, hedge=breaker.failures == 0)
+            except requests.RequestException as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    breaker.record_success()
+                    return response
+                last_error = requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            breaker.record_failure()
+            log.warning("Upstream request failed", url=url, attempt=attempt + 1, error=str(last_error))
+        raise UpstreamError(f"Upstream request failed: {url}: {last_error}")
+
+    def get_json(self, url: str, **kwargs):
+        """
+        Fetches and decodes a JSON document, with caching.
+
+        Fresh cache entries (younger than ``cache_ttl``) are returned without a
+        request. If the upstream call fails or the circuit is open, a stale entry
+        younger than ``stale_ttl`` is served instead of raising.
+
+        Args:
+            url: The URL to fetch.
+            **kwargs: Extra arguments passed to ``requests.Session.get``.
+
+        Returns:
+            The decoded JSON body, after ``json_filter``.
+
+        Raises:
+            requests.HTTPError: For non-retryable error responses such as 404.
+            UpstreamError: If the request failed and no stale entry is available.
+        """
+        with self._lock:
+            entry = self._cache.get(url)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < self.cache_ttl:
+            return entry[1]
+        try:
+            return self.refresh_json(url, **kwargs)
+        except UpstreamError as e:
+            if entry is not None and now - entry[0] < self.stale_ttl:
+                log.warning("Serving stale upstream response", url=url, age=round(now - entry[0], 1), error=str(e))
+                return entry[1]
+            raise
+
+    def refresh_json(self, url: str, **kwargs):
+        """
+        Fetches a JSON document and replaces its cache entry, ignoring any fresh one.
+
+        Used to refresh popular entries ahead of expiry, so callers of ``get_json``
+        keep hitting the cache.
+
+        Raises:
+            requests.HTTPError: For non-retryable error responses such as 404.
+            UpstreamError: If the request failed.
+        """
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        data = response.json()
+        if self.json_filter is not None:
+            data = self.json_filter(data)
+        self._store(url, data)
+        return data
+
+    def _store(self, url: str, data) -> None:
+        # The cache is shared by pipeline, planner, prefetch and daemon threads.
+        # Re-inserting moves the entry to the end, so the first key is always the
+        # least recently refreshed one.
+        with self._lock:
+            self._cache.pop(url, None)
+            self._cache[url] = (time.monotonic(), data)
+            while len(self._cache) > self.max_cache_entries:
+                del self._cache[next(iter(self._cache))]
+
+    def cache_age(self, url: str) -> float | None:
+        """Returns how many seconds ago ``url`` was cached, or None if it is not cached."""
+        with self._lock:
+            entry = self._cache.get(url)
+        return time.monotonic() - entry[0] if entry is not None else None
+
+    @staticmethod
+    def _capped(timeout: float | tuple[float, float], remaining: float) -> float | tuple[float, float]:
+        if isinstance(timeout, tuple):
+            return tuple(min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+    def _submit(self, url: str, kwargs: dict, timeout, deadline: float):
+        remaining = deadline - time.monotonic()
+        return self._executor.submit(self.session.get, url, timeout=self._capped(timeout, remaining), **kwargs)
+
+    def _hedged_get(self, url: str, kwargs: dict, timeout, deadline: float, hedge: bool = True) -> requests.Response:
+        if deadline - time.monotonic() <= 0:
+            raise requests.Timeout(f"Total timeout of {self.total_timeout}s exceeded for {url}")
+        futures = {self._submit(url, kwargs, timeout, deadline)}
+        if hedge and self.hedge_after is not None:
+            done, _ = wait(futures, timeout=min(self.hedge_after, max(0.0, deadline - time.monotonic())))
+            if not done and deadline - time.monotonic() > 0:
+                log.info("Hedging slow upstream request", url=url, after=self.hedge_after)
+                futures.add(self._submit(url, kwargs, timeout, deadline))
+        error = None
+        while futures:
+            # The read timeout applies per socket read, so a slowly trickling
+            # response could outlast it; stop waiting at the deadline regardless.
+            done, futures = wait(futures, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise requests.Timeout(f"Total timeout of {self.total_timeout}s exceeded for {url}")
+            for future in done:
+                try:
+                    return future.result()
+                except requests.RequestException as e:
+                    error = e
+        raise error
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_upstream_client() -> UpstreamClient:
+    """
+    Returns the process-wide upstream client, configured from the environment
+    (UPSTREAM_TIMEOUT, UPSTREAM_RETRIES, UPSTREAM_HEDGE_AFTER, UPSTREAM_CACHE_TTL).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            hedge_after = get_config("UPSTREAM_HEDGE_AFTER", "1.0")
+            _client = UpstreamClient(
+                timeout=float(get_config("UPSTREAM_TIMEOUT", "10")),
+                retries=int(get_config("UPSTREAM_RETRIES", "3")),
+                hedge_after=float(hedge_after) if hedge_after else None,
+                cache_ttl=float(get_config("UPSTREAM_CACHE_TTL", "300")),
+                json_filter=slim_pypi_document,
+            )
+        return _client
@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import click
+import pytest
+
+from src.services.daemon import DoctorDaemon
+from src.utils import daemon_client
+from src.utils.daemon_client import absolutize_paths, forward, request
+
+@click.group()
+def fake_cli():
+    pass
+
+@fake_cli.command()
+@click.option("--url", required=True)
+def deps(url):
+    print(f"deps for {url} in {threading.current_thread().name}")
+    print("warning", file=sys.stderr)
+
+@fake_cli.command(name="check-updates")
+@click.option("--url", "urls", multiple=True)
+@click.option("--output", default=None)
+def check_updates(urls, output):
+    print(f"output={output}")
+
+@fake_cli.command()
+def status():
+    print("local only")
+
+@contextmanager
+def running_daemon(socket_path):
+    # Started inside the test body: pytest swaps sys.stdout between fixture
+    # setup and the test call, which would undo the daemon's stream routing.
+    server = DoctorDaemon(fake_cli, socket_path)
+    server.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        thread.join(timeout=5)
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("DOCTOR_NO_DAEMON", raising=False)
+    for key in daemon_client.FORWARDED_CONFIG_KEYS:
+        monkeypatch.delenv(key, raising=False)
+    return str(tmp_path / "d.sock")
+
+def test_forward_runs_command_in_daemon(socket_path, capsys):
+    with running_daemon(socket_path):
+        reply = request({"op": "run", "argv": ["deps", "--url", "https://github.com/org/repo"]}, socket_path)
+        assert reply["exit_code"] == 0
+        assert reply["stdout"].startswith("deps for https://github.com/org/repo in ")
+        assert "warning" in reply["stderr"]
+        assert forward(["deps", "--url", "https://github.com/org/repo"], socket_path) == 0
+        assert request({"op": "ping"}, socket_path)["requests"] == 2
+    captured = capsys.readouterr()
+    assert "deps for https://github.com/org/repo" in captured.out
+    assert "warning" in captured.err
+
+def test_forward_reports_usage_errors(socket_path, capsys):
+    with running_daemon(socket_path):
+        assert forward(["deps"], socket_path) == 2
+    assert "Missing option '--url'" in capsys.readouterr().err
+
+def test_forward_resolves_paths_against_caller(socket_path, capsys, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with running_daemon(socket_path):
+        forward(["check-updates", "--url", "u", "--output", "report.jsonl"], socket_path)
+    assert f"output={tmp_path / 'report.jsonl'}" in capsys.readouterr().out
+
+def test_local_commands_are_not_forwarded(socket_path):
+    with running_daemon(socket_path):
+        assert forward(["status"], socket_path) is None
+        assert request({"op": "run", "argv": ["status"]}, socket_path)["exit_code"] == 2
+
+def test_concurrent_requests_get_their_own_output(socket_path):
+    replies = {}
+
+    def call(n):
+        replies[n] = request({"op": "run", "argv": ["deps", "--url", f"repo-{n}"]}, socket_path)
+
+    with running_daemon(socket_path):
+        threads = [threading.Thread(target=call, args=(n,)) for n in range(32)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(replies) == 32
+    for n, reply in replies.items():
+        assert reply["stdout"].startswith(f"deps for repo-{n} ")
+        assert reply["stdout"].count("deps for") == 1
+
+def test_commands_with_different_settings_run_locally(socket_path, monkeypatch, capsys):
+    monkeypatch.setenv("GITHUB_TOKEN", "daemon-token")
+    with running_daemon(socket_path):
+        monkeypatch.setenv("GITHUB_TOKEN", "ci-token")
+        assert forward(["deps", "--url", "x"], socket_path) is None
+        reply = request({"op": "run", "argv": ["deps", "--url", "x"], "config": daemon_client.config_fingerprint()}, socket_path)
+        assert reply == {"config_mismatch": ["GITHUB_TOKEN"]}
+        assert request({"op": "ping"}, socket_path)["requests"] == 0
+
+        monkeypatch.setenv("GITHUB_TOKEN", "daemon-token")
+        assert forward(["deps", "--url", "x"], socket_path) == 0
+    assert "ci-token" not in capsys.readouterr().out
+
+def test_relative_paths_in_settings_are_compared_resolved(socket_path, monkeypatch, tmp_path):
+    monkeypatch.setenv("SCAN_HISTORY_DB", "history.db")
+    with running_daemon(socket_path):
+        monkeypatch.chdir(tmp_path)
+        assert forward(["deps", "--url", "x"], socket_path) is None
+
+def test_forward_falls_back_without_daemon(socket_path):
+    assert forward(["deps", "--url", "x"], socket_path) is None
+
+def test_forwarding_can_be_disabled(socket_path, monkeypatch):
+    with running_daemon(socket_path):
+        monkeypatch.setenv("DOCTOR_NO_DAEMON", "1")
+        assert forward(["deps", "--url", "x"], socket_path) is None
+
+def test_second_daemon_refuses_to_start(socket_path):
+    with running_daemon(socket_path):
+        with pytest.raises(RuntimeError):
+            DoctorDaemon(fake_cli, socket_path).start()
+
+def test_stale_socket_is_replaced_and_stop_cleans_up(socket_path):
+    open(socket_path, "w").close()
+    with running_daemon(socket_path):
+        assert oct(os.stat(socket_path).st_mode & 0o777) == "0o600"
+        assert request({"op": "stop"}, socket_path) == {"ok": True}
+        deadline = time.monotonic() + 5
+        while os.path.exists(socket_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert not os.path.exists(socket_path)
+
+def test_main_runs_locally_without_daemon(socket_path, monkeypatch, capsys):
+    monkeypatch.setattr(daemon_client, "get_socket_path", lambda: socket_path)
+    with pytest.raises(SystemExit) as exc:
+        daemon_client.main(["deps", "--url", "x"], fallback=fake_cli)
+    assert exc.value.code == 0
+    assert "deps for x in MainThread" in capsys.readouterr().out
+
+def test_absolutize_paths():
+    assert absolutize_paths(["check-updates", "--output", "a.csv", "--output=b.csv", "--url", "u"], "/work") == [
+        "check-updates", "--output", "/work/a.csv", "--output=/work/b.csv", "--url", "u",
+    ]
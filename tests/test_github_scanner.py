@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import patch
-from src.services.github_scanner import get_dependencies_from_github
-from github import GithubException
+from unittest.mock import MagicMock
+from src.services.github_scanner import fetch_manifest_from_github, get_dependencies_from_github
+from github import BadCredentialsException, GithubException, UnknownObjectException
+from src.utils.upstream import CircuitBreaker
 
 FLASK_PYPROJECT_TOML = '''
 [project]
@@ -28,8 +30,10 @@ class DummyFileContent:
 class MockGithubRepo:
     def __init__(self, files):
         self._files = files
+        self.refs = []
 
     def get_contents(self, path, ref=None):
+        self.refs.append(ref)
         if path in self._files:
             return DummyFileContent(self._files[path])
         raise GithubException(404, "Not Found", headers=None)
@@ -61,4 +65,59 @@ def test_get_dependencies_no_files_found(mock_github):
     mock_repo = MockGithubRepo({})
     mock_github.return_value.get_repo.return_value = mock_repo
     deps = get_dependencies_from_github("https://github.com/user/repo")
-    assert deps == [] 
\ No newline at end of file
+    assert deps == []
+
+HASHED_REQUIREMENTS_TXT = '''
+-r base.txt
+certifi==2024.7.4 \\
+    --hash=sha256:5a1e7645bc0ec61a09e26c36f6106dd4cf40c6db3a1fb6352b0244e7fb057c7b
+idna==3.7  # via requests
+'''
+
+@patch("src.services.github_scanner.Github")
+def test_get_dependencies_hashed_requirements_with_include(mock_github):
+    mock_repo = MockGithubRepo({
+        "requirements.txt": HASHED_REQUIREMENTS_TXT,
+        "base.txt": "click>=8.0.0\n",
+    })
+    mock_github.return_value.get_repo.return_value = mock_repo
+    deps = get_dependencies_from_github("https://github.com/user/repo")
+    assert deps == ["click>=8.0.0", "certifi==2024.7.4", "idna==3.7"]
+
+@patch("src.services.github_scanner.Github")
+def test_fetch_manifest_reads_at_head_commit(mock_github):
+    mock_repo = MockGithubRepo({"requirements.txt": BLACK_REQUIREMENTS_TXT})
+    mock_repo.get_branch = MagicMock(return_value=MagicMock(commit=MagicMock(sha="deadbeef")))
+    mock_github.return_value.get_repo.return_value = mock_repo
+    manifest = fetch_manifest_from_github("https://github.com/psf/black")
+    assert manifest.sha == "deadbeef"
+    mock_repo.get_branch.assert_called_once_with("main")
+    assert set(mock_repo.refs) == {"deadbeef"}
+
+@pytest.mark.parametrize("error", [
+    UnknownObjectException(404, "Not Found", headers=None),
+    BadCredentialsException(401, "Bad credentials", headers=None),
+])
+@patch("src.services.github_scanner.Github")
+def test_client_errors_do_not_trip_the_breaker(mock_github, error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    mock_github.return_value.get_repo.side_effect = error
+    with patch("src.services.github_scanner.get_upstream_client") as mock_client:
+        mock_client.return_value.breaker.return_value = breaker
+        for _ in range(3):
+            with pytest.raises(GithubException):
+                fetch_manifest_from_github("https://github.com/user/repo")
+    # The half-open probe got an answer from GitHub, so the circuit closes.
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@patch("src.services.github_scanner.Github")
+def test_server_errors_trip_the_breaker(mock_github):
+    breaker = CircuitBreaker(failure_threshold=2)
+    mock_github.return_value.get_repo.side_effect = GithubException(502, "Bad Gateway", headers=None)
+    with patch("src.services.github_scanner.get_upstream_client") as mock_client:
+        mock_client.return_value.breaker.return_value = breaker
+        for _ in range(2):
+            with pytest.raises(GithubException):
+                fetch_manifest_from_github("https://github.com/user/repo")
+    assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,203 @@
+import threading
+import time
+
+import pytest
+
+from src.services import job_queue
+from src.services.job_queue import RedisJobQueue, SQLiteJobQueue, open_job_queue
+from src.utils.resp import LocalRedisServer, RespClient, RespError
+
+@pytest.fixture(scope="module")
+def redis_server():
+    server = LocalRedisServer(port=0).start()
+    yield server
+    server.shutdown()
+
+@pytest.fixture(params=["sqlite", "redis", "redis-py"])
+def make_queue(request, tmp_path, redis_server):
+    """Returns a factory for handles on one shared queue, like separate worker processes."""
+    handles = []
+    if request.param == "sqlite":
+        url = f"sqlite:///{tmp_path / 'jobs.db'}"
+        connect = lambda: open_job_queue(url)
+    else:
+        RespClient.from_url(redis_server.url).execute_command("FLUSHDB")
+        if request.param == "redis":
+            connect = lambda: RedisJobQueue(RespClient.from_url(redis_server.url))
+        else:
+            # open_job_queue picks redis-py whenever it is installed.
+            pytest.importorskip("redis")
+            connect = lambda: open_job_queue(redis_server.url)
+
+    def make():
+        handle = connect()
+        handles.append(handle)
+        return handle
+
+    yield make
+    for handle in handles:
+        handle.close()
+
+@pytest.fixture
+def queue(make_queue):
+    return make_queue()
+
+def test_open_job_queue_picks_backend(tmp_path, redis_server):
+    with open_job_queue(f"sqlite:///{tmp_path / 'q.db'}") as queue:
+        assert isinstance(queue, SQLiteJobQueue)
+    with open_job_queue(redis_server.url) as queue:
+        assert isinstance(queue, RedisJobQueue)
+    with pytest.raises(ValueError):
+        open_job_queue("amqp://localhost")
+
+def test_tls_urls_need_redis_py(monkeypatch):
+    monkeypatch.setattr(job_queue, "redis", None)
+    with pytest.raises(ValueError, match="TLS"):
+        open_job_queue("rediss://queue.example.com:6380/0")
+
+def test_stand_in_speaks_resp2_only(redis_server):
+    client = RespClient.from_url(redis_server.url)
+    assert client.execute_command("HELLO", 2)[:2] == ["server", "redis"]
+    with pytest.raises(RespError, match="NOPROTO"):
+        client.execute_command("HELLO", 3)
+    client.delete("n")
+    assert client.execute_command("INCRBY", "n", 5) == 5
+    client.close()
+
+def test_job_queue_backends_must_implement_every_operation():
+    class Partial(job_queue.JobQueue):
+        def enqueue(self, kind, payload, max_attempts=job_queue.DEFAULT_MAX_ATTEMPTS):
+            return 1
+
+    with pytest.raises(TypeError):
+        Partial()
+
+def test_jobs_are_leased_in_order(queue):
+    first = queue.enqueue("deps", {"url": "https://github.com/org/a"})
+    second = queue.enqueue("security-scan", {"url": "https://github.com/org/b"})
+    job = queue.lease("w1", 30)
+    assert (job.id, job.kind, job.payload, job.attempts) == (first, "deps", {"url": "https://github.com/org/a"}, 1)
+    assert job.status == "leased" and job.worker == "w1" and job.lease_token
+    assert queue.lease("w2", 30).id == second
+    assert queue.lease("w3", 30) is None
+    assert queue.stats() == {"queued": 0, "leased": 2, "done": 0, "failed": 0}
+
+def test_complete_stores_result(queue):
+    job_id = queue.enqueue("deps", {"url": "u"})
+    job = queue.lease("w1", 30)
+    assert queue.complete(job, {"dependencies": ["requests==2.31.0"]})
+    stored = queue.get(job_id)
+    assert stored.status == "done"
+    assert stored.result == {"dependencies": ["requests==2.31.0"]}
+    assert queue.stats()["done"] == 1
+
+def test_failed_job_is_retried_until_max_attempts(queue):
+    job_id = queue.enqueue("deps", {"url": "u"}, max_attempts=2)
+    assert queue.fail(queue.lease("w1", 30), "boom")
+    job = queue.lease("w2", 30)
+    assert job.id == job_id and job.attempts == 2
+    assert queue.fail(job, "boom again")
+    assert queue.lease("w3", 30) is None
+    stored = queue.get(job_id)
+    assert (stored.status, stored.error) == ("failed", "boom again")
+
+def test_expired_lease_is_reclaimed_and_old_holder_fenced(queue):
+    job_id = queue.enqueue("deps", {"url": "u"})
+    dead = queue.lease("dead-worker", 0.05)
+    time.sleep(0.1)
+    assert queue.reclaim_expired() == 1
+    job = queue.lease("w2", 30)
+    assert job.id == job_id and job.attempts == 2
+    # The stalled worker wakes up: its token no longer matches.
+    assert not queue.heartbeat(dead, 30)
+    assert not queue.complete(dead, {"stale": True})
+    assert queue.complete(job, {"fresh": True})
+    assert queue.get(job_id).result == {"fresh": True}
+
+def test_heartbeat_keeps_lease(queue):
+    queue.enqueue("deps", {"url": "u"})
+    job = queue.lease("w1", 0.2)
+    for _ in range(3):
+        time.sleep(0.1)
+        assert queue.heartbeat(job, 0.2)
+    assert queue.reclaim_expired() == 0
+    assert queue.complete(job, {})
+
+def test_expired_lease_on_last_attempt_fails_job(queue):
+    job_id = queue.enqueue("deps", {"url": "u"}, max_attempts=1)
+    queue.lease("dead-worker", 0.01)
+    time.sleep(0.05)
+    assert queue.reclaim_expired() == 1
+    assert queue.get(job_id).status == "failed"
+    assert queue.lease("w2", 30) is None
+
+def test_lease_reclaims_expired_jobs(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "RECLAIM_INTERVAL", 0)
+    job_id = queue.enqueue("deps", {"url": "u"})
+    queue.lease("dead-worker", 0.01)
+    time.sleep(0.05)
+    assert queue.lease("w2", 30).id == job_id
+
+def test_concurrent_workers_never_share_a_job(make_queue):
+    producer = make_queue()
+    ids = {producer.enqueue("deps", {"url": f"repo-{i}"}) for i in range(60)}
+    leased = []
+    lock = threading.Lock()
+
+    def work():
+        handle = make_queue()
+        while (job := handle.lease(threading.current_thread().name, 30)) is not None:
+            handle.complete(job, {})
+            with lock:
+                leased.append(job.id)
+
+    threads = [threading.Thread(target=work, name=f"w{i}") for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(leased) == sorted(ids)
+    assert producer.stats() == {"queued": 0, "leased": 0, "done": 60, "failed": 0}
+
+def test_transaction_retries_when_a_watched_key_changes(redis_server):
+    client, other = RespClient.from_url(redis_server.url), RespClient.from_url(redis_server.url)
+    client.delete("counter")
+    calls = []
+
+    def increment(pipe):
+        value = int(pipe.hget("counter", "n") or 0)
+        if not calls:
+            other.hset("counter", "n", 10)  # lands between the read and the write
+        calls.append(value)
+        pipe.multi()
+        pipe.hset("counter", "n", value + 1)
+
+    assert client.transaction(increment, "counter") == [0]  # HSET: no new fields
+    assert calls == [0, 10]
+    assert client.hget("counter", "n") == "11"
+    client.close()
+    other.close()
+
+def test_lease_lost_between_check_and_write_is_fenced(redis_server):
+    RespClient.from_url(redis_server.url).execute_command("FLUSHDB")
+    with open_job_queue(redis_server.url) as stalled, open_job_queue(redis_server.url) as other:
+        job_id = stalled.enqueue("deps", {"url": "u"})
+        job = stalled.lease("stalled", 30)
+        transaction = stalled.client.transaction
+        taken_over = []
+
+        def take_over_after_check(func, *watches, **kwargs):
+            def checked_then_stall(pipe):
+                func(pipe)
+                if not taken_over:
+                    # The lease expires and another worker takes the job over
+                    # after the token was checked but before the result is written.
+                    assert other.reclaim_expired(time.time() + 60) == 1
+                    taken_over.append(other.lease("w2", 30))
+            return transaction(checked_then_stall, *watches, **kwargs)
+
+        stalled.client.transaction = take_over_after_check
+        assert not stalled.complete(job, {"stale": True})
+        assert other.complete(taken_over[0], {"fresh": True})
+        assert other.get(job_id).result == {"fresh": True}
+        assert other.stats() == {"queued": 0, "leased": 0, "done": 1, "failed": 0}
@@ -0,0 +1,128 @@
+import pytest
+from src.models.planned_update import PlannedUpdate
+from src.services.manifest_editor import (
+    apply_plan,
+    find_manifests,
+    read_manifest_dependencies,
+    rewrite_pyproject_text,
+    rewrite_requirements_text,
+    unapplied_updates,
+)
+from src.services.requirements_parser import split_requirement
+
+PLAN = [
+    PlannedUpdate(package="click", specifier=">=8.0.0", new_specifier=">=8.2.1", target_version="8.2.1"),
+    PlannedUpdate(package="Requests", specifier="==2.28.1", new_specifier="==2.32.3", target_version="2.32.3"),
+]
+
+REQUIREMENTS_TXT = """\
+# Core dependencies
+click>=8.0.0  # the CLI
+requests[socks] == 2.28.1 ; python_version >= "3.8"
+-r other.txt
+pathspec>=0.9.0
+"""
+
+PYPROJECT_TOML = """\
+[project]
+name = "demo"
+dependencies = [
+    # keep this comment
+    "click>=8.0.0",
+    'requests==2.28.1',
+    "rich>=13",
+]
+"""
+
+@pytest.mark.parametrize("text, expected", [
+    ("click>=8.0.0", ("click", ">=8.0.0")),
+    ("requests[socks] >=2.28, <3 ; python_version >= '3.8'", ("requests", ">=2.28, <3")),
+    ("rich", ("rich", "")),
+    ("-r other.txt", None),
+])
+def test_split_requirement(text, expected):
+    assert split_requirement(text) == expected
+
+def test_rewrite_requirements_preserves_formatting():
+    new_text, changed, needs_recompile = rewrite_requirements_text(REQUIREMENTS_TXT, PLAN)
+    assert changed == ["click", "requests"]
+    assert needs_recompile == []
+    assert new_text == REQUIREMENTS_TXT.replace(">=8.0.0", ">=8.2.1").replace("== 2.28.1", "==2.32.3")
+
+def test_rewrite_requirements_leaves_hashed_pins_for_recompile():
+    # A new version next to the old hashes would break pip install --require-hashes.
+    text = "click>=8.0.0 \\\n    --hash=sha256:abc\nrequests==2.28.1 --hash=sha256:def\nrich>=13\n"
+    new_text, changed, needs_recompile = rewrite_requirements_text(text, PLAN)
+    assert new_text == text
+    assert changed == []
+    assert needs_recompile == ["click", "requests"]
+
+def test_rewrite_requirements_skips_continuation_lines():
+    text = "click>=8.0.0 \\\n    --config-settings=x=y\n"
+    new_text, changed, _ = rewrite_requirements_text(text, PLAN)
+    assert new_text == "click>=8.2.1 \\\n    --config-settings=x=y\n"
+
+def test_rewrite_requirements_only_matching_specifier():
+    text = "click>=7.0\n"
+    assert rewrite_requirements_text(text, PLAN) == (text, [], [])
+
+def test_rewrite_pyproject_preserves_formatting():
+    new_text, changed = rewrite_pyproject_text(PYPROJECT_TOML, PLAN)
+    assert changed == ["click", "requests"]
+    assert new_text == PYPROJECT_TOML.replace("click>=8.0.0", "click>=8.2.1").replace(
+        "requests==2.28.1", "requests==2.32.3"
+    )
+
+def test_rewrite_pyproject_handles_markers_with_the_other_quote():
+    text = (
+        "[project]\n"
+        "dependencies = [\n"
+        "    \"click>=8.0.0; python_version < '3.11'\",\n"
+        "    'requests==2.28.1; extra == \"net\"',\n"
+        "]\n"
+    )
+    new_text, changed = rewrite_pyproject_text(text, PLAN)
+    assert changed == ["click", "requests"]
+    assert new_text == text.replace("click>=8.0.0", "click>=8.2.1").replace("requests==2.28.1", "requests==2.32.3")
+
+def test_rewrite_pyproject_only_edits_dependency_arrays():
+    text = (
+        '[build-system]\nrequires = ["click>=8.0.0"]\n'
+        '[project]\n'
+        'description = """\n[tool.flit.metadata]\n"""\n'
+        'keywords = ["click>=8.0.0"]  # requires = ["click>=8.0.0"]\n'
+        'dependencies = [["click>=8.0.0"], "click>=8.0.0"]\n'
+        '[project.optional-dependencies]\ndev = ["click>=8.0.0"]\n'
+        '[tool.flit.metadata]\nrequires = [\n  "click>=8.0.0",\n]\n'
+    )
+    new_text, changed = rewrite_pyproject_text(text, PLAN)
+    assert changed == ["click", "click"]
+    assert new_text.count("click>=8.2.1") == 2
+    assert 'dependencies = [["click>=8.0.0"], "click>=8.2.1"]' in new_text
+    assert 'requires = [\n  "click>=8.2.1",\n]' in new_text
+
+def test_unapplied_updates_lists_plan_entries_not_written(tmp_path):
+    (tmp_path / "requirements.txt").write_text("click>=8.0.0\nrequests>=2\n")
+    results = apply_plan(PLAN, [str(tmp_path / "requirements.txt")])
+    assert [update.package for update in unapplied_updates(PLAN, results)] == ["Requests"]
+
+def test_apply_plan_round_trip(tmp_path):
+    (tmp_path / "pyproject.toml").write_text(PYPROJECT_TOML)
+    (tmp_path / "requirements.txt").write_text(REQUIREMENTS_TXT)
+    (tmp_path / "requirements-dev.txt").write_text("pytest>=8\n")
+    (tmp_path / "requirements-lock.txt").write_text("click>=8.0.0 --hash=sha256:abc\n")
+    manifests = find_manifests(str(tmp_path))
+    assert [p.rsplit("/", 1)[-1] for p in manifests] == [
+        "pyproject.toml", "requirements-dev.txt", "requirements-lock.txt", "requirements.txt",
+    ]
+    assert read_manifest_dependencies(manifests[0]) == ["click>=8.0.0", "requests==2.28.1", "rich>=13"]
+    assert "-r other.txt" not in read_manifest_dependencies(manifests[3])
+
+    results = apply_plan(PLAN, manifests)
+    assert set(results) == {manifests[0], manifests[2], manifests[3]}
+    assert results[manifests[0]] == {"updated": ["click", "requests"], "needs_recompile": []}
+    assert results[manifests[2]] == {"updated": [], "needs_recompile": ["click"]}
+    assert (tmp_path / "requirements-lock.txt").read_text() == "click>=8.0.0 --hash=sha256:abc\n"
+    assert "click>=8.2.1" in (tmp_path / "pyproject.toml").read_text()
+    assert (tmp_path / "requirements-dev.txt").read_text() == "pytest>=8\n"
+    assert not list(tmp_path.glob("*.doctor-tmp"))
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import pytest
+from src.models.dependency import Dependency
+from src.models.update_info import UpdateInfo
+from src.models.vulnerability import Vulnerability
+from src.models.report import ColumnarReport
+
+def test_models_are_slotted():
+    update = UpdateInfo(package="click", specifier="==8.1.3", latest_version="8.2.1")
+    assert not hasattr(update, "__dict__")
+    with pytest.raises(AttributeError):
+        update.extra = "nope"
+
+def test_package_names_are_interned():
+    name = "".join(["cli", "ck"])
+    first = UpdateInfo(package=name, specifier="==8.1.3", latest_version="8.2.1")
+    second = Dependency("".join(["c", "lick"]), ">=8.0")
+    assert first.package is second.name
+
+def test_free_text_is_not_interned():
+    # Interned strings are immortal on 3.12; descriptions and versions must stay collectable.
+    first = Vulnerability("pkg", "".join(["1.", "0"]), "PYSEC-1", description="".join(["a long ", "advisory"]))
+    second = Vulnerability("pkg", "".join(["1", ".0"]), "PYSEC-1", description="".join(["a long adv", "isory"]))
+    assert first.description is not second.description
+    assert first.version is not second.version
+
+def test_model_mapping_access():
+    vuln = Vulnerability(package="pkg", version="1.0.0", id="PYSEC-1", fix_versions=["1.0.1"])
+    assert vuln["package"] == "pkg"
+    assert vuln["fix_versions"] == ("1.0.1",)
+    assert vuln.get("missing") is None
+    with pytest.raises(KeyError):
+        vuln["missing"]
+
+def test_model_dict_round_trip():
+    update = UpdateInfo(package="click", specifier="==8.1.3", latest_version="8.2.1")
+    assert UpdateInfo.from_dict(update.to_dict()) == update
+
+@pytest.mark.parametrize("specifier, expected", [
+    ("==1.2.3", "1.2.3"),
+    (">=1.2.3", None),
+    ("==1.*", None),
+    ("==1.0,!=1.1", None),
+])
+def test_dependency_pinned_version(specifier, expected):
+    assert Dependency("pkg", specifier).pinned_version == expected
+
+def test_dependency_str():
+    dep = Dependency("requests", ">=2.28", extras=("socks",), marker='python_version >= "3.8"')
+    assert str(dep) == 'requests[socks]>=2.28; python_version >= "3.8"'
+
+@pytest.fixture
+def vuln_report():
+    return ColumnarReport.for_model(Vulnerability, [
+        Vulnerability(package="pkg", version="1.0.0", id="PYSEC-1", description="bad", fix_versions=["1.0.1", "1.1.0"]),
+        {"package": "pkg", "version": "1.0.0", "id": "PYSEC-2", "description": None, "fix_versions": []},
+    ])
+
+def test_report_rows_round_trip(vuln_report):
+    rows = list(vuln_report.rows())
+    assert len(vuln_report) == 2
+    assert rows[0] == Vulnerability(package="pkg", version="1.0.0", id="PYSEC-1", description="bad", fix_versions=["1.0.1", "1.1.0"])
+    assert rows[1]["id"] == "PYSEC-2"
+    assert list(vuln_report.column("package")) == ["pkg", "pkg"]
+
+def test_report_deduplicates_values(vuln_report):
+    # "pkg" and "1.0.0" are stored once and shared by both rows.
+    assert vuln_report._pool.count("pkg") == 1
+    assert vuln_report._pool.count("1.0.0") == 1
+
+def test_report_write_jsonl(vuln_report):
+    out = io.StringIO()
+    assert vuln_report.write_jsonl(out) == 2
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert lines[0]["fix_versions"] == ["1.0.1", "1.1.0"]
+    assert lines[1]["description"] is None
+
+def test_report_write_csv(vuln_report):
+    out = io.StringIO()
+    assert vuln_report.write_csv(out) == 2
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == ["package", "version", "id", "description", "fix_versions"]
+    assert rows[1] == ["pkg", "1.0.0", "PYSEC-1", "bad", "1.0.1, 1.1.0"]
+    assert rows[2][3] == ""
+
+def test_report_export_by_extension(vuln_report, tmp_path):
+    path = tmp_path / "report.csv"
+    assert vuln_report.export(str(path)) == 2
+    assert path.read_text().startswith("package,version")
+    with pytest.raises(ValueError):
+        vuln_report.export(str(tmp_path / "report.xml"))
+
+def test_report_write_parquet(vuln_report, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "report.parquet"
+    assert vuln_report.export(str(path)) == 2
+    table = pq.read_table(str(path))
+    assert table.column("fix_versions").to_pylist() == [["1.0.1", "1.1.0"], []]
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+from src.utils.pipeline import Pipeline, Stage
+
+def test_pipeline_runs_every_stage():
+    pipeline = Pipeline([
+        Stage("double", lambda x: x * 2, workers=2),
+        Stage("increment", lambda x: x + 1, workers=3),
+    ])
+    results = sorted(pipeline.run(range(20)), key=lambda item: item.index)
+    assert [item.value for item in results] == [x * 2 + 1 for x in range(20)]
+    assert [item.source for item in results] == list(range(20))
+
+def test_pipeline_overlaps_stages():
+    def slow(x):
+        time.sleep(0.05)
+        return x
+
+    pipeline = Pipeline([Stage("a", slow), Stage("b", slow), Stage("c", slow)])
+    start = time.perf_counter()
+    assert len(list(pipeline.run(range(10)))) == 10
+    elapsed = time.perf_counter() - start
+    # Sequentially this is 10 items * 3 stages * 0.05s = 1.5s; overlapped it is
+    # bounded by the slowest stage: (10 + 2) * 0.05s = 0.6s.
+    assert elapsed < 1.0
+
+def test_pipeline_applies_backpressure():
+    release = threading.Event()
+
+    def blocked(x):
+        release.wait()
+        return x
+
+    produced = []
+
+    def produce():
+        for i in range(50):
+            produced.append(i)
+            yield i
+
+    pipeline = Pipeline([Stage("fast", lambda x: x, queue_size=2), Stage("slow", blocked, queue_size=2)])
+    results = pipeline.run(produce())
+    consumer = threading.Thread(target=lambda: list(results))
+    consumer.start()
+    time.sleep(0.2)
+    # The slow stage holds one item and each bounded queue a couple more, so
+    # the producer must be stalled well before it exhausts its input.
+    assert len(produced) < 10
+    release.set()
+    consumer.join(timeout=5)
+    stats = {stage["stage"]: stage for stage in pipeline.stats()}
+    assert stats["slow"]["max_depth"] <= stats["slow"]["capacity"]
+    assert stats["fast"]["blocked_seconds"] > 0
+    assert stats["slow"]["processed"] == 50
+
+def test_pipeline_isolates_failures():
+    def explode(x):
+        if x == 3:
+            raise ValueError("boom")
+        return x
+
+    seen = []
+    pipeline = Pipeline([Stage("check", explode), Stage("record", lambda x: seen.append(x) or x)])
+    results = {item.source: item for item in pipeline.run(range(5))}
+    assert results[3].failed_stage == "check"
+    assert str(results[3].error) == "boom"
+    assert sorted(seen) == [0, 1, 2, 4]
+    stats = {stage["stage"]: stage for stage in pipeline.stats()}
+    assert stats["check"]["errors"] == 1
+    assert stats["record"]["processed"] == 4
+
+def test_pipeline_survives_failing_input():
+    def items():
+        yield 1
+        raise RuntimeError("input broke")
+
+    pipeline = Pipeline([Stage("identity", lambda x: x)])
+    assert [item.value for item in pipeline.run(items())] == [1]
+
+def test_pipeline_requires_stages():
+    with pytest.raises(ValueError):
+        Pipeline([])
@@ -0,0 +1,124 @@
+import time
+from unittest.mock import patch
+
+from src.services.prefetch_scheduler import PrefetchScheduler, UsageStats
+from src.services.update_planner import PYPI_PROJECT_URL
+
+class FakeClient:
+    """Stands in for UpstreamClient with a fixed cache age per package."""
+
+    cache_ttl = 300.0
+
+    def __init__(self, ages):
+        self.ages = {PYPI_PROJECT_URL.format(package=name): age for name, age in ages.items()}
+        self.refreshed = []
+
+    def cache_age(self, url):
+        return self.ages.get(url)
+
+    def refresh_json(self, url):
+        self.refreshed.append(url)
+        return {}
+
+def make_scheduler(tmp_path, client=None, **kwargs):
+    usage = UsageStats(path=str(tmp_path / "usage.json"))
+    return PrefetchScheduler(usage=usage, client=client or FakeClient({}), interval=60, **kwargs)
+
+@patch("src.services.prefetch_scheduler.get_dependencies_from_github")
+def test_get_dependencies_serves_snapshot_and_records_usage(mock_fetch, tmp_path):
+    mock_fetch.return_value = ["requests>=2.28", "click==8.1.3"]
+    scheduler = make_scheduler(tmp_path)
+    url = "https://github.com/org/repo"
+    assert scheduler.get_dependencies(url) == ["requests>=2.28", "click==8.1.3"]
+    assert scheduler.get_dependencies(url) == ["requests>=2.28", "click==8.1.3"]
+    assert mock_fetch.call_count == 1
+    assert scheduler.usage.top_repos(5) == [url]
+    assert set(scheduler.usage.top_packages(5)) == {"requests", "click"}
+
+@patch("src.services.prefetch_scheduler.get_dependencies_from_github")
+def test_failed_requests_are_not_recorded(mock_fetch, tmp_path):
+    mock_fetch.side_effect = ValueError("Invalid GitHub URL format")
+    scheduler = make_scheduler(tmp_path)
+    try:
+        scheduler.get_dependencies("not-a-url")
+    except ValueError:
+        pass
+    assert scheduler.usage.top_repos(5) == []
+
+def test_run_once_refreshes_entries_before_they_expire(tmp_path):
+    # ttl 300s and interval 60s: anything older than 210s expires before the next tick.
+    client = FakeClient({"fresh": 10.0, "expiring": 250.0})
+    scheduler = make_scheduler(tmp_path, client=client)
+    scheduler.usage.record_packages(["fresh", "expiring", "cold"])
+    result = scheduler.run_once()
+    assert sorted(client.refreshed) == sorted(
+        PYPI_PROJECT_URL.format(package=name) for name in ("expiring", "cold")
+    )
+    assert result["packages_refreshed"] == 2
+    assert result["failures"] == 0
+
+@patch("src.services.prefetch_scheduler.get_dependencies_from_github")
+def test_run_once_rescans_top_repos(mock_fetch, tmp_path):
+    mock_fetch.return_value = ["requests>=2.28"]
+    scheduler = make_scheduler(tmp_path, top_repos=1, repo_ttl=600)
+    scheduler.usage.record_repo("https://github.com/org/popular")
+    scheduler.usage.record_repo("https://github.com/org/popular")
+    scheduler.usage.record_repo("https://github.com/org/rare")
+    assert scheduler.run_once()["repos_refreshed"] == 1
+    mock_fetch.assert_called_once_with("https://github.com/org/popular", token=None)
+    # Freshly scanned, so the next pass leaves it alone and requests hit the snapshot.
+    assert scheduler.run_once()["repos_refreshed"] == 0
+    assert scheduler.get_dependencies("https://github.com/org/popular") == ["requests>=2.28"]
+    assert mock_fetch.call_count == 1
+
+@patch("src.services.prefetch_scheduler.get_dependencies_from_github")
+def test_run_once_counts_failures(mock_fetch, tmp_path):
+    mock_fetch.side_effect = RuntimeError("GitHub is down")
+    scheduler = make_scheduler(tmp_path)
+    scheduler.usage.record_repo("https://github.com/org/repo")
+    assert scheduler.run_once()["failures"] == 1
+
+def test_usage_stats_decay():
+    usage = UsageStats(half_life=10)
+    usage.record_packages(["old"] * 4)
+    usage.decay(now=time.time() + 20)  # two half-lives: 4 -> 1
+    usage.record_packages(["new"] * 2)
+    assert usage.top_packages(2) == ["new", "old"]
+    usage.decay(now=time.time() + 200)
+    assert usage.top_packages(2) == []
+
+def test_usage_stats_survive_restart(tmp_path):
+    path = str(tmp_path / "usage.json")
+    usage = UsageStats(path=path)
+    usage.record_repo("https://github.com/org/repo")
+    usage.record_packages(["requests", "requests", "click"])
+    usage.save()
+
+    restored = UsageStats(path=path)
+    restored.load()
+    assert restored.top_repos(5) == ["https://github.com/org/repo"]
+    assert restored.top_packages(5) == ["requests", "click"]
+
+def test_usage_stats_ignore_corrupt_file(tmp_path):
+    path = tmp_path / "usage.json"
+    path.write_text("{not json")
+    usage = UsageStats(path=str(path))
+    usage.load()
+    assert usage.top_packages(5) == []
+
+def test_start_warms_up_from_saved_usage(tmp_path):
+    saved = UsageStats(path=str(tmp_path / "usage.json"))
+    saved.record_packages(["requests"])
+    saved.save()
+
+    client = FakeClient({})
+    scheduler = make_scheduler(tmp_path, client=client)
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while scheduler.ticks == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+    assert client.refreshed == [PYPI_PROJECT_URL.format(package="requests")]
+    assert not scheduler.running
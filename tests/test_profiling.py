@@ -0,0 +1,95 @@
+import json
+import pstats
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.controllers.api_controller import PROFILE_HEADER, profile_request
+from src.utils import profiling
+from src.utils.pipeline import Pipeline, Stage
+from src.utils.profiling import ProfileSession, profile, stage
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return seconds
+
+def read_outputs(paths):
+    with open(paths["stages"]) as f:
+        stages = json.load(f)
+    with open(paths["collapsed"]) as f:
+        collapsed = f.read().splitlines()
+    return stages, collapsed, pstats.Stats(paths["pstats"])
+
+def test_stage_is_a_no_op_when_off():
+    assert not profiling.active()
+    assert stage("a") is stage("b")
+    profiling.record_stage("ignored", 1.0)
+
+@pytest.mark.parametrize("mode", ["deterministic", "sampling"])
+def test_profile_writes_pstats_collapsed_and_stage_timings(tmp_path, mode):
+    with profile("check-updates", output_dir=str(tmp_path), mode=mode) as session:
+        assert profiling.active()
+        with stage("plan.resolve"):
+            busy(0.05)
+    assert not profiling.active()
+
+    stages, collapsed, stats = read_outputs(session.paths)
+    assert stages["mode"] == mode
+    assert stages["stages"][0]["stage"] == "plan.resolve"
+    assert stages["stages"][0]["seconds"] >= 0.05
+    assert any(key[2] == "busy" for key in stats.stats)
+    # Collapsed lines are "frame;frame;... count" with stage-tagged stacks.
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed)
+    assert any(line.startswith("MainThread;[plan.resolve];") and "busy (" in line for line in collapsed)
+
+def test_pipeline_stages_are_recorded_and_tagged(tmp_path):
+    pipeline = Pipeline([Stage("fetch", lambda x: busy(0.01), workers=2), Stage("compare", lambda x: x)])
+    with profile("pipeline", output_dir=str(tmp_path), mode="sampling") as session:
+        list(pipeline.run(range(10)))
+
+    stages, collapsed, _ = read_outputs(session.paths)
+    recorded = {entry["stage"]: entry for entry in stages["stages"]}
+    assert recorded["fetch"]["kind"] == "pipeline"
+    assert recorded["fetch"]["processed"] == 10
+    assert recorded["fetch"]["seconds"] >= 0.1
+    assert any(line.startswith("pipeline-fetch;") for line in collapsed)
+
+def test_only_one_session_at_a_time(tmp_path):
+    with profile("first", output_dir=str(tmp_path), mode="sampling"):
+        with pytest.raises(RuntimeError):
+            ProfileSession("second", output_dir=str(tmp_path), mode="sampling").start()
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ProfileSession("x", mode="tracing")
+
+def make_app():
+    app = FastAPI()
+    app.middleware("http")(profile_request)
+
+    @app.get("/work")
+    def work():
+        return {"seconds": busy(0.02)}
+
+    return app
+
+def test_api_profiles_opted_in_requests(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    client = TestClient(make_app())
+
+    assert PROFILE_HEADER not in client.get("/work").headers
+    assert not list(tmp_path.iterdir())
+
+    response = client.get("/work", params={"profile": "sampling"})
+    assert response.json()["seconds"] == 0.02
+    path = response.headers[PROFILE_HEADER]
+    assert path.startswith(str(tmp_path / "api-work-"))
+    assert any(key[2] == "work" for key in pstats.Stats(path).stats)
+
+    response = client.get("/work", headers={PROFILE_HEADER: "1"})
+    with open(response.headers[PROFILE_HEADER].replace(".pstats", ".json")) as f:
+        assert json.load(f)["mode"] == "deterministic"
@@ -0,0 +1,102 @@
+import io
+import pytest
+from src.models.dependency import Dependency
+from src.services.requirements_parser import (
+    as_dependency,
+    first_specifier_version,
+    iter_logical_lines,
+    iter_requirements,
+    parse_requirement,
+    parse_requirements,
+    split_requirement,
+)
+
+PIP_COMPILE_OUTPUT = """\
+#
+# This file is autogenerated by pip-compile
+#
+--index-url https://pypi.org/simple
+
+certifi==2024.7.4 \\
+    --hash=sha256:5a1e7645bc0ec61a09e26c36f6106dd4cf40c6db3a1fb6352b0244e7fb057c7b \\
+    --hash=sha256:ddc6c8ce995e6987e7faf5e3f1b02b302836a0e5d98ece18392cb1a36c72ad90
+    # via requests
+idna==3.7 --hash=sha256:82fee1fc78add43492d3a1898bfa6d8a904cc97d8427f683ed8e798d07761aa0
+requests[socks] >= 2.28, <3 ; python_version >= "3.8"  # inline comment
+urllib3==2.2.2
+not a valid requirement!!
+-c constraints.txt
+"""
+
+def test_parse_pip_compile_output():
+    deps = parse_requirements(PIP_COMPILE_OUTPUT)
+    assert [str(dep) for dep in deps] == [
+        "certifi==2024.7.4",
+        "idna==3.7",
+        'requests[socks]>=2.28,<3; python_version >= "3.8"',
+        "urllib3==2.2.2",
+    ]
+    assert deps[2].extras == ("socks",)
+    assert deps[2].marker == 'python_version >= "3.8"'
+
+def test_logical_lines_join_continuations_and_strip_comments():
+    lines = ["pkg==1.0 \\\n", "    --hash=sha256:abc  # trailing\n", "\n", "# only a comment\n", "other>=2\n"]
+    assert list(iter_logical_lines(lines)) == [(1, "pkg==1.0 --hash=sha256:abc"), (5, "other>=2")]
+
+def test_url_fragment_is_not_a_comment():
+    dep = parse_requirement("pkg @ https://example.com/pkg.zip#sha256=abc")
+    assert dep.url == "https://example.com/pkg.zip#sha256=abc"
+
+@pytest.mark.parametrize("text, name, specifier", [
+    ("Django==4.2.1", "Django", "==4.2.1"),
+    ("zope.interface==6.0", "zope.interface", "==6.0"),
+    ("pkg==1!2.0+local", "pkg", "==1!2.0+local"),
+    ("pkg == 1.0", "pkg", "==1.0"),
+    ("pkg==1.*", "pkg", "==1.*"),
+    ("pkg>=1.0,<2", "pkg", ">=1.0,<2"),
+    ("pkg", "pkg", ""),
+    ("pkg (>=1.0)", "pkg", ">=1.0"),
+])
+def test_parse_requirement(text, name, specifier):
+    dep = parse_requirement(text)
+    assert (dep.name, dep.specifier) == (name, specifier)
+
+def test_parse_requirement_invalid():
+    assert parse_requirement("==1.0") is None
+
+def test_fast_path_skips_full_parser(monkeypatch):
+    def fail(_):
+        raise AssertionError("full parser should not be used")
+    monkeypatch.setattr("src.services.requirements_parser.Requirement", fail)
+    assert parse_requirement("click==8.1.3") == Dependency("click", "==8.1.3")
+
+def test_includes_are_followed_and_cycles_skipped():
+    files = {
+        "requirements/base.txt": ["click==8.1.3\n", "-r dev.txt\n"],
+        "requirements/dev.txt": ["-r../requirements/base.txt\n", "pytest>=8\n"],
+    }
+    deps = list(iter_requirements(["-rrequirements/base.txt\n", "rich>=13\n"], source="requirements.txt",
+                                  include=files.get))
+    assert [dep.name for dep in deps] == ["click", "pytest", "rich"]
+
+def test_includes_skipped_without_callback():
+    assert parse_requirements("-r other.txt\nclick==8.1.3\n") == [Dependency("click", "==8.1.3")]
+
+def test_streams_from_file_object():
+    lines = io.StringIO("".join(f"pkg{i}=={i}.0\n" for i in range(1000)))
+    deps = iter_requirements(lines)
+    assert next(deps) == Dependency("pkg0", "==0.0")
+    assert sum(1 for _ in deps) == 999
+
+def test_as_dependency_passes_models_through():
+    dep = Dependency("click", "==8.1.3")
+    assert as_dependency(dep) is dep
+    assert as_dependency("click==8.1.3") == dep
+
+@pytest.mark.parametrize("specifier, expected", [(">=2.28,<3", "2.28"), ("~= 1.4", "1.4"), ("", None)])
+def test_first_specifier_version(specifier, expected):
+    assert first_specifier_version(specifier) == expected
+
+def test_split_requirement():
+    assert split_requirement("requests[socks] >=2.28, <3 ; python_version >= '3.8'") == ("requests", ">=2.28, <3")
+    assert split_requirement("-r other.txt") is None
@@ -0,0 +1,66 @@
+import pytest
+from src.models.vulnerability import Vulnerability
+from src.services.scan_history import ScanHistoryStore
+
+@pytest.fixture
+def store(tmp_path):
+    with ScanHistoryStore(str(tmp_path / "history.db")) as store:
+        yield store
+
+def test_find_dependents_by_package(store):
+    store.record_scan("https://github.com/org/a", ["Django==4.2.1", "requests>=2.28"], ref="main")
+    store.record_scan("https://github.com/org/b", ["django==3.2.0"], ref="main")
+    store.record_scan("https://github.com/org/c", ["flask==3.0.0"], ref="main")
+    rows = store.find_dependents("django")
+    assert {row["repo"] for row in rows} == {"https://github.com/org/a", "https://github.com/org/b"}
+
+def test_find_dependents_below_version(store):
+    store.record_scan("repo-old", ["django==3.2.0"])
+    store.record_scan("repo-new", ["django==4.2.1"])
+    rows = store.find_dependents("Django", below="4.0")
+    assert [row["repo"] for row in rows] == ["repo-old"]
+    assert rows[0]["resolved_version"] == "3.2.0"
+
+def test_find_dependents_specifier(store):
+    store.record_scan("repo-a", ["urllib3==1.26.5"])
+    store.record_scan("repo-b", ["urllib3==2.0.3"])
+    store.record_scan("repo-c", ["urllib3==2.2.0"])
+    rows = store.find_dependents("urllib3", specifier=">=2,<2.1")
+    assert [row["repo"] for row in rows] == ["repo-b"]
+
+def test_unresolved_versions(store):
+    store.record_scan("repo-a", ["requests>=2.0"])
+    store.record_scan("repo-b", ["requests>=2.0"], resolved_versions={"requests": "2.19.0"})
+    assert [row["repo"] for row in store.find_dependents("requests", below="2.20")] == ["repo-b"]
+    rows = store.find_dependents("requests", below="2.20", include_unresolved=True)
+    assert {row["repo"] for row in rows} == {"repo-a", "repo-b"}
+
+def test_latest_scan_only(store):
+    store.record_scan("repo-a", ["django==3.2.0"], scanned_at=1.0)
+    store.record_scan("repo-a", ["django==4.2.1"], scanned_at=2.0)
+    assert store.find_dependents("django", below="4.0") == []
+    assert len(store.find_dependents("django", below="4.0", latest_only=False)) == 1
+
+def test_find_affected(store):
+    findings = [Vulnerability(package="pkg", version="1.0.0", id="PYSEC-1", fix_versions=["1.0.1"])]
+    store.record_scan("repo-a", ["pkg==1.0.0"], findings=findings)
+    store.record_scan("repo-b", ["pkg==1.0.1"])
+    rows = store.find_affected("PYSEC-1")
+    assert [row["repo"] for row in rows] == ["repo-a"]
+
+def test_unparseable_dependency_is_skipped(store):
+    store.record_scan("repo-a", ["not a valid requirement!!", "click==8.1.3"])
+    assert len(store.find_dependents("click")) == 1
+
+def test_history_persists_across_connections(tmp_path):
+    path = str(tmp_path / "history.db")
+    with ScanHistoryStore(path) as store:
+        store.record_scan("repo-a", ["click==8.1.3"])
+    with ScanHistoryStore(path) as store:
+        assert len(store.find_dependents("click")) == 1
+
+def test_query_uses_package_index(store):
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM scan_dependencies WHERE package = ?", ("django",)
+    ).fetchall()
+    assert any("idx_scan_dependencies_package" in row["detail"] for row in plan)
@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import patch
+from src.models.dependency import Dependency
+from src.models.manifest import Manifest
+from src.models.vulnerability import Vulnerability
+from src.services.scan_pipeline import (
+    DEFAULT_WORKERS,
+    build_security_pipeline,
+    build_update_pipeline,
+    parse_worker_spec,
+)
+
+MANIFESTS = {
+    "https://github.com/org/a": Manifest("requirements.txt", ["click==8.1.3", "rich>=13"], sha="abc123"),
+    "https://github.com/org/b": None,
+}
+
+def fake_fetch(url, token=None):
+    if url not in MANIFESTS:
+        raise ValueError(f"Invalid GitHub URL format: {url}")
+    return MANIFESTS[url]
+
+@patch("src.services.update_checker.get_latest_version", lambda name: {"click": "8.2.1", "rich": "13.0"}.get(name))
+@patch("src.services.scan_pipeline.fetch_manifest_from_github", fake_fetch)
+def test_update_pipeline():
+    urls = ["https://github.com/org/a", "https://github.com/org/b", "not-a-url"]
+    results = {item.source: item for item in build_update_pipeline().run(urls)}
+    a = results["https://github.com/org/a"].value
+    assert a["dependencies"] == [Dependency("click", "==8.1.3"), Dependency("rich", ">=13")]
+    assert [u.package for u in a["updates"]] == ["click"]
+    assert a["sha"] == "abc123"
+    assert results["https://github.com/org/b"].value == {"sha": None, "dependencies": [], "updates": []}
+    assert results["not-a-url"].failed_stage == "fetch"
+
+@patch("src.services.scan_pipeline.audit_pinned_requirements")
+@patch("src.services.security_scanner.get_latest_version", lambda name: "13.0")
+@patch("src.services.scan_pipeline.fetch_manifest_from_github", fake_fetch)
+def test_security_pipeline(mock_audit):
+    vuln = Vulnerability(package="click", version="8.1.3", id="PYSEC-1")
+    mock_audit.return_value = [vuln]
+    results = {item.source: item for item in build_security_pipeline().run(list(MANIFESTS))}
+    a = results["https://github.com/org/a"].value
+    assert a["vulnerabilities"] == [vuln]
+    assert a["sha"] == "abc123"
+    # Unpinned dependencies are recorded at the version they were scanned at.
+    assert a["resolved_versions"] == {"click": "8.1.3", "rich": "13.0"}
+    mock_audit.assert_called_once_with(["click==8.1.3", "rich==13.0"])
+    assert results["https://github.com/org/b"].value == {
+        "sha": None, "dependencies": [], "resolved_versions": {}, "vulnerabilities": [],
+    }
+
+def test_parse_worker_spec(monkeypatch):
+    monkeypatch.delenv("PIPELINE_WORKERS", raising=False)
+    assert parse_worker_spec(None) == DEFAULT_WORKERS
+    assert parse_worker_spec("fetch=8, resolve=16")["resolve"] == 16
+    monkeypatch.setenv("PIPELINE_WORKERS", "audit=4")
+    assert parse_worker_spec(None)["audit"] == 4
+    with pytest.raises(ValueError):
+        parse_worker_spec("bogus=1")
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from src.models.manifest import Manifest
+from src.models.vulnerability import Vulnerability
+from src.services import job_queue, scan_worker
+from src.services.job_queue import SQLiteJobQueue
+from src.services.scan_history import ScanHistoryStore
+from src.services.scan_worker import ScanWorker, run_scan_job, run_workers
+
+@pytest.fixture
+def queue_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'jobs.db'}"
+
+@pytest.fixture
+def queue(tmp_path):
+    with SQLiteJobQueue(str(tmp_path / "jobs.db")) as queue:
+        yield queue
+
+def test_workers_process_each_job_once(queue, queue_url):
+    ids = [queue.enqueue("deps", {"url": f"repo-{i}"}) for i in range(12)]
+    seen = []
+    lock = threading.Lock()
+
+    def handler(job):
+        time.sleep(0.05)
+        with lock:
+            seen.append(job.id)
+        return {"url": job.payload["url"]}
+
+    started = time.perf_counter()
+    processed = run_workers(queue_url, concurrency=4, exit_when_idle=True, handler=handler, poll_interval=0.01)
+    elapsed = time.perf_counter() - started
+    assert processed == 12
+    assert sorted(seen) == ids
+    assert elapsed < 12 * 0.05
+    assert queue.get(ids[3]).result == {"url": "repo-3"}
+
+def test_failed_job_is_retried(queue):
+    job_id = queue.enqueue("deps", {"url": "flaky"}, max_attempts=3)
+    calls = []
+
+    def handler(job):
+        calls.append(job.attempts)
+        if job.attempts < 2:
+            raise ConnectionError("GitHub timed out")
+        return {"ok": True}
+
+    worker = ScanWorker(queue, "w1", handler=handler, poll_interval=0.01)
+    assert worker.run(exit_when_idle=True) == 2
+    assert calls == [1, 2]
+    assert (worker.completed, worker.failed) == (1, 1)
+    stored = queue.get(job_id)
+    assert stored.status == "done" and stored.error == "ConnectionError: GitHub timed out"
+
+def test_dead_workers_job_is_picked_up(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "RECLAIM_INTERVAL", 0)
+    job_id = queue.enqueue("deps", {"url": "u"})
+    queue.lease("crashed-worker", 0.05)
+    worker = ScanWorker(queue, "w2", handler=lambda job: {"worker": "w2"}, poll_interval=0.02)
+    assert worker.run(exit_when_idle=True) == 1
+    stored = queue.get(job_id)
+    assert (stored.status, stored.attempts, stored.result) == ("done", 2, {"worker": "w2"})
+
+def test_result_is_dropped_when_lease_is_lost(queue, monkeypatch):
+    job_id = queue.enqueue("deps", {"url": "u"})
+    monkeypatch.setattr(queue, "heartbeat", lambda job, seconds: False)
+    worker = ScanWorker(queue, "w1", lease_seconds=0.06, handler=lambda job: time.sleep(0.1) or {})
+    assert worker.run(max_jobs=1) == 1
+    assert worker.completed == 0
+    assert queue.get(job_id).status == "leased"
+
+def test_run_scan_job_records_history(tmp_path, monkeypatch, queue):
+    monkeypatch.setenv("SCAN_HISTORY_DB", str(tmp_path / "history.db"))
+    monkeypatch.setattr(scan_worker, "fetch_manifest_from_github", lambda url, token=None: Manifest(
+        "requirements.txt", ["django==3.2.0", "requests>=2"], sha="abc123",
+    ))
+    monkeypatch.setattr(scan_worker, "resolve_scan_pins", lambda deps: ["django==3.2.0", "requests==2.19.0"])
+    monkeypatch.setattr(scan_worker, "audit_pinned_requirements", lambda pins: [
+        Vulnerability("django", "3.2.0", "PYSEC-1", "bad", ("3.2.1",)),
+    ])
+    queue.enqueue("security-scan", {"url": "https://github.com/org/a"})
+    result = run_scan_job(queue.lease("w1", 30))
+    assert result["dependencies"] == ["django==3.2.0", "requests>=2"]
+    assert result["sha"] == "abc123"
+    assert [v["id"] for v in result["vulnerabilities"]] == ["PYSEC-1"]
+    # The job record carries the resolved pins too, for hosts without this history store.
+    assert result["resolved_versions"] == {"django": "3.2.0", "requests": "2.19.0"}
+    with ScanHistoryStore() as store:
+        affected = store.find_affected("PYSEC-1")
+        assert [(row["repo"], row["sha"]) for row in affected] == [("https://github.com/org/a", "abc123")]
+        # The unpinned dependency is queryable at the version it was scanned at.
+        assert [row["repo"] for row in store.find_dependents("requests", below="2.20")] == ["https://github.com/org/a"]
+
+def test_run_scan_job_rejects_unknown_kind(queue):
+    queue.enqueue("rewrite-history", {"url": "u"})
+    with pytest.raises(ValueError):
+        run_scan_job(queue.lease("w1", 30))
@@ -0,0 +1,102 @@
+import pytest
+from packaging.specifiers import SpecifierSet
+from src.services.update_planner import MetadataCache, plan_updates
+
+# package -> version -> requires_dist
+FAKE_PYPI = {
+    "alpha": {"1.0": [], "1.5": ["beta<2"], "2.0": ["beta<2"], "3.0a1": []},
+    "beta": {"1.0": [], "1.5": [], "2.0": []},
+    "gamma": {"1.0": ["beta>=5"]},
+    "delta": {"1.0": ["beta>=2; extra == 'fast'", "beta>=9; python_version < '2'"], "1.1": []},
+    "epsilon": {"1.4": [], "2.3.1": []},
+}
+
+@pytest.fixture
+def fake_pypi(monkeypatch):
+    calls = {"project": [], "release": []}
+
+    def fake_fetch_project(name):
+        calls["project"].append(name)
+        releases = FAKE_PYPI.get(name)
+        if releases is None:
+            return None
+        latest = max((v for v in releases if "a" not in v), key=lambda v: tuple(map(int, v.split("."))))
+        return {"releases": list(releases), "latest": latest, "requires_dist": releases[latest]}
+
+    def fake_fetch_requires_dist(name, version):
+        calls["release"].append((name, version))
+        return FAKE_PYPI[name][version]
+
+    monkeypatch.setattr("src.services.update_planner.fetch_project", fake_fetch_project)
+    monkeypatch.setattr("src.services.update_planner.fetch_requires_dist", fake_fetch_requires_dist)
+    return calls
+
+def as_dict(plan):
+    return {item.package: item.new_specifier for item in plan}
+
+def test_plan_picks_compatible_versions(fake_pypi):
+    plan = plan_updates(["alpha>=1.0", "beta==1.0"])
+    assert as_dict(plan) == {"alpha": ">=2.0", "beta": "==1.5"}
+    beta = next(item for item in plan if item.package == "beta")
+    assert beta.latest_version == "2.0"
+
+def test_plan_keeps_declared_version_on_conflict(fake_pypi):
+    plan = plan_updates(["beta==1.0", "alpha>=1.0"])
+    assert as_dict(plan) == {"beta": "==2.0"}
+
+def test_plan_uses_one_round_of_metadata_without_conflicts(fake_pypi):
+    plan = plan_updates(["alpha>=1.0", "beta==1.0"])
+    assert plan
+    assert sorted(fake_pypi["project"]) == ["alpha", "beta"]
+    # Backtracking into beta 1.5 needs its metadata; alpha 2.0 came with the project JSON.
+    assert ("alpha", "2.0") not in fake_pypi["release"]
+
+def test_plan_memoizes_metadata_across_plans(fake_pypi):
+    cache = MetadataCache()
+    plan_updates(["alpha>=1.0", "beta==1.0"], cache=cache)
+    project_calls, release_calls = len(fake_pypi["project"]), len(fake_pypi["release"])
+    plan_updates(["alpha>=1.0", "beta==1.0"], cache=cache)
+    assert len(fake_pypi["project"]) == project_calls
+    assert len(fake_pypi["release"]) == release_calls
+
+def test_plan_respects_other_clauses(fake_pypi):
+    plan = plan_updates(["beta>=1.0,<2"])
+    assert as_dict(plan) == {"beta": ">=1.5,<2"}
+
+def test_plan_keeps_compatible_release_segments(fake_pypi):
+    # ~=1.4 means any 1.x from 1.4; its bump must stay as wide (2.x from 2.3).
+    assert as_dict(plan_updates(["epsilon~=1.4"])) == {"epsilon": "~=2.3"}
+    assert as_dict(plan_updates(["epsilon~=1.4.0"])) == {"epsilon": "~=2.3.1"}
+
+def test_plan_ignores_prereleases_and_extras(fake_pypi):
+    plan = plan_updates(["alpha==2.0", "delta==1.0", "beta==1.0"])
+    assert as_dict(plan) == {"delta": "==1.1", "beta": "==1.5"}
+
+def test_plan_unresolvable(fake_pypi):
+    assert plan_updates(["gamma==1.0", "beta==1.0"]) is None
+
+def test_plan_skips_unknown_and_unbounded(fake_pypi):
+    plan = plan_updates(["missing==1.0", "beta", "beta @ https://example.com/beta.zip"])
+    assert plan == []
+
+def test_plan_up_to_date(fake_pypi):
+    assert plan_updates(["beta==2.0"]) == []
+
+def test_plan_skips_candidates_with_unavailable_metadata(fake_pypi, monkeypatch):
+    # alpha 1.5 needs beta<2. If its metadata can't be fetched, reading that as
+    # "no requirements" would plan alpha 1.5 next to beta 2.0.
+    monkeypatch.setattr(
+        "src.services.update_planner.fetch_requires_dist",
+        lambda name, version: None if (name, version) == ("alpha", "1.5") else FAKE_PYPI[name][version],
+    )
+    assert plan_updates(["beta==2.0", "alpha==1.0"]) == []
+
+def test_failed_metadata_is_fetched_again(fake_pypi, monkeypatch):
+    cache = MetadataCache()
+    monkeypatch.setattr("src.services.update_planner.fetch_requires_dist", lambda name, version: None)
+    assert cache.constraints("alpha", "1.5") is None
+    assert cache.has_constraints("alpha", "1.5")
+
+    monkeypatch.setattr("src.services.update_planner.fetch_requires_dist", lambda name, version: FAKE_PYPI[name][version])
+    cache.forget_unavailable()
+    assert cache.constraints("alpha", "1.5") == {"beta": SpecifierSet("<2")}
@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from src.utils.upstream import CircuitBreaker, CircuitOpenError, UpstreamClient, UpstreamError, slim_pypi_document
+
+class FaultInjectingServer:
+    """A local stand-in for PyPI that fails, hangs or answers on demand."""
+
+    def __init__(self):
+        self.faults = []  # consumed one per request: "error", "hang", "404" or None
+        self.requests = 0
+        self.hang_seconds = 1.0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                    fault = server.faults.pop(0) if server.faults else None
+                if fault == "hang":
+                    time.sleep(server.hang_seconds)
+                if fault == "error":
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                if fault == "404":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = json.dumps({"info": {"version": "1.0.0"}, "path": self.path}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def server():
+    server = FaultInjectingServer()
+    yield server
+    server.close()
+
+@pytest.fixture
+def client():
+    client = UpstreamClient(
+        timeout=0.5, retries=3, backoff_base=0.01, backoff_max=0.05,
+        hedge_after=None, failure_threshold=3, reset_timeout=60, cache_ttl=0,
+    )
+    yield client
+    client.close()
+
+def test_get_json_success(server, client):
+    assert client.get_json(f"{server.url}/pkg/json")["info"]["version"] == "1.0.0"
+
+def test_retries_transient_errors(server, client):
+    server.faults = ["error", "error"]
+    assert client.get_json(f"{server.url}/pkg/json")["path"] == "/pkg/json"
+    assert server.requests == 3
+
+def test_retries_after_timeout(server, client):
+    server.faults = ["hang"]
+    start = time.monotonic()
+    assert client.get_json(f"{server.url}/pkg/json")
+    assert time.monotonic() - start < server.hang_seconds
+
+def test_client_errors_are_not_retried(server, client):
+    server.faults = ["404"]
+    with pytest.raises(requests.HTTPError):
+        client.get_json(f"{server.url}/missing/json")
+    assert server.requests == 1
+    assert client.breaker(server.url.split("//")[1]).state == CircuitBreaker.CLOSED
+
+def test_gives_up_after_retries(server, client):
+    server.faults = ["error"] * 10
+    with pytest.raises(UpstreamError):
+        client.get_json(f"{server.url}/pkg/json")
+
+def test_hedged_request_beats_slow_primary(server):
+    client = UpstreamClient(timeout=5, retries=0, hedge_after=0.05, cache_ttl=0)
+    server.faults = ["hang"]
+    start = time.monotonic()
+    try:
+        assert client.get_json(f"{server.url}/pkg/json")
+    finally:
+        client.close()
+    assert time.monotonic() - start < server.hang_seconds / 2
+    assert server.requests == 2
+
+def test_total_timeout_bounds_attempts_in_flight(server):
+    # Per-attempt timeouts (5 s) plus a hedge would far outlast total_timeout.
+    client = UpstreamClient(timeout=5, retries=3, hedge_after=0.05, total_timeout=0.3, cache_ttl=0)
+    server.hang_seconds = 2.0
+    server.faults = ["hang"] * 10
+    start = time.monotonic()
+    try:
+        with pytest.raises(UpstreamError):
+            client.get(f"{server.url}/pkg/json")
+    finally:
+        client.close()
+    assert time.monotonic() - start < 0.6
+
+def test_no_hedging_while_host_is_failing(server):
+    client = UpstreamClient(timeout=5, retries=0, hedge_after=0.05, cache_ttl=0)
+    client.breaker(server.url.split("//")[1]).record_failure()
+    server.hang_seconds = 0.3
+    server.faults = ["hang"]
+    try:
+        assert client.get_json(f"{server.url}/pkg/json")
+    finally:
+        client.close()
+    assert server.requests == 1
+
+def test_circuit_opens_and_fails_fast(server, client):
+    server.faults = ["error"] * 10
+    with pytest.raises(UpstreamError):
+        client.get_json(f"{server.url}/pkg/json")
+    requests_before = server.requests
+    start = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        client.get_json(f"{server.url}/pkg/json")
+    assert server.requests == requests_before
+    assert time.monotonic() - start < 0.1
+
+def test_serves_stale_cache_while_degraded(server, client):
+    url = f"{server.url}/pkg/json"
+    fresh = client.get_json(url)
+    server.faults = ["error"] * 10
+    assert client.get_json(url) == fresh
+    # The circuit is now open; stale data is still served without calling upstream.
+    requests_before = server.requests
+    assert client.get_json(url) == fresh
+    assert server.requests == requests_before
+
+def test_fresh_cache_skips_upstream(server):
+    client = UpstreamClient(timeout=0.5, hedge_after=None, cache_ttl=60)
+    try:
+        url = f"{server.url}/pkg/json"
+        client.get_json(url)
+        client.get_json(url)
+    finally:
+        client.close()
+    assert server.requests == 1
+
+def test_refresh_json_bypasses_fresh_cache(server):
+    client = UpstreamClient(timeout=0.5, hedge_after=None, cache_ttl=60)
+    try:
+        url = f"{server.url}/pkg/json"
+        client.get_json(url)
+        time.sleep(0.01)
+        age = client.cache_age(url)
+        client.refresh_json(url)
+        assert client.cache_age(url) < age
+        client.get_json(url)
+    finally:
+        client.close()
+    assert server.requests == 2
+
+def test_cache_eviction_is_thread_safe():
+    client = UpstreamClient(max_cache_entries=8, max_workers=1)
+    errors = []
+
+    def fill(n):
+        try:
+            for i in range(3000):
+                client._store(f"https://pypi.test/{n}/{i}", {})
+                client.cache_age(f"https://pypi.test/{n}/{i - 1}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fill, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+    assert errors == []
+    assert len(client._cache) == 8
+
+def test_json_filter_slims_cached_documents(server):
+    client = UpstreamClient(timeout=0.5, hedge_after=None, cache_ttl=60, json_filter=lambda data: data["info"])
+    try:
+        assert client.get_json(f"{server.url}/pkg/json") == {"version": "1.0.0"}
+        assert client.get_json(f"{server.url}/pkg/json") == {"version": "1.0.0"}
+    finally:
+        client.close()
+
+def test_slim_pypi_document_keeps_what_callers_read():
+    document = {
+        "info": {"version": "2.0", "requires_dist": ["idna"], "description": "x" * 10_000},
+        "releases": {
+            "1.0": [{"filename": "a.whl", "yanked": True}, {"filename": "a.tar.gz", "yanked": True}],
+            "2.0": [{"filename": "b.whl", "yanked": False}],
+            "3.0": [],
+        },
+        "urls": [{"filename": "b.whl"}],
+    }
+    assert slim_pypi_document(document) == {
+        "info": {"version": "2.0", "requires_dist": ["idna"]},
+        "releases": {"1.0": [{"yanked": True}], "2.0": [{"yanked": False}], "3.0": []},
+    }
+    assert slim_pypi_document(["not", "pypi"]) == ["not", "pypi"]
+
+def test_circuit_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()  # probe
+    assert not breaker.allow()  # only one probe while half-open
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED